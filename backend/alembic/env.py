@@ -10,7 +10,7 @@ from app.core.config import settings
 from app.db.base import Base
 
 # Import all models here for Alembic to detect them
-from app.models import Usuario, PerfilUsuario, RefreshToken, Actividad, Favorito  # noqa: F401
+from app.models import Usuario, PerfilUsuario, RefreshToken, Actividad, ActividadFavoritoDelta, Favorito  # noqa: F401
 
 # this is the Alembic Config object
 config = context.config
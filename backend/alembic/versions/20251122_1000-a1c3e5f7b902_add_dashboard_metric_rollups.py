@@ -0,0 +1,81 @@
+"""Add dashboard metric rollups (materialized views)
+
+Revision ID: a1c3e5f7b902
+Revises: 6e76fc1483fa
+Create Date: 2025-11-22 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c3e5f7b902'
+down_revision = '6e76fc1483fa'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create rollup materialized views refreshed by the metrics rollup job.
+
+    Every view has a unique index so it can be refreshed CONCURRENTLY
+    (readers are never blocked during a refresh).
+    """
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_dashboard_counts AS
+        SELECT
+            1 AS id,
+            (SELECT count(*) FROM usuarios) AS total_users,
+            (SELECT count(*) FROM usuarios u
+                WHERE u.is_active
+                AND EXISTS (SELECT 1 FROM perfiles_usuario p WHERE p.usuario_id = u.id)) AS active_users,
+            (SELECT count(*) FROM usuarios WHERE is_admin) AS admin_users,
+            (SELECT count(*) FROM favoritos) AS total_favorites,
+            (SELECT count(*) FROM etl_executions) AS total_executions,
+            (SELECT count(*) FROM etl_executions WHERE status = 'SUCCESS') AS success_executions,
+            now() AS refreshed_at
+    """)
+    op.execute("CREATE UNIQUE INDEX uq_mv_dashboard_counts_id ON mv_dashboard_counts (id)")
+    
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_activity_rollups AS
+        SELECT
+            CASE GROUPING(estado, localidad, tipo)
+                WHEN 3 THEN 'estado'
+                WHEN 5 THEN 'localidad'
+                WHEN 6 THEN 'tipo'
+                ELSE 'total'
+            END AS dimension,
+            COALESCE(estado, localidad, tipo, '') AS value,
+            count(*) AS count
+        FROM actividades
+        GROUP BY GROUPING SETS ((estado), (localidad), (tipo), ())
+    """)
+    op.execute("CREATE UNIQUE INDEX uq_mv_activity_rollups ON mv_activity_rollups (dimension, value)")
+    
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_favorites_daily AS
+        SELECT
+            (fecha_guardado AT TIME ZONE 'UTC')::date AS day,
+            count(*) AS count
+        FROM favoritos
+        GROUP BY 1
+    """)
+    op.execute("CREATE UNIQUE INDEX uq_mv_favorites_daily_day ON mv_favorites_daily (day)")
+    
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_top_activities AS
+        SELECT id, titulo, popularidad_favoritos, popularidad_vistas
+        FROM actividades
+        ORDER BY popularidad_favoritos DESC, popularidad_vistas DESC
+        LIMIT 10
+    """)
+    op.execute("CREATE UNIQUE INDEX uq_mv_top_activities_id ON mv_top_activities (id)")
+
+
+def downgrade() -> None:
+    """Drop rollup materialized views."""
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_top_activities")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_favorites_daily")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_activity_rollups")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_dashboard_counts")
@@ -0,0 +1,49 @@
+"""Store refresh token hashes instead of raw tokens
+
+Revision ID: b7d2f4a6c813
+Revises: a1c3e5f7b902
+Create Date: 2025-11-23 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2f4a6c813'
+down_revision = 'a1c3e5f7b902'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Replace the 500-char token column with a 64-char SHA-256 digest.
+
+    Expired and revoked rows are dropped first (they can never be used
+    again), then the remaining tokens are hashed in place so active
+    sessions survive the migration.
+    """
+    op.execute("DELETE FROM refresh_tokens WHERE revoked OR expires_at < now() AT TIME ZONE 'UTC'")
+
+    op.add_column('refresh_tokens', sa.Column('token_hash', sa.String(length=64), nullable=True))
+    op.execute("UPDATE refresh_tokens SET token_hash = encode(sha256(convert_to(token, 'UTF8')), 'hex')")
+    op.alter_column('refresh_tokens', 'token_hash', nullable=False)
+
+    op.drop_index(op.f('ix_refresh_tokens_token'), table_name='refresh_tokens')
+    op.drop_column('refresh_tokens', 'token')
+    op.create_index(op.f('ix_refresh_tokens_token_hash'), 'refresh_tokens', ['token_hash'], unique=True)
+    op.create_index(op.f('ix_refresh_tokens_expires_at'), 'refresh_tokens', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Restore the raw token column.
+
+    Raw tokens cannot be recovered from their digests: every stored
+    refresh token is deleted and users have to log in again.
+    """
+    op.drop_index(op.f('ix_refresh_tokens_expires_at'), table_name='refresh_tokens')
+    op.drop_index(op.f('ix_refresh_tokens_token_hash'), table_name='refresh_tokens')
+    op.execute("DELETE FROM refresh_tokens")
+    op.drop_column('refresh_tokens', 'token_hash')
+    op.add_column('refresh_tokens', sa.Column('token', sa.String(length=500), nullable=False))
+    op.create_index(op.f('ix_refresh_tokens_token'), 'refresh_tokens', ['token'], unique=True)
@@ -0,0 +1,54 @@
+"""Add pending favorite count deltas table
+
+Revision ID: c4e8a1d2f590
+Revises: b7d2f4a6c813
+Create Date: 2025-11-24 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a1d2f590'
+down_revision = 'b7d2f4a6c813'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create the insert-only table favorite writes append to.
+
+    Deltas are folded into actividades.popularidad_favoritos by a scheduled
+    job; no foreign key, so inserts take no lock on the activity row.
+    """
+    op.create_table('actividad_favorito_deltas',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('actividad_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('delta', sa.SmallInteger(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text("(now() AT TIME ZONE 'UTC')")),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        op.f('ix_actividad_favorito_deltas_actividad_id'),
+        'actividad_favorito_deltas',
+        ['actividad_id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Fold pending deltas into the counters, then drop the table."""
+    op.execute("""
+        UPDATE actividades a
+        SET popularidad_favoritos = greatest(a.popularidad_favoritos + d.delta, 0)
+        FROM (
+            SELECT actividad_id, sum(delta) AS delta
+            FROM actividad_favorito_deltas
+            GROUP BY actividad_id
+        ) d
+        WHERE a.id = d.actividad_id
+    """)
+    op.drop_index(op.f('ix_actividad_favorito_deltas_actividad_id'), table_name='actividad_favorito_deltas')
+    op.drop_table('actividad_favorito_deltas')
@@ -5,19 +5,32 @@ Implements requirements RF-006 to RF-010 from SRS.
 """
 from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.dependencies import get_current_user, get_current_admin_user, get_db
-from app.models.user import Usuario
+from app.core.config import settings
+from app.core.dependencies import (
+    get_current_user,
+    get_current_admin_user,
+    get_db,
+    get_favorite_set,
+    get_read_db,
+)
+from app.middleware.admission import admission_control, has_search_query
+from app.middleware.rate_limit import rate_limit_ip
+from app.schemas.auth import UserPrincipal
 from app.services.activity_service import ActivityService
-from app.services import activity_import_service
+from app.services import activity_import_service, similarity_service
+from app.services.activity_serializer import list_item_fields, parse_fields, render_activity_list
+from app.services.favorite_set import FavoriteSetLoader
+from app.utils.http_cache import etag_matches, not_modified, set_cache_headers, weak_etag
 from app.schemas.activity import (
     ActividadCreate,
     ActividadUpdate,
     ActividadResponse,
     ActividadListResponse,
-    ActividadListItem,
+    ActividadSimilarItem,
+    ActividadSimilarResponse,
     ActividadSearchQuery,
     ActividadEstadoUpdate,
     ImportResult,
@@ -27,8 +40,28 @@ from app.schemas.activity import (
 router = APIRouter(prefix="/actividades", tags=["actividades"])
 
 
+def _detail_etag(activity, is_favorite: bool) -> str:
+    """Validator of the detail body: content version plus the popularity counters."""
+    return weak_etag(
+        activity.id,
+        activity.updated_at.isoformat(),
+        activity.popularidad_favoritos,
+        activity.popularidad_vistas,
+        activity.popularidad_normalizada,
+        is_favorite,
+    )
+
+
+def _cache_control(max_age: int, favorites: FavoriteSetLoader) -> str:
+    """Shared caches may keep anonymous responses only (is_favorite is per user)."""
+    visibility = "public" if favorites.usuario_id is None else "private"
+    return f"{visibility}, max-age={max_age}"
+
+
 @router.get("", response_model=ActividadListResponse, summary="Listar actividades (RF-006)")
 async def list_activities(
+    request: Request,
+    
     # Search
     q: Optional[str] = Query(None, description="Búsqueda de texto libre"),
     
@@ -51,14 +84,54 @@ async def list_activities(
     sort_by: str = Query("fecha_inicio", description="Campo para ordenar"),
     sort_order: str = Query("asc", description="Orden: asc o desc"),
     
-    db: AsyncSession = Depends(get_db),
+    # Sparse fieldsets
+    fields: Optional[str] = Query(
+        None,
+        description="Campos a incluir: 'card' o lista separada por comas (p. ej. id,titulo,fecha_inicio)",
+    ),
+    
+    db: AsyncSession = Depends(get_read_db),
+    favorites: FavoriteSetLoader = Depends(get_favorite_set),
+    _rl: None = Depends(rate_limit_ip(settings.RATE_LIMIT_SEARCH, scope="search", per_user=True, when=has_search_query)),
+    _admission: None = Depends(admission_control("search", settings.CONCURRENCY_LIMIT_SEARCH, when=has_search_query)),
 ):
     """
     Lista actividades con filtros y paginación.
     
     **Acceso:** Público (no requiere autenticación)
     Solo muestra actividades con estado 'activa'.
+    
+    Responde 304 si `If-None-Match` coincide con el ETag actual (el ETag
+    cambia con cada modificación del catálogo).
+    
+    `fields=card` devuelve la proyección compacta para tarjetas; también se
+    puede pedir cualquier subconjunto de campos del listado (siempre con `id`).
+    
+    Con token, cada actividad indica `is_favorite` para el usuario (la
+    respuesta pasa a ser privada).
     """
+    try:
+        list_fields = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    
+    # Conditional GET: the ETag only needs the catalog generation, no query.
+    # Favorite writes do not bump it (counts follow the fold job), so the
+    # user's own favorite ids are part of the tag for is_favorite.
+    cache_control = _cache_control(settings.ACTIVITY_LIST_MAX_AGE_SECONDS, favorites)
+    generation = await ActivityService.get_list_generation()
+    etag = None
+    if generation is not None:
+        favorite_ids = sorted(str(actividad_id) for actividad_id in await favorites.ids())
+        etag = weak_etag(
+            "list", generation, favorites.usuario_id, favorite_ids, sorted(request.query_params.multi_items())
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag, cache_control, vary="Authorization")
+    
     # Build query params
     query_params = ActividadSearchQuery(
         q=q,
@@ -80,44 +153,36 @@ async def list_activities(
     activities, pagination = await ActivityService.list_activities(
         db=db,
         query_params=query_params,
+        fields=list_fields,
     )
     
-    # Convert to list items with descripcion_corta
-    list_items = []
-    for activity in activities:
-        desc_corta = activity.descripcion[:200] + "..." if len(activity.descripcion) > 200 else activity.descripcion
-        item = ActividadListItem(
-            id=activity.id,
-            titulo=activity.titulo,
-            descripcion_corta=desc_corta,
-            imagen_url=activity.imagen_url,
-            fecha_inicio=activity.fecha_inicio,
-            localidad=activity.localidad,
-            tipo=activity.tipo,
-            precio=activity.precio,
-            es_gratis=activity.es_gratis,
-            etiquetas=activity.etiquetas,
-            popularidad_favoritos=activity.popularidad_favoritos,
-            popularidad_vistas=activity.popularidad_vistas,
-            popularidad_normalizada=activity.popularidad_normalizada,
-            estado=activity.estado,
-        )
-        list_items.append(item)
-    
-    return ActividadListResponse(data=list_items, pagination=pagination)
+    # Assembled from per-activity JSON fragments (no per-row validation)
+    response = Response(
+        content=render_activity_list(activities, pagination, list_fields, await favorites.ids()),
+        media_type="application/json",
+    )
+    set_cache_headers(response, etag, cache_control, vary="Authorization")
+    return response
 
 
 @router.get("/{activity_id}", response_model=ActividadResponse, summary="Detalle de actividad (RF-007)")
 async def get_activity(
     activity_id: UUID,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
+    favorites: FavoriteSetLoader = Depends(get_favorite_set),
 ):
     """
     Obtiene el detalle completo de una actividad.
     
     **Acceso:** Público (no requiere autenticación)
     
-    Registra una vista para el cálculo de popularidad.
+    Registra una vista para el cálculo de popularidad. Responde 304 si
+    `If-None-Match` coincide con el ETag actual (derivado de `updated_at` y
+    de los contadores de popularidad; la vista de la propia revalidación no
+    lo invalida). Con token, `is_favorite` indica si está en los favoritos
+    del usuario.
     """
     activity = await ActivityService.get_activity_by_id(db, activity_id)
     
@@ -127,17 +192,64 @@ async def get_activity(
             detail="Actividad no encontrada",
         )
     
-    # Register view for popularity
+    is_favorite = await favorites.contains(activity.id)
+    cache_control = _cache_control(settings.ACTIVITY_DETAIL_MAX_AGE_SECONDS, favorites)
+    # Compared before this request's own view is counted, so a client's
+    # revalidation does not invalidate its copy; anyone else's view does
+    matches = etag_matches(request, _detail_etag(activity, is_favorite))
+    
+    # Register view for popularity (revalidations are views too); updates activity
     await ActivityService.register_view(db, activity_id)
     
-    return activity
+    etag = _detail_etag(activity, is_favorite)
+    if matches:
+        return not_modified(etag, cache_control, vary="Authorization")
+    
+    set_cache_headers(response, etag, cache_control, vary="Authorization")
+    return ActividadResponse.model_validate(activity).model_copy(update={"is_favorite": is_favorite})
+
+
+@router.get("/{activity_id}/similares", response_model=ActividadSimilarResponse, summary="Actividades similares")
+async def get_similar_activities(
+    activity_id: UUID,
+    limit: int = Query(10, ge=1, le=50, description="Número máximo de resultados"),
+    db: AsyncSession = Depends(get_read_db),
+    favorites: FavoriteSetLoader = Depends(get_favorite_set),
+):
+    """
+    Lista las actividades más parecidas a una actividad ("más como esta").
+    
+    **Acceso:** Público (no requiere autenticación)
+    
+    La similitud compara título, descripción, etiquetas, tipo, localidad y nivel.
+    """
+    activity = await ActivityService.get_activity_by_id(db, activity_id)
+    
+    if not activity:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Actividad no encontrada",
+        )
+    
+    similar = await similarity_service.get_similar_activities(db, activity_id, limit)
+    
+    favorite_ids = await favorites.ids()
+    items = []
+    for similar_activity, score in similar:
+        items.append(ActividadSimilarItem(
+            **list_item_fields(similar_activity),
+            is_favorite=similar_activity.id in favorite_ids,
+            similitud=min(score, 1.0),
+        ))
+    
+    return ActividadSimilarResponse(data=items)
 
 
 @router.post("", response_model=ActividadResponse, status_code=status.HTTP_201_CREATED, summary="Crear actividad (RF-009)")
 async def create_activity(
     activity_data: ActividadCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_admin_user),
+    current_user: UserPrincipal = Depends(get_current_admin_user),
 ):
     """
     Crea una nueva actividad.
@@ -153,7 +265,7 @@ async def update_activity(
     activity_id: UUID,
     activity_data: ActividadUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_admin_user),
+    current_user: UserPrincipal = Depends(get_current_admin_user),
 ):
     """
     Actualiza una actividad existente.
@@ -175,7 +287,7 @@ async def update_activity(
 async def delete_activity(
     activity_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_admin_user),
+    current_user: UserPrincipal = Depends(get_current_admin_user),
 ):
     """
     Elimina una actividad (soft delete).
@@ -199,7 +311,7 @@ async def delete_activity(
 async def approve_activity(
     activity_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_admin_user),
+    current_user: UserPrincipal = Depends(get_current_admin_user),
 ):
     """
     Aprueba una actividad importada (cambia estado a 'activa').
@@ -222,7 +334,7 @@ async def reject_activity(
     activity_id: UUID,
     estado_data: ActividadEstadoUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_admin_user),
+    current_user: UserPrincipal = Depends(get_current_admin_user),
 ):
     """
     Rechaza una actividad importada (cambia estado a 'rechazada').
@@ -246,7 +358,7 @@ async def reject_activity(
 async def import_activities(
     file: UploadFile = File(..., description="Archivo CSV o JSON"),
     db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_admin_user),
+    current_user: UserPrincipal = Depends(get_current_admin_user),
 ):
     """
     Importa actividades desde un archivo CSV o JSON.
@@ -288,8 +400,9 @@ async def list_all_activities_admin(
     sort_by: str = Query("fecha_inicio", description="Campo para ordenar"),
     sort_order: str = Query("asc", description="Orden: asc o desc"),
     
+    # Primary: admins reload this right after creating/approving/rejecting
     db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_admin_user),
+    current_user: UserPrincipal = Depends(get_current_admin_user),
 ):
     """
     Lista todas las actividades para administradores (incluye todos los estados).
@@ -326,29 +439,7 @@ async def list_all_activities_admin(
         pagination.total = len(activities)
         pagination.total_pages = (len(activities) + page_size - 1) // page_size
     
-    # Convert to list items
-    list_items = []
-    for activity in activities:
-        desc_corta = activity.descripcion[:200] + "..." if len(activity.descripcion) > 200 else activity.descripcion
-        item = ActividadListItem(
-            id=activity.id,
-            titulo=activity.titulo,
-            descripcion_corta=desc_corta,
-            imagen_url=activity.imagen_url,
-            fecha_inicio=activity.fecha_inicio,
-            localidad=activity.localidad,
-            tipo=activity.tipo,
-            precio=activity.precio,
-            es_gratis=activity.es_gratis,
-            etiquetas=activity.etiquetas,
-            popularidad_favoritos=activity.popularidad_favoritos,
-            popularidad_vistas=activity.popularidad_vistas,
-            popularidad_normalizada=activity.popularidad_normalizada,
-            estado=activity.estado,
-        )
-        list_items.append(item)
-    
-    return ActividadListResponse(data=list_items, pagination=pagination)
+    return Response(content=render_activity_list(activities, pagination), media_type="application/json")
 
 
 @router.post("/import", response_model=ImportResult, summary="Importar actividades desde CSV/JSON (RF-010)")
@@ -356,7 +447,7 @@ async def import_activities(
     file: UploadFile = File(...),
     skip_duplicates: bool = Query(True, description="Skip duplicate activities"),
     db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_admin_user)
+    current_user: UserPrincipal = Depends(get_current_admin_user)
 ):
     """
     Import activities from CSV or JSON file.
@@ -6,12 +6,20 @@ from fastapi import APIRouter, Depends, HTTPException, status, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.admin import get_current_admin
-from app.core.dependencies import get_db
-from app.models.user import Usuario
+from app.core.dependencies import get_db, get_read_db
+from app.schemas.auth import UserPrincipal
 from app.models.etl_execution import ETLStatus
 from app.services.admin_service import AdminService
 from app.services.etl_service import ETLService
-from app.db.session import async_session_maker
+from app.services.recommendation_precompute_job import precompute_recommendations_job
+from app.services.activity_serializer import fragment_cache_stats
+from app.db.session import async_session_maker, get_read_session_maker
+from app.core.config import settings
+from app.core.security import password_hash_pool
+from app.middleware.admission import admission_control, admission_controllers
+from app.middleware.rate_limit import rate_limit_ip
+from app.utils.cache import local_cache
+from app.utils.redis_client import pool_stats
 from app.schemas.admin import (
     DashboardMetrics,
     ETLStatusResponse,
@@ -38,15 +46,69 @@ router = APIRouter(prefix="/admin", tags=["admin"])
     description="Get comprehensive metrics for admin dashboard (cached for 5 min)"
 )
 async def get_dashboard_metrics(
-    current_admin: Usuario = Depends(get_current_admin),
-    db: AsyncSession = Depends(get_db)
+    current_admin: UserPrincipal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_read_db),
+    _rl: None = Depends(rate_limit_ip(settings.RATE_LIMIT_DASHBOARD, scope="dashboard", per_user=True)),
+    _admission: None = Depends(admission_control("dashboard", settings.CONCURRENCY_LIMIT_DASHBOARD))
 ):
     """Get dashboard metrics including users, activities, engagement, and ETL stats."""
-    admin_service = AdminService(db)
+    admin_service = AdminService(db, session_factory=get_read_session_maker())
     metrics = await admin_service.get_dashboard_metrics()
     return metrics
 
 
+@router.get(
+    "/system/password-hashing",
+    response_model=dict,
+    summary="Get password hashing pool metrics",
+    description="Queueing metrics for the bcrypt worker pool used by login and register"
+)
+async def get_password_hashing_metrics(
+    current_admin: UserPrincipal = Depends(get_current_admin)
+):
+    """Get bcrypt worker pool metrics (in-flight, queued, wait times, rejections)."""
+    return password_hash_pool.stats()
+
+
+@router.get(
+    "/system/admission",
+    response_model=dict,
+    summary="Get admission control metrics",
+    description="Active, queued, admitted and shed requests per protected route"
+)
+async def get_admission_metrics(
+    current_admin: UserPrincipal = Depends(get_current_admin)
+):
+    """Get per-route admission controller metrics."""
+    return {scope: controller.stats() for scope, controller in admission_controllers.items()}
+
+
+@router.get(
+    "/system/cache",
+    response_model=dict,
+    summary="Get in-process cache metrics",
+    description="Entries, hits, misses and evictions of this worker's L1 cache and activity JSON fragments"
+)
+async def get_cache_metrics(
+    current_admin: UserPrincipal = Depends(get_current_admin)
+):
+    """Get this worker's in-process (L1) cache metrics."""
+    return {**local_cache.stats(), "activity_fragments": fragment_cache_stats()}
+
+
+@router.get(
+    "/system/redis",
+    response_model=dict,
+    summary="Get Redis pool metrics",
+    description="Connections created, in use and available in this worker's shared Redis pool"
+)
+async def get_redis_metrics(
+    current_admin: UserPrincipal = Depends(get_current_admin)
+):
+    """Get this worker's shared Redis connection pool metrics."""
+    return pool_stats()
+
+
 # ========== ETL Management Endpoints ==========
 
 @router.get(
@@ -56,7 +118,7 @@ async def get_dashboard_metrics(
     description="Get status of currently running or last ETL execution"
 )
 async def get_etl_status(
-    current_admin: Usuario = Depends(get_current_admin),
+    current_admin: UserPrincipal = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db)
 ):
     """Get current ETL status or last execution."""
@@ -81,8 +143,8 @@ async def get_etl_status(
 async def get_etl_executions(
     limit: int = 20,
     offset: int = 0,
-    current_admin: Usuario = Depends(get_current_admin),
-    db: AsyncSession = Depends(get_db)
+    current_admin: UserPrincipal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get ETL execution history with pagination."""
     admin_service = AdminService(db)
@@ -98,7 +160,7 @@ async def get_etl_executions(
 )
 async def get_etl_execution_detail(
     execution_id: int,
-    current_admin: Usuario = Depends(get_current_admin),
+    current_admin: UserPrincipal = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db)
 ):
     """Get detailed information for a specific ETL execution."""
@@ -122,7 +184,7 @@ async def get_etl_execution_detail(
 )
 async def trigger_etl(
     request: ETLTriggerRequest,
-    current_admin: Usuario = Depends(get_current_admin),
+    current_admin: UserPrincipal = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -160,7 +222,7 @@ async def trigger_etl(
 )
 async def upload_csv_and_run_etl(
     file: UploadFile,
-    current_admin: Usuario = Depends(get_current_admin),
+    current_admin: UserPrincipal = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -248,7 +310,7 @@ async def upload_csv_and_run_etl(
             async with async_session_maker() as background_db:
                 try:
                     etl_service = ETLService(background_db)
-                    await etl_service.run_csv_etl(execution.id, file_path)
+                    stats = await etl_service.run_csv_etl(execution.id, file_path)
                 except Exception as e:
                     logger.error(f"ETL background task failed: {e}", exc_info=True)
                     # Try to update execution status to failed
@@ -262,6 +324,15 @@ async def upload_csv_and_run_etl(
                             )
                     except Exception as update_error:
                         logger.error(f"Failed to update ETL execution status: {update_error}")
+                    return
+            
+            # New activities: warm the recommendation cache of active users.
+            # The ETL run is already recorded; a failed warm-up only logs.
+            if stats['loaded'] and settings.RECOMMENDATIONS_PRECOMPUTE_ENABLED:
+                try:
+                    await precompute_recommendations_job()
+                except Exception as e:
+                    logger.error(f"Recommendation precompute after ETL failed: {e}", exc_info=True)
         
         # Start ETL in background (fire and forget)
         asyncio.create_task(run_etl_background())
@@ -293,7 +364,8 @@ async def upload_csv_and_run_etl(
 async def get_pending_activities(
     limit: int = 50,
     offset: int = 0,
-    current_admin: Usuario = Depends(get_current_admin),
+    current_admin: UserPrincipal = Depends(get_current_admin),
+    # Primary: the moderation queue must reflect approvals/rejections just made
     db: AsyncSession = Depends(get_db)
 ):
     """Get activities pending validation with pagination."""
@@ -310,7 +382,7 @@ async def get_pending_activities(
 )
 async def approve_activity(
     request: ActivityApprovalRequest,
-    current_admin: Usuario = Depends(get_current_admin),
+    current_admin: UserPrincipal = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db)
 ):
     """Approve a pending activity."""
@@ -337,7 +409,7 @@ async def approve_activity(
 )
 async def reject_activity(
     request: ActivityApprovalRequest,
-    current_admin: Usuario = Depends(get_current_admin),
+    current_admin: UserPrincipal = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db)
 ):
     """Reject a pending activity."""
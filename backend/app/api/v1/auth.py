@@ -8,10 +8,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.dependencies import get_db, get_current_user
 from app.core.config import settings
 from app.middleware.rate_limit import rate_limit_ip
-from app.schemas.auth import UserRegister, UserLogin, Token, TokenRefresh
+from app.schemas.auth import UserRegister, UserLogin, Token, TokenRefresh, UserPrincipal
 from app.schemas.user import UsuarioResponse
 from app.services import auth_service
-from app.models.user import Usuario
 
 router = APIRouter()
 
@@ -79,7 +78,7 @@ async def refresh_token(
 async def logout(
     token_data: TokenRefresh,
     db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """
     Logout by revoking refresh token.
@@ -92,11 +91,18 @@ async def logout(
 
 @router.get("/me", response_model=UsuarioResponse)
 async def get_current_user_info(
-    current_user: Usuario = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get current authenticated user information.
     
     Requires authentication.
     """
-    return current_user
+    user = await auth_service.get_user_by_id(db, current_user.id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return user
@@ -7,16 +7,21 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.dependencies import get_db, get_current_user
-from app.models.user import Usuario
+from app.core.dependencies import get_db, get_read_db, get_current_user
+from app.schemas.auth import UserPrincipal
 from app.schemas.favorite import (
+    FavoritoBatchCheckResponse,
+    FavoritoBatchRequest,
+    FavoritoBatchResult,
     FavoritoCreate,
     FavoritoResponse,
     FavoritoList,
     IsFavoriteResponse
 )
+from app.services.activity_serializer import parse_fields
 from app.services.favorite_service import FavoriteService
 from app.services.recommendation_service import recommendation_service
+from app.db.session import mark_primary_sticky
 
 router = APIRouter()
 
@@ -31,7 +36,7 @@ router = APIRouter()
 async def add_favorite(
     favorito_data: FavoritoCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
     """
     Add activity to user's favorites.
@@ -51,6 +56,9 @@ async def add_favorite(
         # Invalidate recommendation cache
         await recommendation_service.invalidate_cache(current_user.id)
         
+        # Keep this user's reads on the primary until replicas catch up
+        await mark_primary_sticky(current_user.id)
+        
         return favorito
     except ValueError as e:
         raise HTTPException(
@@ -70,8 +78,12 @@ async def list_favorites(
     page_size: int = Query(default=20, ge=1, le=100, description="Items per page"),
     tipo: str = Query(default=None, description="Filter by activity type"),
     localidad: str = Query(default=None, description="Filter by locality"),
-    db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user),
+    fields: str = Query(
+        default=None,
+        description="Activity fields: 'card' or comma-separated list item fields (default: full activity)",
+    ),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
     """
     Get user's favorite activities with pagination and filters.
@@ -81,16 +93,27 @@ async def list_favorites(
     - **page_size**: Items per page (default: 20, max: 100)
     - **tipo**: Filter by activity type (optional)
     - **localidad**: Filter by locality (optional)
+    - **fields**: `card` or a subset of activity list item fields (optional)
     
-    Returns paginated list of favorites with full activity details.
+    Returns paginated list of favorites with full activity details, or only
+    the requested activity fields.
     """
+    try:
+        activity_fields = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
     favoritos = await FavoriteService.get_user_favorites(
         db=db,
         usuario_id=current_user.id,
         page=page,
         page_size=page_size,
         tipo=tipo,
-        localidad=localidad
+        localidad=localidad,
+        fields=activity_fields,
     )
     
     return favoritos
@@ -105,7 +128,7 @@ async def list_favorites(
 async def remove_favorite(
     actividad_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
     """
     Remove activity from user's favorites.
@@ -130,6 +153,9 @@ async def remove_favorite(
     # Invalidate recommendation cache
     await recommendation_service.invalidate_cache(current_user.id)
     
+    # Keep this user's reads on the primary until replicas catch up
+    await mark_primary_sticky(current_user.id)
+    
     return None
 
 
@@ -141,8 +167,8 @@ async def remove_favorite(
 )
 async def check_is_favorite(
     actividad_id: UUID,
-    db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
     """
     Check if activity is in user's favorites.
@@ -163,6 +189,97 @@ async def check_is_favorite(
     )
 
 
+@router.post(
+    "/batch",
+    response_model=FavoritoBatchResult,
+    summary="Add activities to favorites in bulk",
+    description="Add up to 100 activities to the user's favorites in one request (e.g. offline sync)"
+)
+async def add_favorites_batch(
+    batch: FavoritoBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user),
+):
+    """
+    Add several activities to user's favorites.
+    
+    - **actividad_ids**: UUIDs of the activities to favorite
+    
+    Returns which activities were added; already-favorited, missing and
+    inactive activities are listed as unchanged (no error).
+    """
+    result = await FavoriteService.add_favorites_batch(
+        db=db,
+        usuario_id=current_user.id,
+        actividad_ids=batch.actividad_ids
+    )
+    
+    if result.changed:
+        # One invalidation for the whole batch
+        await recommendation_service.invalidate_cache(current_user.id)
+        await mark_primary_sticky(current_user.id)
+    
+    return result
+
+
+@router.post(
+    "/batch/remove",
+    response_model=FavoritoBatchResult,
+    summary="Remove activities from favorites in bulk",
+    description="Remove up to 100 activities from the user's favorites in one request"
+)
+async def remove_favorites_batch(
+    batch: FavoritoBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user),
+):
+    """
+    Remove several activities from user's favorites.
+    
+    - **actividad_ids**: UUIDs of the activities to remove
+    
+    Returns which activities were removed; activities that were not
+    favorites are listed as unchanged (no error).
+    """
+    result = await FavoriteService.remove_favorites_batch(
+        db=db,
+        usuario_id=current_user.id,
+        actividad_ids=batch.actividad_ids
+    )
+    
+    if result.changed:
+        # One invalidation for the whole batch
+        await recommendation_service.invalidate_cache(current_user.id)
+        await mark_primary_sticky(current_user.id)
+    
+    return result
+
+
+@router.post(
+    "/batch/check",
+    response_model=FavoritoBatchCheckResponse,
+    summary="Check several activities",
+    description="Check which of up to 100 activities are in the user's favorites"
+)
+async def check_favorites_batch(
+    batch: FavoritoBatchRequest,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserPrincipal = Depends(get_current_user),
+):
+    """
+    Check several activities against user's favorites with one query.
+    
+    - **actividad_ids**: UUIDs of the activities to check
+    """
+    is_favorite = await FavoriteService.check_favorites_batch(
+        db=db,
+        usuario_id=current_user.id,
+        actividad_ids=batch.actividad_ids
+    )
+    
+    return FavoritoBatchCheckResponse(is_favorite=is_favorite)
+
+
 @router.get(
     "/count",
     response_model=dict,
@@ -170,8 +287,8 @@ async def check_is_favorite(
     description="Get total count of user's favorites"
 )
 async def get_favorite_count(
-    db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
     """
     Get total count of user's favorites.
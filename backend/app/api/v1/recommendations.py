@@ -4,11 +4,14 @@ API endpoints for personalized recommendations.
 Implements requirements RF-014 to RF-015 from SRS.
 """
 from typing import Optional
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.dependencies import get_db, get_optional_current_user
-from app.models.user import Usuario
+from app.core.config import settings
+from app.core.dependencies import get_read_db, get_optional_current_user
+from app.middleware.admission import admission_control
+from app.middleware.rate_limit import rate_limit_ip
+from app.schemas.auth import UserPrincipal
 from app.schemas.recommendation import RecommendationList, RecommendationQuery
 from app.services.recommendation_service import recommendation_service
 
@@ -26,8 +29,10 @@ async def get_recommendations(
     tipo: str = Query(default=None, description="Filter by activity type"),
     localidad: str = Query(default=None, description="Filter by locality"),
     exclude_favorited: bool = Query(default=False, description="Exclude already favorited activities (requires auth)"),
-    db: AsyncSession = Depends(get_db),
-    current_user: Optional[Usuario] = Depends(get_optional_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Optional[UserPrincipal] = Depends(get_optional_current_user),
+    _rl: None = Depends(rate_limit_ip(settings.RATE_LIMIT_RECOMMENDATIONS, scope="recommendations", per_user=True)),
+    _admission: None = Depends(admission_control("recommendations", settings.CONCURRENCY_LIMIT_RECOMMENDATIONS)),
 ):
     """
     Get activity recommendations.
@@ -66,10 +71,11 @@ async def get_recommendations(
         exclude_favorited=exclude_favorited if current_user else False
     )
     
-    recommendations = await recommendation_service.get_recommendations(
+    # Cached JSON is sent as is (no decoding and re-validation per request)
+    recommendations = await recommendation_service.get_recommendations_json(
         db=db,
         usuario_id=current_user.id if current_user else None,
         query_params=query_params
     )
     
-    return recommendations
+    return Response(content=recommendations, media_type="application/json")
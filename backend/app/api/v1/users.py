@@ -4,7 +4,7 @@ User endpoints for profile management.
 from fastapi import APIRouter, Depends, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.dependencies import get_db, get_current_user, get_current_active_user
+from app.core.dependencies import get_db, get_read_db, get_current_user, get_current_active_user
 from app.schemas.user import (
     UsuarioResponse,
     UsuarioWithProfile,
@@ -13,15 +13,16 @@ from app.schemas.user import (
 )
 from app.services import user_service
 from app.services.recommendation_service import recommendation_service
-from app.models.user import Usuario
+from app.db.session import mark_primary_sticky
+from app.schemas.auth import UserPrincipal
 
 router = APIRouter()
 
 
 @router.get("/me", response_model=UsuarioWithProfile)
 async def get_my_profile(
-    current_user: Usuario = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get current user profile with all information.
@@ -34,7 +35,7 @@ async def get_my_profile(
 @router.put("/me/profile", response_model=PerfilUsuarioResponse)
 async def update_my_profile(
     profile_data: PerfilUsuarioUpdate,
-    current_user: Usuario = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -55,12 +56,15 @@ async def update_my_profile(
     # Invalidate recommendation cache since profile affects personalization
     await recommendation_service.invalidate_cache(current_user.id)
     
+    # Keep this user's reads on the primary until replicas catch up
+    await mark_primary_sticky(current_user.id)
+    
     return result
 
 
 @router.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_my_account(
-    current_user: Usuario = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -75,8 +79,8 @@ async def delete_my_account(
 @router.get("/{user_id}", response_model=UsuarioResponse)
 async def get_user(
     user_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """
     Get user by ID (public information only).
@@ -5,13 +5,13 @@ from fastapi import Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.dependencies import get_current_user, get_db
-from app.models.user import Usuario
+from app.schemas.auth import UserPrincipal
 
 
 async def get_current_admin(
-    current_user: Usuario = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
-) -> Usuario:
+) -> UserPrincipal:
     """
     Dependency to get current admin user.
     
@@ -20,7 +20,7 @@ async def get_current_admin(
         db: Database session
         
     Returns:
-        Usuario: Current admin user
+        UserPrincipal: Current admin user
         
     Raises:
         HTTPException: If user is not an admin
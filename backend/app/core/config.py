@@ -20,22 +20,127 @@ class Settings(BaseSettings):
     DATABASE_URL: str
     DB_ECHO: bool = False
     
-    # Redis
+    # Read replicas - Simple string, split by comma (empty = primary only)
+    DATABASE_REPLICA_URLS: str = ""
+    # Seconds a user's reads stay pinned to the primary after a write
+    READ_YOUR_WRITES_SECONDS: int = 10
+    
+    # Redis (one shared pool for all services)
     REDIS_URL: str
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 5.0
+    REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS: float = 2.0
+    REDIS_HEALTH_CHECK_INTERVAL_SECONDS: int = 30
+    
+    # Scheduled jobs run in one process per cluster: the holder of a Postgres
+    # advisory lock (disable election only for single-process deployments)
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_LEADER_ELECTION: bool = True
+    SCHEDULER_LEADER_LOCK_ID: int = 727_100_001
+    SCHEDULER_LEADER_RETRY_SECONDS: int = 15
     
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # Scheduled deletion of expired and revoked refresh tokens (batched)
+    REFRESH_TOKEN_PURGE_ENABLED: bool = True
+    REFRESH_TOKEN_PURGE_INTERVAL_MINUTES: int = 60
+    REFRESH_TOKEN_PURGE_BATCH_SIZE: int = 5000
+    
+    # Password hashing (bcrypt cost factor and off-loop worker pool)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    
+    # Authenticated user principal cache (skips per-request user lookup)
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_TTL_SECONDS: int = 60
     
     # CORS - Simple string, split by comma
     BACKEND_CORS_ORIGINS: str = ""
     
     # Rate Limiting
     RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_ALGORITHM: str = "sliding_window"  # fixed_window, sliding_window, token_bucket
     RATE_LIMIT_LOGIN: str = "5/15minute"
     RATE_LIMIT_REGISTER: str = "3/hour"
+    RATE_LIMIT_RECOMMENDATIONS: str = "60/minute"
+    RATE_LIMIT_SEARCH: str = "120/minute"
+    RATE_LIMIT_DASHBOARD: str = "30/minute"
+    
+    # Admission control (per-route concurrency limits and load shedding)
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_MAX_QUEUE: int = 20
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 2.0
+    CONCURRENCY_LIMIT_RECOMMENDATIONS: int = 8
+    CONCURRENCY_LIMIT_SEARCH: int = 8
+    CONCURRENCY_LIMIT_DASHBOARD: int = 2
+    
+    # Stampede-protected Redis cache (single flight, XFetch, stale-while-revalidate)
+    CACHE_XFETCH_BETA: float = 1.0
+    CACHE_STALE_TTL_SECONDS: int = 300
+    CACHE_LOCK_TTL_SECONDS: float = 30.0
+    CACHE_LOCK_WAIT_SECONDS: float = 5.0
+    CACHE_LOCK_POLL_SECONDS: float = 0.05
+    # In-process L1 in front of Redis (invalidated across workers via pub/sub)
+    CACHE_LOCAL_ENABLED: bool = True
+    CACHE_LOCAL_MAX_ENTRIES: int = 1024
+    CACHE_LOCAL_TTL_SECONDS: float = 30.0
+    
+    # Recommendation precompute for recently active users (after popularity and ETL runs)
+    RECOMMENDATIONS_PRECOMPUTE_ENABLED: bool = True
+    RECOMMENDATIONS_ACTIVE_USER_DAYS: int = 7
+    RECOMMENDATIONS_PRECOMPUTE_LIMIT: int = 10
+    RECOMMENDATIONS_PRECOMPUTE_BATCH_SIZE: int = 500
+    
+    # Collaborative filtering (artifacts from scripts/train_collaborative_filtering.py)
+    CF_ENABLED: bool = True
+    CF_MODEL_DIR: str = "models/collaborative_filtering"
+    CF_BLEND_WEIGHT: float = 0.3
+    CF_TOP_K: int = 50
+    CF_RELOAD_SECONDS: float = 60.0
+    
+    # Similar activities (in-memory TF-IDF + random-projection LSH index per worker)
+    SIMILAR_LSH_TABLES: int = 16
+    SIMILAR_LSH_BITS: int = 8
+    # Smaller catalogs are ranked exactly (as fast as LSH at that size)
+    SIMILAR_EXACT_MAX_ACTIVITIES: int = 5000
+    SIMILAR_SYNC_SECONDS: float = 30.0
+    SIMILAR_REBUILD_RATIO: float = 0.2
+    
+    # HTTP caching of public activity reads (weak ETags, 304 on If-None-Match)
+    ACTIVITY_DETAIL_MAX_AGE_SECONDS: int = 30
+    ACTIVITY_LIST_MAX_AGE_SECONDS: int = 15
+    # Per-worker LRU of serialized activity JSON (list items, recommendations)
+    ACTIVITY_FRAGMENT_CACHE_SIZE: int = 20000
+    
+    # Response compression (brotli when installed, else gzip)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    # Comma-separated path prefixes never compressed (small, secret-bearing responses)
+    COMPRESSION_EXCLUDED_PATHS: str = "/api/v1/auth"
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    # Per-worker LRU of compressed bodies for Cache-Control: public responses
+    COMPRESSION_CACHE_ENABLED: bool = True
+    COMPRESSION_CACHE_MAX_ENTRIES: int = 512
+    
+    # Favorite counts: writes append deltas, folded into actividades by this job
+    FAVORITE_COUNTER_FOLD_INTERVAL_MINUTES: int = 1
+    FAVORITE_COUNTER_FOLD_BATCH_SIZE: int = 10000
+    # Per-user favorite id sets in Redis (is_favorite on lists and detail)
+    FAVORITE_SET_TTL_SECONDS: int = 3600
+    
+    # Prometheus metrics (/metrics, request latency middleware, DB query timing)
+    METRICS_ENABLED: bool = True
+    
+    # Dashboard metric rollups (materialized views refreshed by the scheduler)
+    METRICS_ROLLUPS_ENABLED: bool = True
+    METRICS_ROLLUP_REFRESH_MINUTES: int = 5
+    # Per-write Redis counters keeping favorite totals current between refreshes
+    METRICS_INCREMENTAL_COUNTERS: bool = False
     
     class Config:
         env_file = ".env"
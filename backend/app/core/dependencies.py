@@ -8,8 +8,9 @@ from jose import JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import decode_token
-from app.db.session import get_session
-from app.models.user import Usuario
+from app.db.session import get_session, get_read_session, is_primary_sticky
+from app.schemas.auth import UserPrincipal
+from app.services.favorite_set import FavoriteSetLoader
 
 
 # OAuth2 scheme for token authentication (uses form endpoint for Swagger UI compatibility)
@@ -30,25 +31,80 @@ async def get_db() -> AsyncSession:
         yield session
 
 
+async def get_read_db(
+    token: Optional[str] = Depends(oauth2_scheme_optional)
+) -> AsyncSession:
+    """
+    Dependency to get a database session for read-only endpoints.
+    
+    Routes to a read replica when configured. Authenticated users who wrote
+    recently (favorites, profile) stay on the primary so they read their
+    own writes.
+    
+    Args:
+        token: Optional JWT access token
+        
+    Yields:
+        AsyncSession: Replica or primary database session
+    """
+    use_primary = False
+    if token:
+        try:
+            user_id = decode_token(token).get("sub")
+            if user_id is not None:
+                use_primary = await is_primary_sticky(int(user_id))
+        except (JWTError, ValueError):
+            pass
+    
+    async for session in get_read_session(use_primary=use_primary):
+        yield session
+
+
+async def _load_principal(db: AsyncSession, user_id: int) -> Optional[UserPrincipal]:
+    """
+    Resolve a user ID to its principal, using the principal cache first.
+    
+    Args:
+        db: Database session (only used on cache miss)
+        user_id: User ID from the token subject
+        
+    Returns:
+        User principal or None if the user does not exist
+    """
+    from app.services import principal_cache
+    from app.services.auth_service import get_user_by_id
+    
+    principal = await principal_cache.get_principal(user_id)
+    if principal is not None:
+        return principal
+    
+    user = await get_user_by_id(db, user_id)
+    if user is None:
+        return None
+    
+    return await principal_cache.set_principal(user)
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
-) -> Usuario:
+) -> UserPrincipal:
     """
     Dependency to get current authenticated user from JWT token.
     
+    The user is resolved through a short-TTL principal cache so most
+    authenticated requests skip the database lookup.
+    
     Args:
         token: JWT access token
         db: Database session
         
     Returns:
-        Current user object
+        Current user principal
         
     Raises:
         HTTPException: If token is invalid or user not found
     """
-    from app.services.auth_service import get_user_by_id
-    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -63,7 +119,7 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = await get_user_by_id(db, int(user_id))
+    user = await _load_principal(db, int(user_id))
     if user is None:
         raise credentials_exception
     
@@ -71,8 +127,8 @@ async def get_current_user(
 
 
 async def get_current_active_user(
-    current_user: Usuario = Depends(get_current_user)
-) -> Usuario:
+    current_user: UserPrincipal = Depends(get_current_user)
+) -> UserPrincipal:
     """
     Dependency to get current active user.
     
@@ -94,8 +150,8 @@ async def get_current_active_user(
 
 
 async def get_current_admin_user(
-    current_user: Usuario = Depends(get_current_active_user)
-) -> Usuario:
+    current_user: UserPrincipal = Depends(get_current_active_user)
+) -> UserPrincipal:
     """
     Dependency to get current admin user.
     
@@ -119,7 +175,7 @@ async def get_current_admin_user(
 async def get_optional_current_user(
     token: Optional[str] = Depends(oauth2_scheme_optional),
     db: AsyncSession = Depends(get_db)
-) -> Optional[Usuario]:
+) -> Optional[UserPrincipal]:
     """
     Dependency to get current user if authenticated, None otherwise.
     
@@ -132,20 +188,39 @@ async def get_optional_current_user(
         db: Database session
         
     Returns:
-        Current user object if authenticated, None otherwise
+        Current user principal if authenticated, None otherwise
     """
     if not token:
         return None
     
     try:
-        from app.services.auth_service import get_user_by_id
-        
         payload = decode_token(token)
         user_id: str = payload.get("sub")
         if user_id is None:
             return None
         
-        user = await get_user_by_id(db, int(user_id))
-        return user
+        return await _load_principal(db, int(user_id))
     except JWTError:
         return None
+
+
+async def get_favorite_set(
+    current_user: Optional[UserPrincipal] = Depends(get_optional_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> FavoriteSetLoader:
+    """
+    Dependency to get the current user's favorite ids for ``is_favorite``.
+    
+    Ids are loaded at most once per request, on first use (nothing is
+    loaded for anonymous requests). The session is on the primary so a
+    cache fill never stores ids from a lagging replica; it only connects
+    on a cache miss.
+    
+    Args:
+        current_user: Current user principal, if authenticated
+        db: Primary database session
+        
+    Returns:
+        Per-request favorite set loader
+    """
+    return FavoriteSetLoader(db, current_user.id if current_user else None)
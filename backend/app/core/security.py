@@ -1,16 +1,129 @@
 """
 Security utilities for authentication and password hashing.
 """
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Optional
+from typing import Any, Callable, Dict, Optional, TypeVar
+import time
 import uuid
+from fastapi import HTTPException, status
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
+T = TypeVar("T")
+
 
 # Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+
+class PasswordHashPool:
+    """
+    Bounded thread pool that runs bcrypt off the event loop.
+    
+    bcrypt releases the GIL, so a small thread pool keeps hashing from
+    blocking other requests. Calls beyond max_workers wait in the pool
+    queue; once max_queue callers are waiting, new ones are rejected with
+    503 so a login storm cannot pile up unbounded work.
+    """
+    
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        
+        # Metrics
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+        self.max_wait_seconds = 0.0
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get or create the thread pool."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="bcrypt"
+            )
+        return self._executor
+    
+    @property
+    def queued(self) -> int:
+        """Number of calls waiting for a free worker."""
+        return max(self.in_flight - self.max_workers, 0)
+    
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """
+        Run a blocking hashing function in the pool.
+        
+        Raises:
+            HTTPException: 503 if the queue is full
+        """
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service busy. Please try again later.",
+                headers={"Retry-After": "1"},
+            )
+        
+        submitted_at = time.perf_counter()
+        
+        def _timed() -> tuple[float, float, T]:
+            started_at = time.perf_counter()
+            result = func(*args)
+            return started_at - submitted_at, time.perf_counter() - started_at, result
+        
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            wait, run, result = await loop.run_in_executor(self._get_executor(), _timed)
+        finally:
+            self.in_flight -= 1
+        
+        self.completed += 1
+        self.total_wait_seconds += wait
+        self.total_run_seconds += run
+        self.max_wait_seconds = max(self.max_wait_seconds, wait)
+        return result
+    
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool queueing metrics."""
+        completed = self.completed or 1
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.total_wait_seconds / completed * 1000, 2),
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+            "avg_run_ms": round(self.total_run_seconds / completed * 1000, 2),
+        }
+    
+    def shutdown(self) -> None:
+        """Shut down the thread pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Global password hashing pool
+password_hash_pool = PasswordHashPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -40,6 +153,33 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password on the hashing pool without blocking the event loop.
+    
+    Args:
+        plain_password: Plain text password
+        hashed_password: Hashed password from database
+        
+    Returns:
+        True if password matches, False otherwise
+    """
+    return await password_hash_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Hash a password on the hashing pool without blocking the event loop.
+    
+    Args:
+        password: Plain text password
+        
+    Returns:
+        Hashed password
+    """
+    return await password_hash_pool.run(get_password_hash, password)
+
+
 def create_access_token(subject: str | Any, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token with unique identifier.
@@ -96,6 +236,22 @@ def create_refresh_token(subject: str | Any) -> str:
     return encoded_jwt
 
 
+def hash_refresh_token(token: str) -> str:
+    """
+    Digest of a refresh token, as stored in the database and revocation set.
+    
+    Refresh tokens are random JWTs, so an unsalted SHA-256 is enough: a
+    leaked table cannot be replayed, and lookups stay on a 64-char index.
+    
+    Args:
+        token: Encoded JWT refresh token
+        
+    Returns:
+        Hex SHA-256 digest (64 characters)
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
 def decode_token(token: str) -> dict[str, Any]:
     """
     Decode and verify a JWT token.
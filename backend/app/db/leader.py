@@ -0,0 +1,116 @@
+"""
+Cluster-wide leader election on a Postgres advisory lock.
+
+Every API process runs the same lifespan, so without coordination each
+worker (and each replica of the container) would run every scheduled job.
+The process holding ``pg_try_advisory_lock(SCHEDULER_LEADER_LOCK_ID)`` is
+the leader; the others keep retrying and take over within one interval
+after the leader exits.
+
+The lock is session-level: it lives as long as one dedicated connection
+(in autocommit, so it never sits idle in a transaction) and Postgres
+releases it by itself if the process dies or the connection drops.
+"""
+import asyncio
+import logging
+from typing import Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderElection:
+    """Acquire, hold and release leadership for one advisory lock id."""
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        lock_id: int,
+        on_elected: Callable[[], None],
+        on_demoted: Callable[[], None],
+        interval: float = 15,
+    ):
+        self.engine = engine
+        self.lock_id = lock_id
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.interval = interval
+        self.is_leader = False
+        self._connection: Optional[AsyncConnection] = None
+
+    async def run(self) -> None:
+        """Poll until cancelled: try to become leader, or check the lock is still held."""
+        while True:
+            await self.poll()
+            await asyncio.sleep(self.interval)
+
+    async def poll(self) -> None:
+        """One election round."""
+        if self.is_leader:
+            await self._check()
+        else:
+            await self._try_acquire()
+
+    async def stop(self) -> None:
+        """Give up leadership (if held) so another process takes over right away."""
+        connection = self._connection
+        if self.is_leader:
+            self._demote()
+        if connection is None:
+            return
+        try:
+            await connection.execute(text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": self.lock_id})
+        except Exception as e:
+            logger.warning(f"Could not release scheduler leader lock: {e}")
+        await self._close(connection)
+
+    async def _try_acquire(self) -> None:
+        try:
+            connection = await self.engine.connect()
+        except Exception as e:
+            logger.warning(f"Scheduler leader election could not connect: {e}")
+            return
+
+        try:
+            await connection.execution_options(isolation_level="AUTOCOMMIT")
+            result = await connection.execute(
+                text("SELECT pg_try_advisory_lock(:lock_id)"), {"lock_id": self.lock_id}
+            )
+            acquired = bool(result.scalar())
+        except Exception as e:
+            logger.warning(f"Scheduler leader election failed: {e}")
+            await self._close(connection)
+            return
+
+        if not acquired:
+            await self._close(connection)
+            return
+
+        self._connection = connection
+        self.is_leader = True
+        logger.info(f"Elected scheduler leader (advisory lock {self.lock_id})")
+        self.on_elected()
+
+    async def _check(self) -> None:
+        try:
+            await self._connection.execute(text("SELECT 1"))
+        except Exception as e:
+            # The server released the lock with the connection
+            logger.warning(f"Lost scheduler leadership: {e}")
+            connection = self._connection
+            self._demote()
+            await self._close(connection)
+
+    def _demote(self) -> None:
+        self.is_leader = False
+        self._connection = None
+        self.on_demoted()
+
+    @staticmethod
+    async def _close(connection: AsyncConnection) -> None:
+        try:
+            await connection.close()
+        except Exception as e:
+            logger.warning(f"Error closing scheduler leader connection: {e}")
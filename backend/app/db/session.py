@@ -1,10 +1,20 @@
 """
 Database session management.
+
+Writes always go to the primary ``engine``. When ``DATABASE_REPLICA_URLS`` is
+set, read-only endpoints can use ``get_read_session`` to be routed to one of
+the replicas (round robin), falling back to the primary otherwise.
 """
+import itertools
+import logging
+from typing import AsyncGenerator, List
+
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 
 # Create async engine
 engine = create_async_engine(
@@ -20,13 +30,116 @@ async_session_maker = async_sessionmaker(
     expire_on_commit=False
 )
 
+# Read replica engines and session factories (empty when no replicas configured)
+replica_urls = [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
+replica_engines = [
+    create_async_engine(url, echo=settings.DB_ECHO, future=True)
+    for url in replica_urls
+]
+
+replica_session_makers: List[async_sessionmaker] = [
+    async_sessionmaker(replica_engine, class_=AsyncSession, expire_on_commit=False)
+    for replica_engine in replica_engines
+]
+
+_replica_cycle = itertools.cycle(replica_session_makers) if replica_session_makers else None
+
+# Redis key prefix for read-your-writes stickiness
+STICKY_KEY_PREFIX = "db:sticky:user"
+
 
 async def get_session() -> AsyncSession:
     """
     Dependency to get database session.
-    
+
     Yields:
         AsyncSession: Database session
     """
     async with async_session_maker() as session:
         yield session
+
+
+def get_read_session_maker(use_primary: bool = False) -> async_sessionmaker:
+    """
+    Pick the session factory for read-only work.
+
+    Args:
+        use_primary: Force the primary (e.g. read-your-writes stickiness)
+
+    Returns:
+        Next replica session factory, or the primary if no replicas are configured
+    """
+    if _replica_cycle is not None and not use_primary:
+        return next(_replica_cycle)
+    return async_session_maker
+
+
+async def get_read_session(use_primary: bool = False) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Get a session for read-only work.
+
+    Args:
+        use_primary: Force the primary (e.g. read-your-writes stickiness)
+
+    Yields:
+        AsyncSession: Replica session, or primary if no replicas are configured
+    """
+    async with get_read_session_maker(use_primary)() as session:
+        yield session
+
+
+async def mark_primary_sticky(usuario_id: int) -> None:
+    """
+    Pin a user's reads to the primary for READ_YOUR_WRITES_SECONDS.
+
+    Called after a user mutates their favorites or profile so the next reads
+    do not hit a replica that has not replayed the write yet. No-op when no
+    replicas are configured.
+
+    Args:
+        usuario_id: User ID
+    """
+    if not replica_session_makers:
+        return
+
+    from app.utils.redis_client import get_redis
+
+    try:
+        await get_redis().setex(
+            f"{STICKY_KEY_PREFIX}:{usuario_id}",
+            settings.READ_YOUR_WRITES_SECONDS,
+            1
+        )
+    except Exception as e:
+        logger.warning(f"Could not mark user {usuario_id} sticky to primary: {e}")
+
+
+async def is_primary_sticky(usuario_id: int) -> bool:
+    """
+    Check whether a user's reads must go to the primary.
+
+    Args:
+        usuario_id: User ID
+
+    Returns:
+        True if the user wrote recently (or Redis is unavailable)
+    """
+    if not replica_session_makers:
+        return True
+
+    from app.utils.redis_client import get_redis
+
+    try:
+        return bool(await get_redis().exists(f"{STICKY_KEY_PREFIX}:{usuario_id}"))
+    except Exception as e:
+        # Without the marker we cannot guarantee read-your-writes; stay safe
+        logger.warning(f"Could not check primary stickiness for user {usuario_id}: {e}")
+        return True
+
+
+async def dispose_engines() -> None:
+    """Dispose primary and replica engine pools."""
+    await engine.dispose()
+    for replica_engine in replica_engines:
+        await replica_engine.dispose()
@@ -1,15 +1,27 @@
 """
 Main FastAPI application.
 """
+import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 import logging
 
 from app.core.config import settings
 from app.services.popularity_job import recalculate_popularity_job
-from app.services.recommendation_service import recommendation_service
+from app.services.favorite_counters import fold_favorite_counters_job
+from app.services.metrics_rollup_job import refresh_metric_rollups_job
+from app.services.refresh_token_store import purge_refresh_tokens_job
+from app.db.leader import LeaderElection
+from app.db.session import dispose_engines, engine, replica_engines
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.metrics import PrometheusMiddleware
+from app.core.security import password_hash_pool
+from app.utils.cache import run_invalidation_listener
+from app.utils.metrics import instrument_engine, render_metrics
+from app.utils.redis_client import close_redis, init_redis
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +35,9 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting application...")
     
+    # Shared Redis pool used by every service
+    await init_redis()
+    
     # Schedule daily popularity recalculation at 2 AM
     scheduler.add_job(
         recalculate_popularity_job,
@@ -32,15 +47,83 @@ async def lifespan(app: FastAPI):
         id='recalculate_popularity',
         replace_existing=True
     )
-    scheduler.start()
-    logger.info("Scheduler started - popularity job scheduled for 2 AM daily")
+    
+    # Refresh dashboard metric rollups
+    if settings.METRICS_ROLLUPS_ENABLED:
+        scheduler.add_job(
+            refresh_metric_rollups_job,
+            'interval',
+            minutes=settings.METRICS_ROLLUP_REFRESH_MINUTES,
+            id='refresh_metric_rollups',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+    
+    # Fold pending favorite count changes into actividades
+    scheduler.add_job(
+        fold_favorite_counters_job,
+        'interval',
+        minutes=settings.FAVORITE_COUNTER_FOLD_INTERVAL_MINUTES,
+        id='fold_favorite_counters',
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+    
+    # Delete expired and revoked refresh tokens
+    if settings.REFRESH_TOKEN_PURGE_ENABLED:
+        scheduler.add_job(
+            purge_refresh_tokens_job,
+            'interval',
+            minutes=settings.REFRESH_TOKEN_PURGE_INTERVAL_MINUTES,
+            id='purge_refresh_tokens',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+    
+    # Only one process per cluster runs the jobs: with leader election the
+    # scheduler starts paused and is resumed while this process holds the lock
+    leader = None
+    leader_task = None
+    if settings.SCHEDULER_ENABLED and settings.SCHEDULER_LEADER_ELECTION:
+        scheduler.start(paused=True)
+        leader = LeaderElection(
+            engine,
+            settings.SCHEDULER_LEADER_LOCK_ID,
+            on_elected=scheduler.resume,
+            on_demoted=scheduler.pause,
+            interval=settings.SCHEDULER_LEADER_RETRY_SECONDS,
+        )
+        leader_task = asyncio.create_task(leader.run())
+        logger.info("Scheduler started paused - waiting for leader election")
+    elif settings.SCHEDULER_ENABLED:
+        scheduler.start()
+        logger.info("Scheduler started - popularity job scheduled for 2 AM daily")
+    
+    # Apply in-process cache invalidations published by other workers
+    invalidation_listener = None
+    if settings.CACHE_LOCAL_ENABLED:
+        invalidation_listener = asyncio.create_task(run_invalidation_listener())
     
     yield
     
     # Shutdown
     logger.info("Shutting down application...")
-    scheduler.shutdown()
-    await recommendation_service.close()
+    if leader_task is not None:
+        # Pause the jobs and release the lock so another process takes over now
+        leader_task.cancel()
+        await asyncio.gather(leader_task, return_exceptions=True)
+        await leader.stop()
+    if scheduler.running:
+        scheduler.shutdown()
+    if invalidation_listener is not None:
+        invalidation_listener.cancel()
+        await asyncio.gather(invalidation_listener, return_exceptions=True)
+    await close_redis()
+    await dispose_engines()
+    password_hash_pool.shutdown()
     logger.info("Application shutdown complete")
 
 
@@ -51,6 +134,7 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -66,6 +150,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli for large responses (inside the metrics middleware, so latency includes it)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        excluded_paths=[path.strip() for path in settings.COMPRESSION_EXCLUDED_PATHS.split(",") if path.strip()],
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        cache_entries=settings.COMPRESSION_CACHE_MAX_ENTRIES if settings.COMPRESSION_CACHE_ENABLED else 0,
+    )
+
+# Request latency, status codes and per-request DB query metrics
+if settings.METRICS_ENABLED:
+    app.add_middleware(PrometheusMiddleware)
+    for instrumented_engine in [engine, *replica_engines]:
+        instrument_engine(instrumented_engine)
+
 
 @app.get("/")
 async def root():
@@ -83,6 +184,13 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics endpoint."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 # Include API routers
 from app.api.v1 import auth, users, activities, favorites, recommendations, admin
 
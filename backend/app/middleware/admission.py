@@ -0,0 +1,133 @@
+"""
+Concurrency-aware admission control for expensive endpoints.
+
+Each protected route gets an AdmissionController that admits at most
+``max_concurrency`` requests at a time. Extra requests wait in a bounded
+queue; when the queue is full, or a request waits longer than the queue
+timeout, it is shed with 503 and a Retry-After header. A traffic spike then
+degrades into fast 503s instead of saturating the database pool.
+"""
+from __future__ import annotations
+import asyncio
+import math
+from typing import Any, AsyncGenerator, Callable, Dict, Optional
+from fastapi import HTTPException, Request, status
+
+
+class AdmissionController:
+    """Per-route concurrency limit with a bounded wait queue."""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        # Metrics
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
+
+    def _shed(self) -> HTTPException:
+        """Count a shed request and build the 503 response."""
+        self.shed += 1
+        retry_after = str(max(math.ceil(self.queue_timeout), 1))
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={
+                "message": "Service is busy. Please try again later.",
+                "retry_after": int(retry_after),
+            },
+            headers={"Retry-After": retry_after},
+        )
+
+    async def acquire(self) -> None:
+        """
+        Wait for a slot.
+
+        Raises:
+            HTTPException: 503 if the queue is full or the wait times out
+        """
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            raise self._shed()
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._shed()
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        self.admitted += 1
+
+    def release(self) -> None:
+        """Free a slot."""
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of admission metrics."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "shed": self.shed,
+        }
+
+
+# Controllers by scope, for metrics
+admission_controllers: Dict[str, AdmissionController] = {}
+
+
+def admission_control(
+    scope: str,
+    max_concurrency: int,
+    max_queue: Optional[int] = None,
+    when: Optional[Callable[[Request], bool]] = None,
+) -> Callable[[Request], AsyncGenerator[None, None]]:
+    """Factory for a FastAPI dependency that limits concurrent requests per scope.
+
+    Usage:
+        Depends(admission_control("recommendations", settings.CONCURRENCY_LIMIT_RECOMMENDATIONS))
+    """
+    from app.core.config import settings
+
+    controller = admission_controllers.get(scope)
+    if controller is None:
+        controller = AdmissionController(
+            name=scope,
+            max_concurrency=max_concurrency,
+            max_queue=max_queue if max_queue is not None else settings.ADMISSION_MAX_QUEUE,
+            queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        )
+        admission_controllers[scope] = controller
+
+    async def _dependency(request: Request) -> AsyncGenerator[None, None]:
+        if not settings.ADMISSION_CONTROL_ENABLED or (when is not None and not when(request)):
+            yield
+            return
+
+        await controller.acquire()
+        try:
+            yield
+        finally:
+            controller.release()
+
+    return _dependency
+
+
+def has_search_query(request: Request) -> bool:
+    """Predicate for list endpoints: only free-text searches are expensive."""
+    return bool(request.query_params.get("q"))
@@ -0,0 +1,189 @@
+"""
+Response compression (brotli or gzip) negotiated from Accept-Encoding.
+
+Pure ASGI middleware. Only complete (non-streaming) bodies of compressible
+content types reach the compressor, and only above a size threshold:
+compressing a 200-byte token response costs more CPU than the bytes saved.
+Routes can be opted out by path prefix (auth responses are small and
+sensitive to compression side channels).
+
+Responses marked ``Cache-Control: public`` are the same for every client,
+so their compressed bodies are kept in a per-worker LRU keyed by encoding
+and body digest: a hot activity list is compressed once, not per request.
+
+Brotli is used when the ``brotli`` package is installed; gzip otherwise.
+"""
+from __future__ import annotations
+import gzip
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.cache import LocalLRUCache
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """
+    Parse an Accept-Encoding header into coding -> q value.
+
+    Args:
+        header: Header value, e.g. ``"br;q=1.0, gzip;q=0.8, *;q=0.1"``
+
+    Returns:
+        Dict of lower-case coding to quality (0 means refused)
+    """
+    codings: Dict[str, float] = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        codings[coding] = quality
+    return codings
+
+
+def choose_encoding(header: str, available: Iterable[str]) -> Optional[str]:
+    """
+    Pick the best encoding the client accepts, in server preference order.
+
+    Args:
+        header: Accept-Encoding header value
+        available: Supported encodings, most preferred first
+
+    Returns:
+        Encoding name, or None to send the body as is
+    """
+    codings = parse_accept_encoding(header)
+    wildcard = codings.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in available:
+        quality = codings.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str, gzip_level: int, brotli_quality: int) -> bytes:
+    """Compress a body with gzip or brotli."""
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    """Compress large, compressible responses with the best accepted encoding."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        excluded_paths: Iterable[str] = (),
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        cache_entries: int = 0,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.excluded_paths = tuple(excluded_paths)
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.encodings: List[str] = ["br", "gzip"] if BROTLI_AVAILABLE else ["gzip"]
+        self.cache = LocalLRUCache(max_entries=cache_entries, ttl=300) if cache_entries > 0 else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.excluded_paths):
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                start = message
+                return
+
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            # Streaming bodies are sent untouched
+            if message.get("more_body", False):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            start, body = self._encode(start, message.get("body", b""), encoding)
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _encode(self, start: Message, body: bytes, encoding: str) -> Tuple[Message, bytes]:
+        """Compress a complete response if it qualifies; fix up its headers."""
+        headers = MutableHeaders(raw=list(start["headers"]))
+        content_type = headers.get("content-type", "")
+        if "content-encoding" in headers or not content_type.startswith(COMPRESSIBLE_TYPES):
+            return start, body
+
+        # The representation depends on Accept-Encoding from here on
+        headers.add_vary_header("Accept-Encoding")
+        if len(body) < self.minimum_size:
+            return {**start, "headers": headers.raw}, body
+
+        compressed = self._compress(body, encoding, headers.get("cache-control", ""))
+        headers["Content-Encoding"] = encoding
+        headers["Content-Length"] = str(len(compressed))
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            # Same content, different bytes: only a weak validator still holds
+            headers["ETag"] = f"W/{etag}"
+        return {**start, "headers": headers.raw}, compressed
+
+    def _compress(self, body: bytes, encoding: str, cache_control: str) -> bytes:
+        """Compress, reusing the result for identical public bodies."""
+        if self.cache is None or "public" not in cache_control:
+            return compress(body, encoding, self.gzip_level, self.brotli_quality)
+
+        key = f"{encoding}:{hashlib.sha1(body).hexdigest()}"
+        compressed = self.cache.get(key)
+        if compressed is None:
+            compressed = compress(body, encoding, self.gzip_level, self.brotli_quality)
+            self.cache.set(key, compressed)
+        return compressed
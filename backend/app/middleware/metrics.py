@@ -0,0 +1,60 @@
+"""
+Request latency instrumentation.
+
+Pure ASGI middleware (no extra task per request, unlike BaseHTTPMiddleware)
+recording, for every HTTP request: latency and status code by route
+template, in-flight requests, and the number of SQL queries it issued.
+See app.utils.metrics for the collectors.
+"""
+from __future__ import annotations
+import time
+from typing import Any, Dict
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metrics import (
+    DB_QUERIES_PER_REQUEST,
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS,
+    HTTP_REQUESTS_IN_FLIGHT,
+    finish_request,
+    start_request,
+)
+
+# Not measured: scrapes would dominate the histograms
+EXCLUDED_PATHS = {"/metrics"}
+
+
+class PrometheusMiddleware:
+    """Record latency, status code and DB query count of each HTTP request."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        response: Dict[str, Any] = {"status": 500}
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            await send(message)
+
+        stats, token = start_request(scope)
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method=method)
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - stats.started
+            in_flight.dec()
+            finish_request(token)
+
+            route = stats.route
+            HTTP_REQUEST_DURATION.labels(method=method, route=route).observe(elapsed)
+            HTTP_REQUESTS.labels(method=method, route=route, status=str(response["status"])).inc()
+            DB_QUERIES_PER_REQUEST.labels(route=route).observe(stats.queries)
@@ -1,8 +1,22 @@
 """
-Simple rate limiting dependency using Redis and fixed window counters.
+Rate limiting dependency backed by Redis.
+
+Three algorithms are available, each executed as a single atomic Lua script
+(one Redis round trip per request):
+
+- ``fixed_window``: counter per window (allows bursts at window edges)
+- ``sliding_window``: sliding-window log in a sorted set (exact, no edge bursts)
+- ``token_bucket``: refill at ``max_requests / window`` per second, burst up to
+  ``max_requests``
+
+A local in-process pre-filter remembers clients that Redis already rejected
+and rejects them until their ``retry_after`` elapses without touching Redis.
 """
 from __future__ import annotations
-from typing import Callable, Tuple
+import math
+import time
+import uuid
+from typing import Callable, Dict, Optional, Tuple
 from fastapi import HTTPException, Request, status
 
 from app.utils.redis_client import get_redis
@@ -47,38 +61,258 @@ def _parse_rate(rate: str) -> Tuple[int, int]:
         return 5, 15 * 60
 
 
-def rate_limit_ip(rate: str, scope: str) -> Callable[[Request], None]:
+# KEYS[1] = counter key; ARGV[1] = max_requests, ARGV[2] = window (s)
+# Returns {allowed, retry_after_ms}
+_FIXED_WINDOW_LUA = """
+local current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+end
+if current > tonumber(ARGV[1]) then
+    local ttl = redis.call('PTTL', KEYS[1])
+    if ttl < 0 then ttl = 0 end
+    return {0, ttl}
+end
+return {1, 0}
+"""
+
+# KEYS[1] = sorted set key; ARGV[1] = max_requests, ARGV[2] = window (ms),
+# ARGV[3] = unique member. Returns {allowed, retry_after_ms}
+_SLIDING_WINDOW_LUA = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local window = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - window)
+local count = redis.call('ZCARD', KEYS[1])
+if count < tonumber(ARGV[1]) then
+    redis.call('ZADD', KEYS[1], now, ARGV[3])
+    redis.call('PEXPIRE', KEYS[1], window)
+    return {1, 0}
+end
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+local retry = window
+if oldest[2] then retry = tonumber(oldest[2]) + window - now end
+if retry < 0 then retry = 0 end
+return {0, retry}
+"""
+
+# KEYS[1] = bucket hash; ARGV[1] = capacity, ARGV[2] = refill per ms.
+# Returns {allowed, retry_after_ms}
+_TOKEN_BUCKET_LUA = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+local allowed = 0
+local retry = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry = math.ceil((1 - tokens) / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate))
+return {allowed, retry}
+"""
+
+
+class RateLimiter:
+    """Base class for Redis rate limiters (one Lua call per hit)."""
+
+    name: str = ""
+    script_source: str = ""
+
+    def __init__(self, max_requests: int, window: int):
+        self.max_requests = max_requests
+        self.window = window
+        self._script = None
+
+    def _get_script(self):
+        """Register the Lua script once (EVALSHA with EVAL fallback)."""
+        if self._script is None:
+            self._script = get_redis().register_script(self.script_source)
+        return self._script
+
+    def _args(self) -> list:
+        """Script ARGV for one hit."""
+        raise NotImplementedError
+
+    async def hit(self, key: str) -> Tuple[bool, float]:
+        """
+        Record one request for key.
+
+        Returns:
+            Tuple of (allowed, retry_after_seconds)
+        """
+        allowed, retry_after_ms = await self._get_script()(keys=[key], args=self._args(), client=get_redis())
+        return bool(int(allowed)), max(int(retry_after_ms), 0) / 1000
+
+
+class FixedWindowLimiter(RateLimiter):
+    """Fixed window counter (INCR + EXPIRE in one script)."""
+
+    name = "fixed_window"
+    script_source = _FIXED_WINDOW_LUA
+
+    def _args(self) -> list:
+        return [self.max_requests, self.window]
+
+
+class SlidingWindowLimiter(RateLimiter):
+    """Sliding-window log stored in a sorted set of request timestamps."""
+
+    name = "sliding_window"
+    script_source = _SLIDING_WINDOW_LUA
+
+    def _args(self) -> list:
+        return [self.max_requests, self.window * 1000, uuid.uuid4().hex]
+
+
+class TokenBucketLimiter(RateLimiter):
+    """Token bucket: capacity max_requests, refilled over window seconds."""
+
+    name = "token_bucket"
+    script_source = _TOKEN_BUCKET_LUA
+
+    def _args(self) -> list:
+        refill_per_ms = self.max_requests / (self.window * 1000)
+        return [self.max_requests, repr(refill_per_ms)]
+
+
+LIMITERS: Dict[str, type] = {
+    limiter.name: limiter
+    for limiter in (FixedWindowLimiter, SlidingWindowLimiter, TokenBucketLimiter)
+}
+
+
+class LocalPrefilter:
+    """
+    In-process cache of clients already rejected by Redis.
+
+    Keeps ``key -> blocked_until`` so repeated requests from an over-limit
+    client are rejected locally until its retry_after elapses.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._blocked_until: Dict[str, float] = {}
+
+    def check(self, key: str) -> float:
+        """Return remaining block seconds for key (0 if not blocked)."""
+        blocked_until = self._blocked_until.get(key)
+        if blocked_until is None:
+            return 0.0
+        remaining = blocked_until - time.monotonic()
+        if remaining <= 0:
+            del self._blocked_until[key]
+            return 0.0
+        return remaining
+
+    def block(self, key: str, seconds: float) -> None:
+        """Block key locally for the given number of seconds."""
+        if seconds <= 0:
+            return
+        if len(self._blocked_until) >= self.max_entries:
+            self._prune()
+        self._blocked_until[key] = time.monotonic() + seconds
+
+    def _prune(self) -> None:
+        """Drop expired entries, and the oldest ones if still full."""
+        now = time.monotonic()
+        self._blocked_until = {k: v for k, v in self._blocked_until.items() if v > now}
+        if len(self._blocked_until) >= self.max_entries:
+            for key in sorted(self._blocked_until, key=self._blocked_until.get)[: self.max_entries // 2]:
+                del self._blocked_until[key]
+
+
+# Shared across all rate limit dependencies in this process
+local_prefilter = LocalPrefilter()
+
+
+def _too_many_requests(retry_after: float) -> HTTPException:
+    """Build the 429 response."""
+    retry_after_s = max(math.ceil(retry_after), 0)
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail={
+            "message": "Too many requests. Please try again later.",
+            "retry_after": retry_after_s,
+        },
+        headers={"Retry-After": str(retry_after_s)},
+    )
+
+
+def _client_identity(request: Request, per_user: bool) -> str:
+    """Identify the client: user ID from the bearer token if per_user, else IP."""
+    if per_user:
+        authorization = request.headers.get("Authorization", "")
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() == "bearer" and token:
+            from jose import JWTError
+            from app.core.security import decode_token
+
+            try:
+                user_id = decode_token(token).get("sub")
+                if user_id is not None:
+                    return f"user:{user_id}"
+            except JWTError:
+                pass
+
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit_ip(
+    rate: str,
+    scope: str,
+    algorithm: Optional[str] = None,
+    per_user: bool = False,
+    when: Optional[Callable[[Request], bool]] = None,
+) -> Callable[[Request], None]:
     """Factory for a FastAPI dependency that enforces a rate limit per IP per scope.
 
+    With per_user=True authenticated requests get their own quota keyed by
+    user ID (anonymous requests still fall back to the IP). `when` restricts
+    the limit to matching requests, e.g. only searches with a `q` parameter.
+
     Usage:
         Depends(rate_limit_ip(settings.RATE_LIMIT_LOGIN, scope="login"))
+        Depends(rate_limit_ip("10/second", scope="search", algorithm="token_bucket"))
+        Depends(rate_limit_ip(settings.RATE_LIMIT_RECOMMENDATIONS, scope="recommendations", per_user=True))
     """
     from app.core.config import settings
-    
+
     max_requests, window = _parse_rate(rate)
+    limiter_cls = LIMITERS.get(algorithm or settings.RATE_LIMIT_ALGORITHM, SlidingWindowLimiter)
+    limiter = limiter_cls(max_requests, window)
 
     async def _dependency(request: Request) -> None:
         # Skip rate limiting if disabled (e.g., in tests)
         if not settings.RATE_LIMIT_ENABLED:
             return
-        
-        client_ip = request.client.host if request.client else "unknown"
-        key = f"rl:{scope}:{client_ip}"
-        r = get_redis()
-
-        # INCR the counter and set TTL if first time
-        current = await r.incr(key)
-        if current == 1:
-            await r.expire(key, window)
-
-        if current > max_requests:
-            ttl = await r.ttl(key)
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail={
-                    "message": "Too many requests. Please try again later.",
-                    "retry_after": max(ttl, 0),
-                },
-            )
+        if when is not None and not when(request):
+            return
+
+        client_id = _client_identity(request, per_user)
+        # Algorithm in the key: each one stores a different Redis type
+        key = f"rl:{limiter.name}:{scope}:{client_id}"
+
+        # Known over-limit client: reject without a Redis round trip
+        blocked_for = local_prefilter.check(key)
+        if blocked_for > 0:
+            raise _too_many_requests(blocked_for)
+
+        allowed, retry_after = await limiter.hit(key)
+        if not allowed:
+            local_prefilter.block(key, retry_after)
+            raise _too_many_requests(retry_after)
 
     return _dependency
@@ -1,6 +1,6 @@
 """Models package."""
 from app.models.user import Usuario, PerfilUsuario, RefreshToken
-from app.models.activity import Actividad
+from app.models.activity import Actividad, ActividadFavoritoDelta
 from app.models.favorite import Favorito
 from app.models.etl_execution import ETLExecution, ETLStatus
 
@@ -9,6 +9,7 @@ __all__ = [
     "PerfilUsuario",
     "RefreshToken",
     "Actividad",
+    "ActividadFavoritoDelta",
     "Favorito",
     "ETLExecution",
     "ETLStatus",
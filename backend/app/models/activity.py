@@ -2,14 +2,57 @@
 Activity models for cultural and recreational activities.
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, DECIMAL, Boolean, ARRAY, Index
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    ARRAY,
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    DECIMAL,
+    Index,
+    Integer,
+    SmallInteger,
+    String,
+    Text,
+    func,
+    select,
+)
+from sqlalchemy.orm import deferred, query_expression, relationship
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 
 from app.db.base import Base
 
 
+class ActividadFavoritoDelta(Base):
+    """
+    Pending change (+1/-1) to an activity's favorite count.
+    
+    Favorite writes append here instead of updating the wide ``actividades``
+    row, so users favoriting the same popular activity never queue on its
+    row lock. A scheduled job folds the rows into
+    ``actividades.popularidad_favoritos`` and deletes them; until then reads
+    add the pending sum (see ``Actividad.popularidad_favoritos``).
+    
+    Insert-only and without a foreign key (no lock on the activity row);
+    rows of deleted activities are simply dropped by the fold.
+    
+    Attributes:
+        id: Sequential primary key (fold order)
+        actividad_id: Activity UUID
+        delta: Change in the favorite count
+        created_at: When the change was recorded (shows fold lag)
+    """
+    __tablename__ = "actividad_favorito_deltas"
+    
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    actividad_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    delta = Column(SmallInteger, nullable=False)
+    
+    # Rows are never updated
+    updated_at = None
+
+
 class Actividad(Base):
     """
     Activity model for cultural, recreational and sports activities.
@@ -35,12 +78,18 @@ class Actividad(Base):
         enlace_externo: External URL (optional)
         fuente: Data source (manual, idrd, api, csv)
         estado: Activity status (activa, pendiente_validacion, rechazada, inactiva)
-        popularidad_favoritos: Count of favorites (RF-015)
+        popularidad_favoritos: Count of favorites (RF-015): folded base plus
+            pending ActividadFavoritoDelta rows, floored at 0 (read-only).
+            Deferred: load it where shown (``undefer``); catalog scans use
+            ``select_with_favorite_counts`` and sorts the base column
+        popularidad_favoritos_base: Folded favorite count column
         popularidad_vistas: Weighted view count (RF-015)
         popularidad_normalizada: Normalized popularity score [0-1] (RF-015)
         imagen_url: Image URL (optional)
         created_at: Creation timestamp
         updated_at: Last update timestamp
+        descripcion_preview: Leading slice of descripcion, only when a query
+            loads it with ``with_expression`` (list projections)
         favoritos: Relationship to Favorito
     """
     __tablename__ = "actividades"
@@ -78,7 +127,19 @@ class Actividad(Base):
     estado = Column(String(50), default="activa", nullable=False)
     
     # Popularity metrics (RF-015)
-    popularidad_favoritos = Column(Integer, default=0, nullable=False)
+    popularidad_favoritos_base = Column("popularidad_favoritos", Integer, default=0, nullable=False)
+    # Clamped here, not in the fold, so folding a batch never changes what readers see.
+    # Deferred: a correlated subquery per row is only worth it for rows shown
+    popularidad_favoritos = deferred(
+        func.greatest(
+            popularidad_favoritos_base
+            + select(func.coalesce(func.sum(ActividadFavoritoDelta.delta), 0))
+            .where(ActividadFavoritoDelta.actividad_id == id)
+            .correlate_except(ActividadFavoritoDelta)
+            .scalar_subquery(),
+            0,
+        )
+    )
     popularidad_vistas = Column(DECIMAL(10, 2), default=0, nullable=False)
     popularidad_normalizada = Column(DECIMAL(5, 4), default=0, nullable=False)
     
@@ -86,6 +147,9 @@ class Actividad(Base):
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
+    # Populated per query (list projections skip the full descripcion)
+    descripcion_preview = query_expression()
+    
     # Relationships
     favoritos = relationship("Favorito", back_populates="actividad", cascade="all, delete-orphan")
     
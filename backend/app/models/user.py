@@ -79,8 +79,8 @@ class RefreshToken(Base):
     Attributes:
         id: Primary key
         usuario_id: Foreign key to Usuario
-        token: Unique refresh token string
-        expires_at: Token expiration datetime
+        token_hash: SHA-256 hex digest of the refresh token (never the raw token)
+        expires_at: Token expiration datetime (indexed for the purge job)
         revoked: Token revocation status
         usuario: Relationship to Usuario
     """
@@ -88,8 +88,8 @@ class RefreshToken(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
-    token = Column(String(500), unique=True, index=True, nullable=False)
-    expires_at = Column(DateTime, nullable=False)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+    expires_at = Column(DateTime, index=True, nullable=False)
     revoked = Column(Boolean, default=False, nullable=False)
     
     # Relationship
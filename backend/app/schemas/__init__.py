@@ -5,6 +5,7 @@ from app.schemas.auth import (
     Token,
     TokenRefresh,
     TokenData,
+    UserPrincipal,
     PasswordChange,
 )
 from app.schemas.user import (
@@ -37,6 +38,7 @@ __all__ = [
     "Token",
     "TokenRefresh",
     "TokenData",
+    "UserPrincipal",
     "PasswordChange",
     "PerfilUsuarioBase",
     "PerfilUsuarioCreate",
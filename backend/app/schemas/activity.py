@@ -169,6 +169,7 @@ class ActividadResponse(ActividadBase):
     popularidad_normalizada: Decimal
     created_at: datetime
     updated_at: datetime
+    is_favorite: bool = Field(False, description="In the current user's favorites (false if anonymous)")
     
     class Config:
         from_attributes = True
@@ -190,11 +191,22 @@ class ActividadListItem(BaseModel):
     popularidad_vistas: Decimal
     popularidad_normalizada: Decimal
     estado: Optional[str] = None
+    is_favorite: bool = Field(False, description="In the current user's favorites (false if anonymous)")
     
     class Config:
         from_attributes = True
 
 
+class ActividadSimilarItem(ActividadListItem):
+    """Activity list item with its similarity to the requested activity."""
+    similitud: float = Field(..., ge=0, le=1, description="Cosine similarity (TF-IDF)")
+
+
+class ActividadSimilarResponse(BaseModel):
+    """Response schema for similar activities."""
+    data: List[ActividadSimilarItem]
+
+
 class PaginationMetadata(BaseModel):
     """Pagination metadata for list responses (RF-006)."""
     total: int
@@ -33,9 +33,16 @@ class TopActivity(BaseModel):
     total_vistas: float
 
 
+class DailyCount(BaseModel):
+    """Count for one day schema."""
+    date: str
+    count: int
+
+
 class EngagementMetrics(BaseModel):
     """Engagement metrics schema."""
     total_favorites: int = Field(..., description="Total number of favorites")
+    favorites_per_day: List[DailyCount] = Field(default_factory=list, description="Favorites saved per day (last 30 days)")
     top_activities: List[TopActivity] = Field(..., description="Top 10 activities")
 
 
@@ -64,6 +71,7 @@ class DashboardMetrics(BaseModel):
     activities: ActivityMetrics
     engagement: EngagementMetrics
     etl: ETLMetrics
+    rollups_refreshed_at: Optional[str] = Field(None, description="Last rollup refresh (None when computed live)")
 
 
 # ========== ETL Management Schemas ==========
@@ -48,6 +48,17 @@ class TokenData(BaseModel):
     email: Optional[str] = None
 
 
+class UserPrincipal(BaseModel):
+    """Schema for the authenticated user resolved from an access token."""
+    id: int
+    email: str
+    is_active: bool
+    is_admin: bool
+    
+    class Config:
+        from_attributes = True
+
+
 class PasswordChange(BaseModel):
     """Schema for password change request."""
     current_password: str = Field(..., description="Current password")
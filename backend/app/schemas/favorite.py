@@ -2,7 +2,7 @@
 Pydantic schemas for favorites.
 """
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 from uuid import UUID
 from pydantic import BaseModel, Field
 
@@ -80,3 +80,35 @@ class IsFavoriteResponse(BaseModel):
     """
     is_favorite: bool
     favorito_id: Optional[UUID] = None
+
+
+class FavoritoBatchRequest(BaseModel):
+    """
+    Schema for batch add, remove or check of favorites.
+    
+    Attributes:
+        actividad_ids: Activity UUIDs (duplicates are ignored)
+    """
+    actividad_ids: List[UUID] = Field(..., min_length=1, max_length=100, description="Activity UUIDs")
+
+
+class FavoritoBatchResult(BaseModel):
+    """
+    Schema for the outcome of a batch add or remove.
+    
+    Attributes:
+        changed: Activities added to (or removed from) favorites
+        unchanged: Activities skipped (already in that state, or not found/active)
+    """
+    changed: List[UUID]
+    unchanged: List[UUID]
+
+
+class FavoritoBatchCheckResponse(BaseModel):
+    """
+    Schema for checking several activities at once.
+    
+    Attributes:
+        is_favorite: Whether each requested activity is in user's favorites
+    """
+    is_favorite: Dict[UUID, bool]
@@ -11,6 +11,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.models.activity import Actividad
+from app.services.activity_service import ActivityService
 from app.schemas.activity import ActividadCreate
 
 
@@ -238,7 +239,7 @@ async def import_activities(
             **activity_data.model_dump(),
             fuente="manual",
             estado="activa",
-            popularidad_favoritos=0,
+            popularidad_favoritos_base=0,
             popularidad_vistas=0,
             popularidad_normalizada=0.0
         )
@@ -246,4 +247,5 @@ async def import_activities(
         count += 1
     
     await db.commit()
+    await ActivityService.bump_list_generation()
     return count
@@ -0,0 +1,235 @@
+"""
+Prebuilt JSON for activities in list and recommendation responses.
+
+Listings and recommendations show the same few hundred activities over and
+over. Each activity is serialized once per version into a JSON fragment
+(bytes) kept in a per-worker LRU; responses are assembled by joining
+fragments instead of validating and encoding every row on every request.
+
+The version covers updated_at and the popularity counters (view counts are
+updated without touching updated_at), so a fragment is never stale.
+
+Lists can be trimmed with ``fields=`` (a comma-separated subset of the list
+item, or ``card`` for the compact card projection). ``list_item_load_options``
+loads only the columns those fields need, and never the full descripcion:
+``descripcion_corta`` is cut from a SQL-side preview.
+
+Fragments are shared by all users; ``is_favorite`` is appended per request
+from the user's favorite id set (``app.services.favorite_set``).
+"""
+from typing import AbstractSet, Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import orjson
+from sqlalchemy import func
+from sqlalchemy.orm import load_only, with_expression
+
+from app.core.config import settings
+from app.models.activity import Actividad
+from app.schemas.activity import ActividadListItem, PaginationMetadata
+from app.utils.cache import LocalLRUCache
+
+DESCRIPCION_CORTA_LENGTH = 200
+
+# Per-user, so never part of a cached fragment (appended at render time)
+USER_FIELDS = frozenset({"is_favorite"})
+# Fields a list item can be trimmed to, in response order
+LIST_ITEM_FIELDS: Tuple[str, ...] = tuple(
+    field for field in ActividadListItem.model_fields if field not in USER_FIELDS
+)
+# Compact projection for activity cards (``fields=card``)
+CARD_FIELDS: Tuple[str, ...] = (
+    "id", "titulo", "imagen_url", "fecha_inicio", "localidad", "tipo", "precio", "es_gratis",
+)
+
+# Always loaded with a projection: together they make up the fragment version
+_VERSION_COLUMNS = (
+    "id", "updated_at", "popularidad_favoritos", "popularidad_vistas", "popularidad_normalizada",
+)
+
+# Entries are keyed by version, so the TTL only bounds memory held by
+# activities nobody asks for anymore
+_fragments = LocalLRUCache(max_entries=settings.ACTIVITY_FRAGMENT_CACHE_SIZE, ttl=3600)
+
+
+def _version(activity: Actividad) -> str:
+    """Everything that can change an activity's serialized form."""
+    return (
+        f"{activity.id}:{activity.updated_at.isoformat()}:{activity.popularidad_favoritos}:"
+        f"{activity.popularidad_vistas}:{activity.popularidad_normalizada}"
+    )
+
+
+def descripcion_corta(activity: Actividad) -> str:
+    """First 200 characters of the description (with an ellipsis if cut)."""
+    # The preview is one character longer than the cut, so truncation still shows
+    descripcion = getattr(activity, "descripcion_preview", None)
+    if descripcion is None:
+        descripcion = activity.descripcion
+    if len(descripcion) > DESCRIPCION_CORTA_LENGTH:
+        return descripcion[:DESCRIPCION_CORTA_LENGTH] + "..."
+    return descripcion
+
+
+def parse_fields(value: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Parse a ``fields=`` query value.
+    
+    Args:
+        value: ``card`` or comma-separated ActividadListItem field names
+        
+    Returns:
+        Requested fields in response order (id always included), or None
+        for the full list item
+        
+    Raises:
+        ValueError: If a field is not part of the list item
+    """
+    if not value or not value.strip():
+        return None
+    if value.strip() == "card":
+        return CARD_FIELDS
+    
+    requested = {field.strip() for field in value.split(",") if field.strip()}
+    unknown = requested - set(LIST_ITEM_FIELDS)
+    if unknown:
+        raise ValueError(
+            f"Campos no válidos: {', '.join(sorted(unknown))}. "
+            f"Disponibles: card, {', '.join(LIST_ITEM_FIELDS)}"
+        )
+    requested.add("id")
+    return tuple(field for field in LIST_ITEM_FIELDS if field in requested)
+
+
+def list_item_load_options(fields: Optional[Sequence[str]] = None) -> List[Any]:
+    """
+    Loader options fetching only the columns behind list item ``fields``.
+    
+    Works as top-level query options or chained onto a relationship loader.
+    
+    Args:
+        fields: List item fields (all of them if None)
+        
+    Returns:
+        ``load_only`` plus, if needed, the descripcion preview expression
+    """
+    fields = fields or LIST_ITEM_FIELDS
+    columns = dict.fromkeys(
+        column for column in (*_VERSION_COLUMNS, *fields) if column != "descripcion_corta"
+    )
+    options: List[Any] = [load_only(*(getattr(Actividad, column) for column in columns))]
+    if "descripcion_corta" in fields:
+        options.append(with_expression(
+            Actividad.descripcion_preview,
+            func.left(Actividad.descripcion, DESCRIPCION_CORTA_LENGTH + 1),
+        ))
+    return options
+
+
+def list_item_fields(activity: Actividad, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """Fields of ActividadListItem for an activity (only ``fields`` if given)."""
+    return {
+        field: descripcion_corta(activity) if field == "descripcion_corta" else getattr(activity, field)
+        for field in fields or LIST_ITEM_FIELDS
+    }
+
+
+def list_item_payload(activity: Actividad, fields: Sequence[str]) -> Dict[str, Any]:
+    """Sparse list item as JSON-native values (same encoding as the full item)."""
+    return ActividadListItem.model_construct(**list_item_fields(activity, fields)).model_dump(
+        mode="json", include=set(fields)
+    )
+
+
+def recommendation_payload(activity: Actividad) -> Dict[str, Any]:
+    """Full activity as embedded in recommendations and favorites (JSON-native values)."""
+    return {
+        "id": str(activity.id),
+        "titulo": activity.titulo,
+        "descripcion": activity.descripcion,
+        "tipo": activity.tipo,
+        "fecha_inicio": activity.fecha_inicio.isoformat(),
+        "fecha_fin": activity.fecha_fin.isoformat() if activity.fecha_fin else None,
+        "ubicacion_direccion": activity.ubicacion_direccion,
+        "ubicacion_lat": float(activity.ubicacion_lat),
+        "ubicacion_lng": float(activity.ubicacion_lng),
+        "localidad": activity.localidad,
+        "precio": float(activity.precio),
+        "es_gratis": activity.es_gratis,
+        "nivel_actividad": activity.nivel_actividad,
+        "etiquetas": activity.etiquetas,
+        "contacto": activity.contacto,
+        "enlace_externo": activity.enlace_externo,
+        "imagen_url": activity.imagen_url,
+        "fuente": activity.fuente,
+        "estado": activity.estado,
+        "popularidad_favoritos": activity.popularidad_favoritos,
+        "popularidad_vistas": float(activity.popularidad_vistas),
+        "popularidad_normalizada": float(activity.popularidad_normalizada),
+        "created_at": activity.created_at.isoformat(),
+        "updated_at": activity.updated_at.isoformat(),
+    }
+
+
+def list_item_fragment(activity: Actividad, fields: Optional[Sequence[str]] = None) -> bytes:
+    """ActividadListItem JSON for an activity (as FastAPI would render it)."""
+    if fields is None:
+        key = f"list:{_version(activity)}"
+    else:
+        key = f"list:{','.join(fields)}:{_version(activity)}"
+    fragment = _fragments.get(key)
+    if fragment is None:
+        if fields is None:
+            fragment = ActividadListItem(**list_item_fields(activity)).model_dump_json(
+                exclude=USER_FIELDS
+            ).encode()
+        else:
+            fragment = orjson.dumps(list_item_payload(activity, fields))
+        _fragments.set(key, fragment)
+    return fragment
+
+
+def with_is_favorite(fragment: bytes, is_favorite: bool) -> bytes:
+    """Append ``is_favorite`` to a JSON object fragment."""
+    return fragment[:-1] + (b',"is_favorite":true}' if is_favorite else b',"is_favorite":false}')
+
+
+def recommendation_fragment(activity: Actividad) -> bytes:
+    """recommendation_payload JSON for an activity."""
+    key = f"recommendation:{_version(activity)}"
+    fragment = _fragments.get(key)
+    if fragment is None:
+        fragment = orjson.dumps(recommendation_payload(activity))
+        _fragments.set(key, fragment)
+    return fragment
+
+
+def json_array(fragments: Iterable[bytes]) -> bytes:
+    """Join JSON fragments into a JSON array."""
+    return b"[" + b",".join(fragments) + b"]"
+
+
+def render_activity_list(
+    activities: Iterable[Actividad],
+    pagination: PaginationMetadata,
+    fields: Optional[Sequence[str]] = None,
+    favorite_ids: AbstractSet[Any] = frozenset(),
+) -> bytes:
+    """
+    ActividadListResponse JSON assembled from list item fragments.
+    
+    Each item is marked ``is_favorite`` by membership in ``favorite_ids``
+    (the current user's favorite activity ids; empty if anonymous).
+    """
+    items = (
+        with_is_favorite(list_item_fragment(activity, fields), activity.id in favorite_ids)
+        for activity in activities
+    )
+    return (
+        b'{"data":' + json_array(items)
+        + b',"pagination":' + pagination.model_dump_json().encode() + b"}"
+    )
+
+
+def fragment_cache_stats() -> Dict[str, Any]:
+    """Snapshot of the fragment LRU metrics."""
+    return _fragments.stats()
@@ -5,24 +5,66 @@ Implements requirements RF-006 to RF-010 from SRS.
 """
 from datetime import datetime
 from decimal import Decimal
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Sequence, Tuple
 from uuid import UUID
-from sqlalchemy import select, func, or_, and_, desc, asc
+from sqlalchemy import select, func, or_, and_, desc, asc, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import Session, selectinload, undefer
+from sqlalchemy.orm.attributes import set_committed_value
+import logging
 
 from app.models.activity import Actividad
+from app.services import similarity_service
+from app.services.activity_serializer import list_item_load_options
+from app.services.favorite_counters import select_with_favorite_counts
 from app.schemas.activity import (
     ActividadCreate,
     ActividadUpdate,
     ActividadSearchQuery,
     PaginationMetadata,
 )
+from app.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Redis counter bumped on writes that change an activity listing, favorite
+# counts once per fold (part of the list endpoint ETag)
+LIST_GENERATION_KEY = "actividades:list:generation"
 
 
 class ActivityService:
     """Service class for activity operations."""
     
+    @staticmethod
+    async def get_list_generation() -> Optional[int]:
+        """
+        Current generation of the activity listings.
+        
+        Returns:
+            Generation counter, or None if Redis is unavailable
+            (callers then skip conditional responses)
+        """
+        try:
+            return int(await get_redis().get(LIST_GENERATION_KEY) or 0)
+        except Exception as e:
+            logger.warning(f"Could not read activity list generation: {e}")
+            return None
+    
+    @staticmethod
+    async def bump_list_generation() -> None:
+        """
+        Invalidate the ETags of every activity listing.
+        
+        Call after committing any change to activities that a listing shows
+        (content, estado, popularity). Favorite counts move it once per fold
+        of the pending deltas, not per favorite write; view counts are left
+        out: list ETags are weak and views change on every detail request.
+        """
+        try:
+            await get_redis().incr(LIST_GENERATION_KEY)
+        except Exception as e:
+            logger.warning(f"Could not bump activity list generation: {e}")
+    
     @staticmethod
     async def create_activity(
         db: AsyncSession,
@@ -42,6 +84,10 @@ class ActivityService:
         db.add(activity)
         await db.commit()
         await db.refresh(activity)
+        # A new activity has no pending favorite deltas: the count is the base
+        set_committed_value(activity, "popularidad_favoritos", activity.popularidad_favoritos_base)
+        similarity_service.on_activity_changed(activity)
+        await ActivityService.bump_list_generation()
         return activity
     
     @staticmethod
@@ -61,7 +107,9 @@ class ActivityService:
         Returns:
             Activity if found, None otherwise
         """
-        query = select(Actividad).where(Actividad.id == activity_id)
+        query = select(Actividad).where(Actividad.id == activity_id).options(
+            undefer(Actividad.popularidad_favoritos)
+        )
         
         if not include_inactive:
             query = query.where(Actividad.estado == "activa")
@@ -101,6 +149,8 @@ class ActivityService:
         activity.updated_at = datetime.utcnow()
         await db.commit()
         await db.refresh(activity)
+        similarity_service.on_activity_changed(activity)
+        await ActivityService.bump_list_generation()
         return activity
     
     @staticmethod
@@ -128,6 +178,8 @@ class ActivityService:
         activity.estado = "inactiva"
         activity.updated_at = datetime.utcnow()
         await db.commit()
+        similarity_service.on_activity_changed(activity)
+        await ActivityService.bump_list_generation()
         return True
     
     @staticmethod
@@ -135,14 +187,19 @@ class ActivityService:
         db: AsyncSession,
         query_params: ActividadSearchQuery,
         include_inactive: bool = False,
+        fields: Optional[Sequence[str]] = None,
     ) -> Tuple[List[Actividad], PaginationMetadata]:
         """
         List activities with filters and pagination (RF-006, RF-008).
         
+        Only the columns behind the list item ``fields`` are loaded; the
+        returned activities must not be used beyond rendering them.
+        
         Args:
             db: Database session
             query_params: Search and filter parameters
             include_inactive: Include activities with estado != 'activa'
+            fields: List item fields to load (all of them if None)
             
         Returns:
             Tuple of (activities list, pagination metadata)
@@ -173,6 +230,9 @@ class ActivityService:
         offset = (query_params.page - 1) * query_params.page_size
         query = query.offset(offset).limit(query_params.page_size)
         
+        # Project to the list item columns (no full descripcion)
+        query = query.options(*list_item_load_options(fields))
+        
         # Execute query
         result = await db.execute(query)
         activities = result.scalars().all()
@@ -278,6 +338,10 @@ class ActivityService:
         
         Increments popularidad_vistas by 0.1, max 1 per user per day.
         
+        updated_at is left untouched: it versions the activity content
+        (detail ETag, similarity index sync) and views are only a counter.
+        An instance of the activity already loaded in db gets the new count.
+        
         Args:
             db: Database session
             activity_id: Activity UUID
@@ -286,17 +350,27 @@ class ActivityService:
         Returns:
             True if view was registered
         """
-        activity = await ActivityService.get_activity_by_id(db, activity_id)
-        
-        if not activity:
-            return False
-        
         # TODO: Implement check for 1 view per user per day using Redis or separate table
         # For MVP, we increment directly
-        activity.popularidad_vistas += Decimal("0.1")
-        activity.updated_at = datetime.utcnow()
-        
+        result = await db.execute(
+            update(Actividad)
+            .where(Actividad.id == activity_id, Actividad.estado == "activa")
+            .values(
+                popularidad_vistas=Actividad.popularidad_vistas + Decimal("0.1"),
+                updated_at=Actividad.updated_at,
+            )
+            .returning(Actividad.popularidad_vistas)
+            .execution_options(synchronize_session=False)
+        )
+        vistas = result.scalar_one_or_none()
         await db.commit()
+        if vistas is None:
+            return False
+        
+        activity = db.sync_session.identity_map.get(Session.identity_key(Actividad, activity_id))
+        if activity is not None:
+            # Committed value: not a pending change that a later flush would write back
+            set_committed_value(activity, "popularidad_vistas", vistas)
         return True
     
     @staticmethod
@@ -334,6 +408,8 @@ class ActivityService:
         
         await db.commit()
         await db.refresh(activity)
+        similarity_service.on_activity_changed(activity)
+        await ActivityService.bump_list_generation()
         return activity
     
     @staticmethod
@@ -345,23 +421,16 @@ class ActivityService:
         
         This should be run as a background job daily.
         """
-        # Get max popularity score
-        max_query = select(
-            func.max(Actividad.popularidad_favoritos + (Actividad.popularidad_vistas * Decimal("0.1")))
-        )
-        result = await db.execute(max_query)
-        max_score = result.scalar() or Decimal("1.0")
+        # Load all activities (favorite counts in one grouped join)
+        activities = await select_with_favorite_counts(db, select(Actividad))
+        raw_scores = [
+            Decimal(activity.popularidad_favoritos) + (activity.popularidad_vistas * Decimal("0.1"))
+            for activity in activities
+        ]
+        max_score = max(raw_scores, default=None) or Decimal("1.0")
         
         # Update all activities
-        activities_query = select(Actividad)
-        result = await db.execute(activities_query)
-        activities = result.scalars().all()
-        
-        for activity in activities:
-            raw_score = (
-                Decimal(activity.popularidad_favoritos) + 
-                (activity.popularidad_vistas * Decimal("0.1"))
-            )
+        for activity, raw_score in zip(activities, raw_scores):
             activity.popularidad_normalizada = raw_score / max_score if max_score > 0 else Decimal("0")
         
         await db.commit()
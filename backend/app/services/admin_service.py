@@ -1,23 +1,50 @@
 """
 Admin service for dashboard metrics and management operations.
 """
-from datetime import datetime, timedelta
+import asyncio
+import json
+from datetime import date, datetime, timedelta
 from typing import Dict, List, Any, Optional
-from sqlalchemy import select, func, desc
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Date, case, cast, select, func, desc, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.models.user import Usuario
 from app.models.activity import Actividad
 from app.models.favorite import Favorito
 from app.models.etl_execution import ETLExecution, ETLStatus
-from app.utils.redis_client import get_redis
+from app.core.config import settings
+from app.services.favorite_counters import with_favorite_count
+from app.services.metrics_rollup_job import (
+    DASHBOARD_CACHE_KEY,
+    get_favorite_deltas,
+    mv_activity_rollups,
+    mv_dashboard_counts,
+    mv_favorites_daily,
+    mv_top_activities,
+)
+from app.utils.cache import two_tier_cached
+
+# Days of history in the favorites-per-day series
+FAVORITES_PER_DAY_WINDOW_DAYS = 30
 
 
 class AdminService:
     """Service for admin operations and dashboard metrics."""
     
-    def __init__(self, db: AsyncSession):
+    def __init__(
+        self,
+        db: AsyncSession,
+        session_factory: Optional[async_sessionmaker] = None
+    ):
+        """
+        Args:
+            db: Database session
+            session_factory: Optional factory used to run dashboard queries
+                concurrently, one session each. Without it they run
+                sequentially on db.
+        """
         self.db = db
+        self.session_factory = session_factory
     
     # ========== Dashboard Metrics ==========
     
@@ -25,168 +52,239 @@ class AdminService:
         """
         Get comprehensive dashboard metrics.
         
+        With METRICS_ROLLUPS_ENABLED the aggregates are read from the rollup
+        materialized views (a few tiny rows whatever the table sizes), plus
+        any favorite deltas recorded since the last refresh. Otherwise they
+        are computed from the base tables. The queries run concurrently when
+        a session factory is available.
+        
         Returns:
             Dict with users, activities, and engagement metrics
         """
-        # Try to get from cache
-        redis = get_redis()
-        cache_key = "admin:dashboard:metrics"
-        if redis:
-            cached = await redis.get(cache_key)
-            if cached:
-                import json
-                return json.loads(cached)
-        
-        # Calculate metrics
-        metrics = {
-            "users": await self._get_user_metrics(),
-            "activities": await self._get_activity_metrics(),
-            "engagement": await self._get_engagement_metrics(),
-            "etl": await self._get_etl_metrics()
-        }
-        
-        # Cache for 5 minutes
-        if redis:
-            import json
-            await redis.setex(cache_key, 300, json.dumps(metrics))
+        # Cached for 5 minutes (in-process L1 + Redis), protected against stampedes on expiry
+        async def compute() -> str:
+            return json.dumps(await self._compute_dashboard_metrics())
         
-        return metrics
+        return await two_tier_cached(DASHBOARD_CACHE_KEY, compute, json.loads, ttl=300, name="dashboard")
     
-    async def _get_user_metrics(self) -> Dict[str, int]:
-        """Get user-related metrics."""
-        # Total users
-        total_users_query = select(func.count(Usuario.id))
-        total_users_result = await self.db.execute(total_users_query)
-        total_users = total_users_result.scalar_one()
-        
-        # Active users (with profiles)
-        active_users_query = select(func.count(Usuario.id)).where(
-            Usuario.perfil != None,
-            Usuario.is_active == True
+    async def _compute_dashboard_metrics(self) -> Dict[str, Any]:
+        """Compute dashboard metrics, bypassing the cache."""
+        since = (datetime.utcnow() - timedelta(days=FAVORITES_PER_DAY_WINDOW_DAYS)).date()
+        deltas: Dict[str, int] = {}
+        if settings.METRICS_ROLLUPS_ENABLED:
+            counts, breakdown, top_activities, favorites_per_day, last_executions = await self._execute_all(
+                select(mv_dashboard_counts),
+                select(mv_activity_rollups),
+                select(mv_top_activities).order_by(
+                    desc(mv_top_activities.c.popularidad_favoritos),
+                    desc(mv_top_activities.c.popularidad_vistas)
+                ),
+                select(mv_favorites_daily).where(
+                    mv_favorites_daily.c.day >= since
+                ).order_by(mv_favorites_daily.c.day),
+                self._last_executions_query(),
+            )
+            deltas = await get_favorite_deltas()
+        else:
+            counts, breakdown, top_activities, favorites_per_day, last_executions = await self._execute_all(
+                self._counts_query(),
+                self._activity_breakdown_query(),
+                self._top_activities_query(),
+                self._favorites_per_day_query(since),
+                self._last_executions_query(),
+            )
+        
+        return self._build_metrics(
+            counts[0], breakdown, top_activities, last_executions, favorites_per_day, deltas
         )
-        active_users_result = await self.db.execute(active_users_query)
-        active_users = active_users_result.scalar_one()
+    
+    async def _execute_all(self, *queries) -> List[List[Any]]:
+        """Run read-only queries, concurrently on separate sessions if possible."""
+        if self.session_factory is None:
+            return [(await self.db.execute(query)).all() for query in queries]
         
-        # Admin users
-        admin_users_query = select(func.count(Usuario.id)).where(Usuario.is_admin == True)
-        admin_users_result = await self.db.execute(admin_users_query)
-        admin_users = admin_users_result.scalar_one()
+        async def run(query):
+            async with self.session_factory() as session:
+                return (await session.execute(query)).all()
         
-        return {
-            "total": total_users,
-            "active": active_users,
-            "admins": admin_users
-        }
+        return list(await asyncio.gather(*(run(query) for query in queries)))
     
-    async def _get_activity_metrics(self) -> Dict[str, Any]:
-        """Get activity-related metrics."""
-        # Total activities
-        total_query = select(func.count(Actividad.id))
-        total_result = await self.db.execute(total_query)
-        total = total_result.scalar_one()
-        
-        # By state
-        by_state_query = select(
-            Actividad.estado,
-            func.count(Actividad.id).label('count')
-        ).group_by(Actividad.estado)
-        by_state_result = await self.db.execute(by_state_query)
-        by_state = {row.estado: row.count for row in by_state_result}
-        
-        # By locality
-        by_locality_query = select(
-            Actividad.localidad,
-            func.count(Actividad.id).label('count')
-        ).group_by(Actividad.localidad)
-        by_locality_result = await self.db.execute(by_locality_query)
-        by_locality = {row.localidad: row.count for row in by_locality_result}
-        
-        # By type
-        by_type_query = select(
-            Actividad.tipo,
-            func.count(Actividad.id).label('count')
-        ).group_by(Actividad.tipo)
-        by_type_result = await self.db.execute(by_type_query)
-        by_type = {row.tipo: row.count for row in by_type_result}
+    @staticmethod
+    def _counts_query():
+        """Single-row query with all scalar counts (users, favorites, ETL)."""
+        total_favorites = select(func.count(Favorito.id)).scalar_subquery()
+        total_executions = select(func.count(ETLExecution.id)).scalar_subquery()
+        success_executions = select(
+            func.count(ETLExecution.id).filter(ETLExecution.status == ETLStatus.SUCCESS)
+        ).scalar_subquery()
+        
+        return select(
+            func.count(Usuario.id).label("total_users"),
+            func.count(Usuario.id).filter(
+                Usuario.perfil.has(),
+                Usuario.is_active == True
+            ).label("active_users"),
+            func.count(Usuario.id).filter(Usuario.is_admin == True).label("admin_users"),
+            total_favorites.label("total_favorites"),
+            total_executions.label("total_executions"),
+            success_executions.label("success_executions"),
+        )
+    
+    @staticmethod
+    def _activity_breakdown_query():
+        """Activity counts by estado, localidad and tipo plus total (GROUPING SETS).
         
-        return {
-            "total": total,
-            "by_state": by_state,
-            "by_locality": by_locality,
-            "by_type": by_type
-        }
+        Rows have the same (dimension, value, count) shape as mv_activity_rollups.
+        """
+        # GROUPING(estado, localidad, tipo) bitmask: a set bit means "not grouped"
+        grouping = func.grouping(Actividad.estado, Actividad.localidad, Actividad.tipo)
+        dimension = case(
+            (grouping == 0b011, "estado"),
+            (grouping == 0b101, "localidad"),
+            (grouping == 0b110, "tipo"),
+            else_="total",
+        )
+        
+        return select(
+            dimension.label("dimension"),
+            func.coalesce(Actividad.estado, Actividad.localidad, Actividad.tipo, "").label("value"),
+            func.count(Actividad.id).label("count"),
+        ).group_by(
+            func.grouping_sets(
+                tuple_(Actividad.estado),
+                tuple_(Actividad.localidad),
+                tuple_(Actividad.tipo),
+                tuple_(),
+            )
+        )
     
-    async def _get_engagement_metrics(self) -> Dict[str, Any]:
-        """Get engagement metrics."""
-        # Total favorites
-        total_favs_query = select(func.count(Favorito.id))
-        total_favs_result = await self.db.execute(total_favs_query)
-        total_favorites = total_favs_result.scalar_one()
-        
-        # Top 10 popular activities
-        top_activities_query = select(
-            Actividad.id,
-            Actividad.titulo,
-            Actividad.popularidad_favoritos,
+    @staticmethod
+    def _top_activities_query():
+        """
+        Top 10 popular activities.
+        
+        Ranks by the exact favorite count (folded count plus pending favorite
+        deltas, grouped and joined once rather than summed per row). The
+        ``mv_top_activities`` rollup used with METRICS_ROLLUPS_ENABLED is
+        built from the folded column only, so that
+        ranking ignores favorites not yet folded (up to
+        FAVORITE_COUNTER_FOLD_INTERVAL_MINUTES) on top of the refresh lag.
+        """
+        query, popularidad_favoritos = with_favorite_count(select(Actividad.id, Actividad.titulo))
+        return query.add_columns(
+            popularidad_favoritos.label("popularidad_favoritos"),
             Actividad.popularidad_vistas
         ).order_by(
-            desc(Actividad.popularidad_favoritos),
+            desc(popularidad_favoritos),
             desc(Actividad.popularidad_vistas)
         ).limit(10)
-        top_activities_result = await self.db.execute(top_activities_query)
-        top_activities = [
-            {
-                "id": str(row.id),
-                "titulo": row.titulo,
-                "total_favoritos": row.popularidad_favoritos,
-                "total_vistas": float(row.popularidad_vistas)
-            }
-            for row in top_activities_result
-        ]
-        
-        return {
-            "total_favorites": total_favorites,
-            "top_activities": top_activities
-        }
     
-    async def _get_etl_metrics(self) -> Dict[str, Any]:
-        """Get ETL execution metrics."""
-        # Last 5 executions
-        last_executions_query = select(ETLExecution).order_by(
+    @staticmethod
+    def _favorites_per_day_query(since: date):
+        """Favorites saved per day (UTC) since a date."""
+        day = cast(func.timezone("UTC", Favorito.fecha_guardado), Date)
+        return select(
+            day.label("day"),
+            func.count(Favorito.id).label("count"),
+        ).where(
+            day >= since
+        ).group_by(day).order_by(day)
+    
+    @staticmethod
+    def _last_executions_query():
+        """Last 5 ETL executions."""
+        return select(
+            ETLExecution.id,
+            ETLExecution.status,
+            ETLExecution.source,
+            ETLExecution.started_at,
+            ETLExecution.finished_at,
+            ETLExecution.records_loaded,
+            ETLExecution.records_failed,
+        ).order_by(
             desc(ETLExecution.started_at)
         ).limit(5)
-        last_executions_result = await self.db.execute(last_executions_query)
-        last_executions = [
-            {
-                "id": row.id,
-                "status": row.status,
-                "source": row.source,
-                "started_at": row.started_at.isoformat() if row.started_at else None,
-                "finished_at": row.finished_at.isoformat() if row.finished_at else None,
-                "records_loaded": row.records_loaded,
-                "records_failed": row.records_failed
-            }
-            for row in last_executions_result.scalars()
-        ]
-        
-        # Success rate
-        total_executions_query = select(func.count(ETLExecution.id))
-        total_executions_result = await self.db.execute(total_executions_query)
-        total_executions = total_executions_result.scalar_one()
-        
-        success_executions_query = select(func.count(ETLExecution.id)).where(
-            ETLExecution.status == ETLStatus.SUCCESS
-        )
-        success_executions_result = await self.db.execute(success_executions_query)
-        success_executions = success_executions_result.scalar_one()
-        
+    
+    @staticmethod
+    def _build_metrics(
+        counts,
+        breakdown,
+        top_activities,
+        last_executions,
+        favorites_per_day=(),
+        deltas: Optional[Dict[str, int]] = None
+    ) -> Dict[str, Any]:
+        """Shape query rows (live or rollup) into the dashboard metrics dict.
+        
+        deltas holds favorite changes not yet in the rollups: "total" and
+        one field per ISO day.
+        """
+        deltas = deltas or {}
+        
+        by_dimension = {"estado": {}, "localidad": {}, "tipo": {}}
+        total_activities = 0
+        for row in breakdown:
+            if row.dimension == "total":
+                total_activities = row.count
+            else:
+                by_dimension[row.dimension][row.value] = row.count
+        
+        per_day = {row.day.isoformat(): row.count for row in favorites_per_day}
+        for field, delta in deltas.items():
+            if field != "total":
+                per_day[field] = per_day.get(field, 0) + delta
+        
+        total_executions = counts.total_executions
+        success_executions = counts.success_executions
         success_rate = (success_executions / total_executions * 100) if total_executions > 0 else 0
+        refreshed_at = getattr(counts, "refreshed_at", None)
         
         return {
-            "total_executions": total_executions,
-            "success_executions": success_executions,
-            "success_rate": round(success_rate, 2),
-            "last_executions": last_executions
+            "users": {
+                "total": counts.total_users,
+                "active": counts.active_users,
+                "admins": counts.admin_users
+            },
+            "activities": {
+                "total": total_activities,
+                "by_state": by_dimension["estado"],
+                "by_locality": by_dimension["localidad"],
+                "by_type": by_dimension["tipo"]
+            },
+            "engagement": {
+                "total_favorites": counts.total_favorites + deltas.get("total", 0),
+                "favorites_per_day": [
+                    {"date": day, "count": per_day[day]}
+                    for day in sorted(per_day)
+                ],
+                "top_activities": [
+                    {
+                        "id": str(row.id),
+                        "titulo": row.titulo,
+                        "total_favoritos": row.popularidad_favoritos,
+                        "total_vistas": float(row.popularidad_vistas)
+                    }
+                    for row in top_activities
+                ]
+            },
+            "etl": {
+                "total_executions": total_executions,
+                "success_executions": success_executions,
+                "success_rate": round(success_rate, 2),
+                "last_executions": [
+                    {
+                        "id": row.id,
+                        "status": row.status,
+                        "source": row.source,
+                        "started_at": row.started_at.isoformat() if row.started_at else None,
+                        "finished_at": row.finished_at.isoformat() if row.finished_at else None,
+                        "records_loaded": row.records_loaded,
+                        "records_failed": row.records_failed
+                    }
+                    for row in last_executions
+                ]
+            },
+            "rollups_refreshed_at": refreshed_at.isoformat() if refreshed_at else None
         }
     
     # ========== ETL Management ==========
@@ -4,15 +4,24 @@ Authentication service for user registration, login, and token management.
 from datetime import datetime, timedelta
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.orm import selectinload
 from fastapi import HTTPException, status
+from jose import ExpiredSignatureError, JWTError
 
-from app.core.security import verify_password, get_password_hash, create_access_token, create_refresh_token
+from app.core.security import (
+    verify_password_async,
+    get_password_hash_async,
+    create_access_token,
+    create_refresh_token,
+    decode_token,
+    hash_refresh_token,
+)
 from app.core.config import settings
 from app.models.user import Usuario, PerfilUsuario, RefreshToken
 from app.schemas.auth import UserRegister, UserLogin, Token
 from app.schemas.user import PerfilUsuarioCreate
+from app.services import refresh_token_store
 
 
 async def register_user(
@@ -44,7 +53,7 @@ async def register_user(
         )
     
     # Create user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     db_user = Usuario(
         email=user_data.email,
         hashed_password=hashed_password,
@@ -94,7 +103,7 @@ async def login_user(
     result = await db.execute(stmt)
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    if not user or not await verify_password_async(credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -111,11 +120,11 @@ async def login_user(
     access_token = create_access_token(subject=str(user.id))
     refresh_token_str = create_refresh_token(subject=str(user.id))
     
-    # Store refresh token in database
+    # Store refresh token digest in database
     expires_at = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     db_refresh_token = RefreshToken(
         usuario_id=user.id,
-        token=refresh_token_str,
+        token_hash=hash_refresh_token(refresh_token_str),
         expires_at=expires_at,
         revoked=False
     )
@@ -146,25 +155,43 @@ async def refresh_access_token(
     Raises:
         HTTPException: If refresh token is invalid or revoked
     """
-    # Verify refresh token exists and is not revoked
-    stmt = select(RefreshToken).where(
-        RefreshToken.token == refresh_token,
-        RefreshToken.revoked == False
-    )
-    result = await db.execute(stmt)
-    db_token = result.scalar_one_or_none()
+    # Reject malformed, expired and non-refresh tokens without a lookup
+    try:
+        payload = decode_token(refresh_token)
+    except ExpiredSignatureError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token expired"
+        )
+    except JWTError:
+        payload = {}
     
-    if not db_token:
+    token_hash = hash_refresh_token(refresh_token)
+    if payload.get("type") != "refresh" or await refresh_token_store.is_revoked(token_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid refresh token"
         )
     
-    # Check if token is expired
-    if db_token.expires_at < datetime.utcnow():
+    # Revoke the presented token in one statement: of two concurrent
+    # refreshes with the same token, only one gets a row back
+    stmt = (
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == token_hash,
+            RefreshToken.revoked == False,
+            RefreshToken.expires_at >= datetime.utcnow()
+        )
+        .values(revoked=True)
+        .returning(RefreshToken.usuario_id, RefreshToken.expires_at)
+    )
+    result = await db.execute(stmt)
+    db_token = result.one_or_none()
+    
+    if not db_token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Refresh token expired"
+            detail="Invalid refresh token"
         )
     
     # Get user with profile
@@ -182,19 +209,17 @@ async def refresh_access_token(
     new_access_token = create_access_token(subject=str(user.id))
     new_refresh_token = create_refresh_token(subject=str(user.id))
     
-    # Revoke old refresh token
-    db_token.revoked = True
-    
-    # Store new refresh token
+    # Store new refresh token digest
     expires_at = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     new_db_token = RefreshToken(
         usuario_id=user.id,
-        token=new_refresh_token,
+        token_hash=hash_refresh_token(new_refresh_token),
         expires_at=expires_at,
         revoked=False
     )
     db.add(new_db_token)
     await db.commit()
+    await refresh_token_store.mark_revoked(token_hash, db_token.expires_at)
     
     return Token(
         access_token=new_access_token,
@@ -217,13 +242,19 @@ async def logout_user(
     Returns:
         True if successful
     """
-    stmt = select(RefreshToken).where(RefreshToken.token == refresh_token)
+    token_hash = hash_refresh_token(refresh_token)
+    stmt = (
+        update(RefreshToken)
+        .where(RefreshToken.token_hash == token_hash, RefreshToken.revoked == False)
+        .values(revoked=True)
+        .returning(RefreshToken.expires_at)
+    )
     result = await db.execute(stmt)
-    db_token = result.scalar_one_or_none()
+    expires_at = result.scalar_one_or_none()
+    await db.commit()
     
-    if db_token:
-        db_token.revoked = True
-        await db.commit()
+    if expires_at is not None:
+        await refresh_token_store.mark_revoked(token_hash, expires_at)
     
     return True
 
@@ -0,0 +1,310 @@
+"""
+Collaborative filtering over favorites (implicit feedback).
+
+Training runs offline (``scripts/train_collaborative_filtering.py``): the
+favorites become a sparse users x activities matrix, factorized with
+implicit ALS (Hu, Koren & Volinsky, 2008) or truncated SVD. Factors are
+saved as versioned ``.npz`` artifacts in CF_MODEL_DIR; the ``LATEST`` file
+names the version being served.
+
+Serving loads the latest artifact lazily in each worker (file reads run in a
+thread, off the event loop) and scores
+candidates with an exact inner product. Only each user's CF top-K
+candidates get a CF component, which is blended with the hybrid
+content/popularity score. Users unknown to the model (cold start) keep the
+hybrid score unchanged.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import svds
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+LATEST_FILE = "LATEST"
+
+
+# ========== Training ==========
+
+def build_interaction_matrix(
+    pairs: Iterable[Tuple[int, Any]],
+) -> Tuple[sparse.csr_matrix, np.ndarray, List[str]]:
+    """
+    Build the binary users x activities matrix from (usuario_id, actividad_id) pairs.
+
+    Returns:
+        Tuple of (CSR matrix, user IDs by row, activity IDs by column)
+    """
+    user_index: Dict[int, int] = {}
+    item_index: Dict[str, int] = {}
+    rows, cols = [], []
+    for usuario_id, actividad_id in pairs:
+        rows.append(user_index.setdefault(int(usuario_id), len(user_index)))
+        cols.append(item_index.setdefault(str(actividad_id), len(item_index)))
+
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+        shape=(len(user_index), len(item_index)),
+    )
+    # Duplicate pairs are summed by the constructor: keep the matrix binary
+    matrix.data[:] = 1.0
+    return matrix, np.array(list(user_index), dtype=np.int64), list(item_index)
+
+
+def _als_half_step(
+    confidence: sparse.csr_matrix,
+    fixed: np.ndarray,
+    regularization: float,
+) -> np.ndarray:
+    """
+    Solve one side of implicit ALS with the other side fixed.
+
+    For each row u: (YtY + Yu^T (Cu - I) Yu + reg I) x_u = Yu^T Cu p_u,
+    where confidence holds Cu - I (alpha * r) for the observed entries.
+    """
+    factors = fixed.shape[1]
+    base = fixed.T @ fixed + regularization * np.eye(factors)
+    solved = np.zeros((confidence.shape[0], factors), dtype=np.float64)
+
+    indptr, indices, data = confidence.indptr, confidence.indices, confidence.data
+    for row in range(confidence.shape[0]):
+        start, end = indptr[row], indptr[row + 1]
+        if start == end:
+            continue
+        observed = fixed[indices[start:end]]
+        conf = data[start:end]
+        a = base + (observed.T * conf) @ observed
+        b = observed.T @ (conf + 1.0)
+        solved[row] = np.linalg.solve(a, b)
+    return solved
+
+
+def train_als(
+    matrix: sparse.csr_matrix,
+    factors: int = 32,
+    regularization: float = 0.05,
+    alpha: float = 20.0,
+    iterations: int = 15,
+    seed: int = 42,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fit implicit ALS.
+
+    Args:
+        matrix: Binary users x activities matrix
+        factors: Embedding size
+        regularization: L2 penalty
+        alpha: Confidence scaling of observed favorites
+        iterations: Alternating sweeps
+        seed: Random seed for initialization
+
+    Returns:
+        Tuple of (user factors, activity factors) as float32
+    """
+    rng = np.random.default_rng(seed)
+    users, items = matrix.shape
+    user_factors = rng.normal(scale=0.01, size=(users, factors))
+    item_factors = rng.normal(scale=0.01, size=(items, factors))
+
+    confidence = (matrix * alpha).tocsr()
+    confidence_t = confidence.T.tocsr()
+    for _ in range(iterations):
+        user_factors = _als_half_step(confidence, item_factors, regularization)
+        item_factors = _als_half_step(confidence_t, user_factors, regularization)
+
+    return user_factors.astype(np.float32), item_factors.astype(np.float32)
+
+
+def train_svd(matrix: sparse.csr_matrix, factors: int = 32) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fit truncated SVD (singular values split evenly between both sides).
+
+    Returns:
+        Tuple of (user factors, activity factors) as float32
+    """
+    k = max(1, min(factors, min(matrix.shape) - 1))
+    u, s, vt = svds(matrix.astype(np.float64), k=k)
+    root = np.sqrt(s)
+    return (u * root).astype(np.float32), (vt.T * root).astype(np.float32)
+
+
+# ========== Artifacts ==========
+
+@dataclass
+class CollaborativeModel:
+    """Trained user and activity embeddings."""
+
+    version: str
+    user_ids: np.ndarray
+    item_ids: List[str]
+    user_factors: np.ndarray
+    item_factors: np.ndarray
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self._user_index = {int(user_id): row for row, user_id in enumerate(self.user_ids)}
+        self._item_index = {item_id: col for col, item_id in enumerate(self.item_ids)}
+
+    @staticmethod
+    def new_version() -> str:
+        """Version string for a new artifact (UTC timestamp)."""
+        return datetime.utcnow().strftime("%Y%m%d%H%M%S")
+
+    def save(self, directory: Path) -> Path:
+        """Write the artifact and point LATEST at it."""
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"cf-{self.version}.npz"
+        np.savez_compressed(
+            path,
+            user_ids=self.user_ids,
+            item_ids=np.array(self.item_ids),
+            user_factors=self.user_factors,
+            item_factors=self.item_factors,
+            metadata=np.array(json.dumps(self.metadata)),
+        )
+        # Atomic switch for workers polling LATEST
+        tmp = directory / f"{LATEST_FILE}.tmp"
+        tmp.write_text(self.version)
+        os.replace(tmp, directory / LATEST_FILE)
+        return path
+
+    @classmethod
+    def load(cls, directory: Path, version: str) -> "CollaborativeModel":
+        """Read an artifact."""
+        with np.load(directory / f"cf-{version}.npz") as data:
+            return cls(
+                version=version,
+                user_ids=data["user_ids"],
+                item_ids=[str(item_id) for item_id in data["item_ids"]],
+                user_factors=data["user_factors"],
+                item_factors=data["item_factors"],
+                metadata=json.loads(str(data["metadata"])),
+            )
+
+    def scores_for(
+        self,
+        usuario_ids: Sequence[int],
+        activity_ids: Sequence[Any],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Inner-product scores of candidate activities for each user.
+
+        Returns:
+            Tuple of (users x candidates scores, mask of users known to the model).
+            Unknown users and activities score 0.
+        """
+        scores = np.zeros((len(usuario_ids), len(activity_ids)), dtype=np.float32)
+        user_rows = [self._user_index.get(int(usuario_id)) for usuario_id in usuario_ids]
+        known = np.array([row is not None for row in user_rows], dtype=bool)
+        if not known.any():
+            return scores, known
+
+        item_cols = [self._item_index.get(str(activity_id)) for activity_id in activity_ids]
+        present = np.array([col is not None for col in item_cols], dtype=bool)
+        if present.any():
+            users = self.user_factors[[row for row in user_rows if row is not None]]
+            items = self.item_factors[[col for col in item_cols if col is not None]]
+            scores[np.ix_(known, present)] = users @ items.T
+        return scores, known
+
+    def top_k(self, usuario_id: int, k: int) -> List[Tuple[str, float]]:
+        """Exact top-K activities by inner product for a user (empty if unknown)."""
+        row = self._user_index.get(int(usuario_id))
+        if row is None or k <= 0:
+            return []
+        scores = self.item_factors @ self.user_factors[row]
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(self.item_ids[col], float(scores[col])) for col in best]
+
+
+def blend_scores(
+    hybrid: np.ndarray,
+    cf: np.ndarray,
+    known: np.ndarray,
+    weight: float,
+    top_k: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Blend hybrid scores (0-100) with CF scores, row by row.
+
+    Only each known user's top_k positive CF candidates get a CF component,
+    scaled to 0-1 by the row maximum. Rows of unknown users are unchanged.
+
+    Returns:
+        Tuple of (blended scores, CF component 0-1)
+    """
+    component = np.zeros_like(hybrid, dtype=np.float64)
+    if hybrid.shape[1] == 0 or not known.any() or weight <= 0:
+        return hybrid, component
+
+    k = min(top_k, cf.shape[1])
+    threshold = np.partition(cf, cf.shape[1] - k, axis=1)[:, cf.shape[1] - k][:, None]
+    kept = np.where((cf >= threshold) & (cf > 0), cf, 0.0)
+    row_max = kept.max(axis=1, keepdims=True)
+    np.divide(kept, row_max, out=component, where=row_max > 0)
+    component[~known] = 0.0
+
+    blended = np.where(known[:, None], (1 - weight) * hybrid + weight * 100 * component, hybrid)
+    return np.minimum(blended, 100.0), component
+
+
+# ========== Serving ==========
+
+_model: Optional[CollaborativeModel] = None
+_checked_at = 0.0
+
+
+def _load_if_changed(
+    directory: Path, current: Optional[CollaborativeModel]
+) -> Optional[CollaborativeModel]:
+    """Blocking part of a reload: read LATEST and, if it moved, the artifact."""
+    try:
+        version = (directory / LATEST_FILE).read_text().strip()
+    except FileNotFoundError:
+        return current
+
+    if current is not None and current.version == version:
+        return current
+    try:
+        model = CollaborativeModel.load(directory, version)
+        logger.info(f"Loaded collaborative filtering model {version}")
+        return model
+    except Exception as e:
+        logger.error(f"Could not load collaborative filtering model {version}: {e}")
+        return current
+
+
+async def get_model() -> Optional[CollaborativeModel]:
+    """
+    Latest trained model, reloaded when LATEST changes (checked every CF_RELOAD_SECONDS).
+
+    The check and the artifact load run in a worker thread. Requests arriving
+    while a reload is in flight keep the current model (or none yet).
+
+    Returns:
+        Model, or None when disabled or nothing has been trained yet
+    """
+    global _model, _checked_at
+    if not settings.CF_ENABLED:
+        return None
+
+    now = time.monotonic()
+    if now - _checked_at < settings.CF_RELOAD_SECONDS:
+        return _model
+    _checked_at = now
+
+    _model = await asyncio.to_thread(_load_if_changed, Path(settings.CF_MODEL_DIR), _model)
+    return _model
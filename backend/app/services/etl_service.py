@@ -16,6 +16,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_
 
 from app.models.activity import Actividad
+from app.services.activity_service import ActivityService
 from app.models.etl_execution import ETLExecution, ETLStatus
 from app.schemas.activity import ActividadCreate
 from app.core.config import settings
@@ -503,7 +504,7 @@ class ETLService:
                     imagen_url=record.get('imagen_url'),
                     fuente=record.get('fuente', 'csv'),
                     estado=record.get('estado', 'pendiente_validacion'),
-                    popularidad_favoritos=0,
+                    popularidad_favoritos_base=0,
                     popularidad_vistas=Decimal('0'),
                     popularidad_normalizada=Decimal('0'),
                 )
@@ -522,6 +523,8 @@ class ETLService:
                 continue
         
         logger.info(f"Loading complete: {loaded} loaded, {failed} failed")
+        if loaded:
+            await ActivityService.bump_list_generation()
         if errors:
             logger.warning(f"Load errors: {errors[:5]}")  # Log first 5 errors
         
@@ -0,0 +1,157 @@
+"""
+Deferred favorite counters.
+
+Adding or removing a favorite appends a +1/-1 row to the narrow
+``actividad_favorito_deltas`` table, in the same transaction as the
+favorite itself, instead of rewriting the ``actividades`` row. Concurrent
+favorites of one popular activity therefore never wait on its row lock, and
+the wide row is not copied into a dead tuple per click.
+
+``Actividad.popularidad_favoritos`` reads the folded column plus the pending
+sum (floored at 0), so counts are exact at all times. It is deferred (a
+subquery per row); scans of the whole catalog load it with one grouped join
+instead (``with_favorite_count``). A scheduled job folds pending rows
+into the column in batches (one statement per batch: delete, aggregate,
+update), keeping the side table small. Favorite writes do not invalidate
+list ETags themselves; a fold that moved rows does, so counts in revalidated
+listings lag by at most one fold interval.
+"""
+import logging
+from typing import Dict, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import ColumnElement, Select, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.db.session import async_session_maker
+from app.models.activity import Actividad, ActividadFavoritoDelta
+
+logger = logging.getLogger(__name__)
+
+# Move up to :batch_size pending rows into actividades; returns rows moved
+FOLD_FAVORITE_DELTAS = text("""
+    WITH moved AS (
+        DELETE FROM actividad_favorito_deltas
+        WHERE id IN (
+            SELECT id FROM actividad_favorito_deltas ORDER BY id LIMIT :batch_size
+        )
+        RETURNING actividad_id, delta
+    ), totals AS (
+        SELECT actividad_id, sum(delta) AS delta, count(*) AS moved_rows
+        FROM moved
+        GROUP BY actividad_id
+    ), folded AS (
+        UPDATE actividades a
+        SET popularidad_favoritos = a.popularidad_favoritos + t.delta
+        FROM totals t
+        WHERE a.id = t.actividad_id AND t.delta <> 0
+    )
+    SELECT coalesce(sum(moved_rows), 0) FROM totals
+""")
+
+
+def with_favorite_count(query: Select) -> Tuple[Select, ColumnElement]:
+    """
+    Outer-join the pending favorite deltas, summed once, onto an activity query.
+
+    For queries over many activities: the deltas are grouped in one pass
+    (the table only holds what the last fold left) instead of the per-row
+    subquery of ``Actividad.popularidad_favoritos``.
+
+    Args:
+        query: Query selecting from ``actividades``
+
+    Returns:
+        The joined query, and the exact favorite count (clamped like the
+        column property) to select or sort by
+    """
+    pending = (
+        select(
+            ActividadFavoritoDelta.actividad_id,
+            func.sum(ActividadFavoritoDelta.delta).label("delta"),
+        )
+        .group_by(ActividadFavoritoDelta.actividad_id)
+        .subquery()
+    )
+    count = func.greatest(Actividad.popularidad_favoritos_base + func.coalesce(pending.c.delta, 0), 0)
+    return query.outerjoin(pending, pending.c.actividad_id == Actividad.id), count
+
+
+async def select_with_favorite_counts(db: AsyncSession, query: Select) -> List[Actividad]:
+    """
+    Run an activity query with ``popularidad_favoritos`` loaded (see ``with_favorite_count``).
+
+    Args:
+        db: Database session
+        query: ``select(Actividad)`` with any filters
+
+    Returns:
+        Activities with their exact favorite counts loaded
+    """
+    query, count = with_favorite_count(query)
+    activities = []
+    for activity, favoritos in await db.execute(query.add_columns(count)):
+        set_committed_value(activity, "popularidad_favoritos", int(favoritos))
+        activities.append(activity)
+    return activities
+
+
+async def record_favorite_counter_deltas(db: AsyncSession, deltas: Dict[UUID, int]) -> None:
+    """
+    Append favorite count changes in the caller's transaction (not committed).
+
+    Args:
+        db: Database session
+        deltas: Activity id to change (+n favorites added, -n removed)
+    """
+    rows = [
+        {"actividad_id": actividad_id, "delta": delta}
+        for actividad_id, delta in deltas.items()
+        if delta
+    ]
+    if not rows:
+        return
+    await db.execute(insert(ActividadFavoritoDelta), rows)
+
+    # Activities already loaded in this session re-read their count when next loaded
+    for actividad_id in deltas:
+        activity = db.sync_session.identity_map.get(Session.identity_key(Actividad, actividad_id))
+        if activity is not None:
+            db.expire(activity, ["popularidad_favoritos"])
+
+
+async def fold_favorite_counters_job():
+    """
+    Background job folding pending favorite deltas into actividades.
+
+    Rows are folded FAVORITE_COUNTER_FOLD_BATCH_SIZE at a time, one
+    transaction per batch. Readers see the same totals before and after
+    each batch: the rows leave the pending sum as they enter the column.
+    The column is not clamped here (only on read): batches are in write
+    order, so a folded prefix of valid deltas never drops below 0 anyway.
+    """
+    batch_size = settings.FAVORITE_COUNTER_FOLD_BATCH_SIZE
+    folded = 0
+    async with async_session_maker() as db:
+        try:
+            while True:
+                result = await db.execute(FOLD_FAVORITE_DELTAS, {"batch_size": batch_size})
+                moved = int(result.scalar())
+                await db.commit()
+                folded += moved
+                if moved < batch_size:
+                    break
+        except Exception as e:
+            logger.error(f"Error in favorite counter fold job: {str(e)}", exc_info=True)
+            await db.rollback()
+            raise
+
+    if folded:
+        logger.info(f"Folded {folded} favorite count changes into actividades")
+        # Listings show favorite counts: one bump per fold, not per favorite.
+        # Imported here: activity_service reads counts through this module
+        from app.services.activity_service import ActivityService
+        await ActivityService.bump_list_generation()
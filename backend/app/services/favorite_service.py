@@ -4,16 +4,28 @@ Favorite service with business logic for managing user favorites.
 Implements requirements RF-011 to RF-013 from SRS.
 """
 from datetime import datetime
+import uuid
 from uuid import UUID
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Set, Tuple
 from sqlalchemy import select, func, and_, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, undefer
 from sqlalchemy.exc import IntegrityError
 
 from app.models.favorite import Favorito
 from app.models.activity import Actividad
-from app.schemas.favorite import FavoritoCreate, FavoritoResponse, FavoritoWithActivity, FavoritoList
+from app.services.activity_serializer import list_item_load_options, list_item_payload, recommendation_payload
+from app.services.favorite_counters import record_favorite_counter_deltas
+from app.services.favorite_set import add_favorite_ids, remove_favorite_ids
+from app.services.metrics_rollup_job import record_favorite_delta
+from app.schemas.favorite import (
+    FavoritoBatchResult,
+    FavoritoCreate,
+    FavoritoResponse,
+    FavoritoWithActivity,
+    FavoritoList,
+)
 
 
 class FavoriteService:
@@ -41,16 +53,15 @@ class FavoriteService:
             ValueError: If activity not found
         """
         # Check if activity exists
-        activity_query = select(Actividad).where(
+        activity_query = select(Actividad.id).where(
             and_(
                 Actividad.id == favorito_data.actividad_id,
                 Actividad.estado == "activa"
             )
         )
         result = await db.execute(activity_query)
-        activity = result.scalar_one_or_none()
         
-        if not activity:
+        if result.scalar_one_or_none() is None:
             raise ValueError("Activity not found or not active")
         
         # Create favorite
@@ -63,10 +74,12 @@ class FavoriteService:
             db.add(favorito)
             await db.flush()
             
-            # Update activity favorite count
-            activity.popularidad_favoritos += 1
+            # Deferred favorite count change (no lock on the activity row)
+            await record_favorite_counter_deltas(db, {favorito_data.actividad_id: 1})
             await db.commit()
             await db.refresh(favorito)
+            await record_favorite_delta(1)
+            await add_favorite_ids(usuario_id, [favorito_data.actividad_id])
             
             return FavoritoResponse.model_validate(favorito)
         except IntegrityError:
@@ -103,21 +116,148 @@ class FavoriteService:
         if not favorito:
             return False
         
-        # Get activity to update count
-        activity_query = select(Actividad).where(Actividad.id == actividad_id)
-        activity_result = await db.execute(activity_query)
-        activity = activity_result.scalar_one_or_none()
-        
         # Delete favorite
         await db.delete(favorito)
         
-        # Update activity favorite count
-        if activity and activity.popularidad_favoritos > 0:
-            activity.popularidad_favoritos -= 1
+        # Deferred favorite count change (no lock on the activity row)
+        await record_favorite_counter_deltas(db, {actividad_id: -1})
         
         await db.commit()
+        await record_favorite_delta(-1)
+        await remove_favorite_ids(usuario_id, [actividad_id])
         return True
     
+    @staticmethod
+    async def add_favorites_batch(
+        db: AsyncSession,
+        usuario_id: int,
+        actividad_ids: Sequence[UUID],
+    ) -> FavoritoBatchResult:
+        """
+        Add several activities to user's favorites in one transaction.
+        
+        One INSERT ... ON CONFLICT DO NOTHING RETURNING for the favorites and
+        one multi-row insert of counter deltas, whatever the batch size. Activities that
+        are already favorites, missing or not active are reported unchanged.
+        
+        Args:
+            db: Database session
+            usuario_id: User ID
+            actividad_ids: Activity UUIDs
+            
+        Returns:
+            Added and skipped activity ids
+        """
+        requested = list(dict.fromkeys(actividad_ids))
+        active_result = await db.execute(
+            select(Actividad.id).where(
+                Actividad.id.in_(requested),
+                Actividad.estado == "activa",
+            )
+        )
+        active_ids = set(active_result.scalars().all())
+        
+        added: Set[UUID] = set()
+        if active_ids:
+            now = datetime.utcnow()
+            result = await db.execute(
+                pg_insert(Favorito)
+                .values([
+                    {
+                        "id": uuid.uuid4(),
+                        "usuario_id": usuario_id,
+                        "actividad_id": actividad_id,
+                        "fecha_guardado": now,
+                    }
+                    for actividad_id in requested
+                    if actividad_id in active_ids
+                ])
+                .on_conflict_do_nothing(constraint="uq_usuario_actividad")
+                .returning(Favorito.actividad_id)
+            )
+            added = set(result.scalars().all())
+        
+        await record_favorite_counter_deltas(db, {actividad_id: 1 for actividad_id in added})
+        await db.commit()
+        
+        if added:
+            await record_favorite_delta(len(added))
+            await add_favorite_ids(usuario_id, added)
+        
+        return FavoriteService._batch_result(requested, added)
+    
+    @staticmethod
+    async def remove_favorites_batch(
+        db: AsyncSession,
+        usuario_id: int,
+        actividad_ids: Sequence[UUID],
+    ) -> FavoritoBatchResult:
+        """
+        Remove several activities from user's favorites in one transaction.
+        
+        Args:
+            db: Database session
+            usuario_id: User ID
+            actividad_ids: Activity UUIDs
+            
+        Returns:
+            Removed and not-favorited activity ids
+        """
+        requested = list(dict.fromkeys(actividad_ids))
+        result = await db.execute(
+            delete(Favorito)
+            .where(
+                Favorito.usuario_id == usuario_id,
+                Favorito.actividad_id.in_(requested),
+            )
+            .returning(Favorito.actividad_id)
+        )
+        removed = set(result.scalars().all())
+        
+        await record_favorite_counter_deltas(db, {actividad_id: -1 for actividad_id in removed})
+        await db.commit()
+        
+        if removed:
+            await record_favorite_delta(-len(removed))
+            await remove_favorite_ids(usuario_id, removed)
+        
+        return FavoriteService._batch_result(requested, removed)
+    
+    @staticmethod
+    async def check_favorites_batch(
+        db: AsyncSession,
+        usuario_id: int,
+        actividad_ids: Sequence[UUID],
+    ) -> Dict[UUID, bool]:
+        """
+        Check several activities against user's favorites with one query.
+        
+        Args:
+            db: Database session
+            usuario_id: User ID
+            actividad_ids: Activity UUIDs
+            
+        Returns:
+            Dict of activity id to whether it is a favorite
+        """
+        requested = list(dict.fromkeys(actividad_ids))
+        result = await db.execute(
+            select(Favorito.actividad_id).where(
+                Favorito.usuario_id == usuario_id,
+                Favorito.actividad_id.in_(requested),
+            )
+        )
+        favorite_ids = set(result.scalars().all())
+        return {actividad_id: actividad_id in favorite_ids for actividad_id in requested}
+    
+    @staticmethod
+    def _batch_result(requested: List[UUID], changed: Set[UUID]) -> FavoritoBatchResult:
+        """Split requested ids (in request order) into changed and unchanged."""
+        return FavoritoBatchResult(
+            changed=[actividad_id for actividad_id in requested if actividad_id in changed],
+            unchanged=[actividad_id for actividad_id in requested if actividad_id not in changed],
+        )
+    
     @staticmethod
     async def get_user_favorites(
         db: AsyncSession,
@@ -126,6 +266,7 @@ class FavoriteService:
         page_size: int = 20,
         tipo: Optional[str] = None,
         localidad: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
     ) -> FavoritoList:
         """
         Get user's favorite activities with pagination and filters (RF-013).
@@ -137,15 +278,23 @@ class FavoriteService:
             page_size: Items per page
             tipo: Filter by activity type
             localidad: Filter by locality
+            fields: Activity list item fields to return instead of the full
+                activity (see ``parse_fields``); only their columns are loaded
             
         Returns:
             Paginated list of favorites with activity details
         """
+        actividad_loader = selectinload(Favorito.actividad)
+        if fields is not None:
+            actividad_loader = actividad_loader.options(*list_item_load_options(fields))
+        else:
+            actividad_loader = actividad_loader.options(undefer(Actividad.popularidad_favoritos))
+        
         # Build base query
         query = (
             select(Favorito)
             .where(Favorito.usuario_id == usuario_id)
-            .options(selectinload(Favorito.actividad))
+            .options(actividad_loader)
             .order_by(Favorito.fecha_guardado.desc())
         )
         
@@ -188,33 +337,13 @@ class FavoriteService:
                 "usuario_id": fav.usuario_id,
                 "actividad_id": fav.actividad_id,
                 "fecha_guardado": fav.fecha_guardado,
-                "actividad": {
-                    "id": str(fav.actividad.id),
-                    "titulo": fav.actividad.titulo,
-                    "descripcion": fav.actividad.descripcion,
-                    "tipo": fav.actividad.tipo,
-                    "fecha_inicio": fav.actividad.fecha_inicio.isoformat(),
-                    "fecha_fin": fav.actividad.fecha_fin.isoformat() if fav.actividad.fecha_fin else None,
-                    "ubicacion_direccion": fav.actividad.ubicacion_direccion,
-                    "ubicacion_lat": float(fav.actividad.ubicacion_lat),
-                    "ubicacion_lng": float(fav.actividad.ubicacion_lng),
-                    "localidad": fav.actividad.localidad,
-                    "precio": float(fav.actividad.precio),
-                    "es_gratis": fav.actividad.es_gratis,
-                    "nivel_actividad": fav.actividad.nivel_actividad,
-                    "etiquetas": fav.actividad.etiquetas,
-                    "contacto": fav.actividad.contacto,
-                    "enlace_externo": fav.actividad.enlace_externo,
-                    "imagen_url": fav.actividad.imagen_url,
-                    "fuente": fav.actividad.fuente,
-                    "estado": fav.actividad.estado,
-                    "popularidad_favoritos": fav.actividad.popularidad_favoritos,
-                    "popularidad_vistas": float(fav.actividad.popularidad_vistas),
-                    "popularidad_normalizada": float(fav.actividad.popularidad_normalizada),
-                    "created_at": fav.actividad.created_at.isoformat(),
-                    "updated_at": fav.actividad.updated_at.isoformat(),
-                } if fav.actividad else None
+                "actividad": None,
             }
+            if fav.actividad is not None:
+                if fields is None:
+                    fav_dict["actividad"] = recommendation_payload(fav.actividad)
+                else:
+                    fav_dict["actividad"] = list_item_payload(fav.actividad, fields)
             items.append(FavoritoWithActivity.model_validate(fav_dict))
         
         total_pages = (total + page_size - 1) // page_size
@@ -0,0 +1,191 @@
+"""
+Per-user favorite activity ids, cached in Redis as a set.
+
+List and detail responses mark ``is_favorite`` for the current user. Rather
+than one lookup per activity, a request loads the user's favorite ids once
+(``FavoriteSetLoader``) and annotates every item with a set membership test.
+
+The Redis set holds the ids plus a marker member, so a user without
+favorites is cached too (Redis drops empty sets). Favorite writes update a
+cached set in place after commit (write-through); a set that is not cached
+is left alone and loaded from the database on the next read. Redis failures
+are logged and the database is used instead.
+
+Fills race with writes: a favorite committed after the fill's database read
+would find no set to update, and the fill would then cache the old ids. So
+every write also bumps a per-user version, the fill reads the version before
+querying, and the set is only stored if the version has not moved. Fills
+read the primary: a lagging replica would reopen the race, so replica
+readers only use the set (``fill=False``).
+"""
+import logging
+from typing import Iterable, Optional, Set
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.favorite import Favorito
+from app.utils.redis_client import execute_pipeline, get_redis
+
+logger = logging.getLogger(__name__)
+
+FAVORITE_SET_KEY_PREFIX = "favoritos:user"
+# Present in every cached set: "loaded, possibly with no favorites"
+LOADED_MARKER = "*"
+# Members per SADD inside the fill script (Lua unpack has a stack limit)
+_FILL_CHUNK = 1000
+
+# KEYS[1] = favorite set, KEYS[2] = version; ARGV[1] = 'add' or 'remove',
+# ARGV[2] = version TTL, ARGV[3..] = activity ids. Bumps the version so
+# in-flight fills are dropped; only a set already cached is changed.
+_WRITE_THROUGH_LUA = """
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+if ARGV[1] == 'add' then
+    return redis.call('SADD', KEYS[1], unpack(ARGV, 3))
+end
+return redis.call('SREM', KEYS[1], unpack(ARGV, 3))
+"""
+
+# KEYS[1] = favorite set, KEYS[2] = version; ARGV[1] = version read before the
+# database query ('' if none), ARGV[2] = set TTL, ARGV[3..] = members.
+# Stores the set only if no write happened since.
+_FILL_LUA = """
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+for i = 3, #ARGV, %d do
+    redis.call('SADD', KEYS[1], unpack(ARGV, i, math.min(i + %d, #ARGV)))
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+""" % (_FILL_CHUNK, _FILL_CHUNK - 1)
+
+_write_through_script = None
+_fill_script = None
+
+
+def favorite_set_key(usuario_id: int) -> str:
+    """Redis key of a user's favorite id set."""
+    return f"{FAVORITE_SET_KEY_PREFIX}:{usuario_id}:ids"
+
+
+def favorite_version_key(usuario_id: int) -> str:
+    """Redis key counting a user's favorite writes (guards set fills)."""
+    return f"{FAVORITE_SET_KEY_PREFIX}:{usuario_id}:ver"
+
+
+async def load_favorite_ids(db: AsyncSession, usuario_id: int, fill: bool = True) -> Set[UUID]:
+    """
+    Get a user's favorite activity ids (Redis set, database on miss).
+
+    Args:
+        db: Database session; on the primary if ``fill`` (a replica may
+            miss recent writes)
+        usuario_id: User ID
+        fill: Cache the ids read on a miss. Pass False with a replica
+            session: its ids are returned but never stored
+
+    Returns:
+        Set of favorited activity UUIDs
+    """
+    global _fill_script
+    key = favorite_set_key(usuario_id)
+    version_key = favorite_version_key(usuario_id)
+    version = None
+    try:
+        members, version = await execute_pipeline([("SMEMBERS", key), ("GET", version_key)])
+        if members:
+            return {UUID(member) for member in members if member != LOADED_MARKER}
+    except Exception as e:
+        logger.warning(f"Favorite set read failed for user {usuario_id}: {e}")
+
+    result = await db.execute(select(Favorito.actividad_id).where(Favorito.usuario_id == usuario_id))
+    favorite_ids = set(result.scalars().all())
+    if not fill:
+        return favorite_ids
+
+    try:
+        redis = get_redis()
+        if _fill_script is None:
+            _fill_script = redis.register_script(_FILL_LUA)
+        await _fill_script(
+            keys=[key, version_key],
+            args=[
+                version or "",
+                settings.FAVORITE_SET_TTL_SECONDS,
+                LOADED_MARKER,
+                *(str(actividad_id) for actividad_id in favorite_ids),
+            ],
+            client=redis,
+        )
+    except Exception as e:
+        logger.warning(f"Favorite set write failed for user {usuario_id}: {e}")
+
+    return favorite_ids
+
+
+async def _write_through(usuario_id: int, action: str, actividad_ids: Iterable[UUID]) -> None:
+    global _write_through_script
+    ids = [str(actividad_id) for actividad_id in actividad_ids]
+    if not ids:
+        return
+
+    key = favorite_set_key(usuario_id)
+    try:
+        redis = get_redis()
+        if _write_through_script is None:
+            _write_through_script = redis.register_script(_WRITE_THROUGH_LUA)
+        await _write_through_script(
+            keys=[key, favorite_version_key(usuario_id)],
+            args=[action, settings.FAVORITE_SET_TTL_SECONDS, *ids],
+            client=redis,
+        )
+    except Exception as e:
+        logger.warning(f"Favorite set {action} failed for user {usuario_id}: {e}")
+        try:
+            # A stale set must not outlive the failure
+            await get_redis().delete(key)
+        except Exception:
+            pass
+
+
+async def add_favorite_ids(usuario_id: int, actividad_ids: Iterable[UUID]) -> None:
+    """Add committed favorites to the user's cached set (if cached)."""
+    await _write_through(usuario_id, "add", actividad_ids)
+
+
+async def remove_favorite_ids(usuario_id: int, actividad_ids: Iterable[UUID]) -> None:
+    """Remove committed favorites from the user's cached set (if cached)."""
+    await _write_through(usuario_id, "remove", actividad_ids)
+
+
+class FavoriteSetLoader:
+    """
+    The current user's favorite ids, loaded at most once per request.
+
+    Anonymous requests (no user) get an empty set without any lookup.
+    """
+
+    def __init__(self, db: AsyncSession, usuario_id: Optional[int]):
+        self.db = db
+        self.usuario_id = usuario_id
+        self._ids: Optional[Set[UUID]] = None
+
+    async def ids(self) -> Set[UUID]:
+        """Favorite activity ids of the current user."""
+        if self.usuario_id is None:
+            return set()
+        if self._ids is None:
+            self._ids = await load_favorite_ids(self.db, self.usuario_id)
+        return self._ids
+
+    async def contains(self, actividad_id: UUID) -> bool:
+        """Whether an activity is a favorite of the current user."""
+        return actividad_id in await self.ids()
@@ -0,0 +1,144 @@
+"""
+Background job refreshing the dashboard metric rollups.
+
+The rollups are materialized views (see the ``add_dashboard_metric_rollups``
+migration) holding pre-aggregated counts, so the admin dashboard reads a
+handful of tiny rows instead of scanning the base tables. They are refreshed
+CONCURRENTLY, which keeps them readable during the refresh.
+
+Optionally, favorite writes also bump Redis counters (METRICS_INCREMENTAL_COUNTERS)
+so favorite totals stay current between refreshes.
+"""
+from datetime import datetime
+from typing import Dict
+from sqlalchemy import column, table, text
+import logging
+
+from app.core.config import settings
+from app.db.session import async_session_maker
+from app.utils.cache import invalidate
+from app.utils.redis_client import execute_pipeline, get_redis
+
+logger = logging.getLogger(__name__)
+
+
+# Materialized views (not ORM models: created by migration, never by create_all)
+mv_dashboard_counts = table(
+    "mv_dashboard_counts",
+    column("total_users"),
+    column("active_users"),
+    column("admin_users"),
+    column("total_favorites"),
+    column("total_executions"),
+    column("success_executions"),
+    column("refreshed_at"),
+)
+
+mv_activity_rollups = table(
+    "mv_activity_rollups",
+    column("dimension"),
+    column("value"),
+    column("count"),
+)
+
+mv_favorites_daily = table(
+    "mv_favorites_daily",
+    column("day"),
+    column("count"),
+)
+
+mv_top_activities = table(
+    "mv_top_activities",
+    column("id"),
+    column("titulo"),
+    column("popularidad_favoritos"),
+    column("popularidad_vistas"),
+)
+
+# Views that absorb the favorite deltas go last, back to back, so few
+# favorites land between their snapshots and the deltas being dropped
+ROLLUP_VIEWS = [
+    mv_activity_rollups.name,
+    mv_top_activities.name,
+    mv_dashboard_counts.name,
+    mv_favorites_daily.name,
+]
+
+# Redis hash of favorite count deltas since the last refresh
+# (fields: "total" and "YYYY-MM-DD" per day)
+FAVORITE_DELTA_KEY = "metrics:favorites:delta"
+
+DASHBOARD_CACHE_KEY = "admin:dashboard:metrics"
+
+
+async def record_favorite_delta(delta: int) -> None:
+    """
+    Record a favorite added (+1) or removed (-1) since the last refresh.
+
+    No-op unless METRICS_INCREMENTAL_COUNTERS is enabled. Failures are
+    logged and ignored: the next refresh corrects the totals anyway.
+
+    Args:
+        delta: Change in the number of favorites
+    """
+    if not settings.METRICS_INCREMENTAL_COUNTERS:
+        return
+
+    today = datetime.utcnow().date().isoformat()
+    try:
+        await execute_pipeline([
+            ("HINCRBY", FAVORITE_DELTA_KEY, "total", delta),
+            ("HINCRBY", FAVORITE_DELTA_KEY, today, delta),
+        ])
+    except Exception as e:
+        logger.warning(f"Could not record favorite delta: {e}")
+
+
+async def get_favorite_deltas() -> Dict[str, int]:
+    """
+    Get favorite count deltas not yet folded into the rollups.
+
+    Returns:
+        Dict of field ("total" or day) to delta; empty when disabled
+    """
+    if not settings.METRICS_INCREMENTAL_COUNTERS:
+        return {}
+
+    try:
+        values = await get_redis().hgetall(FAVORITE_DELTA_KEY)
+    except Exception as e:
+        logger.warning(f"Could not read favorite deltas: {e}")
+        return {}
+
+    return {field: int(value) for field, value in values.items()}
+
+
+async def refresh_metric_rollups_job():
+    """
+    Background job to refresh all dashboard rollup views.
+
+    Pending favorite deltas are dropped only after the views are refreshed,
+    so a delta is never counted both in a view snapshot and in Redis (a
+    favorite recorded during the last two refreshes is left out until the
+    next one instead). A failed refresh keeps the deltas. The cached
+    dashboard is invalidated so the next request reads the new rollups.
+    """
+    logger.info("Starting metric rollups refresh job")
+
+    async with async_session_maker() as db:
+        try:
+            for view in ROLLUP_VIEWS:
+                await db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"))
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Error in metric rollups refresh job: {str(e)}", exc_info=True)
+            await db.rollback()
+            raise
+
+    try:
+        await get_redis().delete(FAVORITE_DELTA_KEY)
+    except Exception as e:
+        logger.warning(f"Could not clear folded favorite deltas: {e}")
+    await invalidate(keys=[DASHBOARD_CACHE_KEY])
+
+    logger.info(f"Metric rollups refresh completed. Refreshed {len(ROLLUP_VIEWS)} views")
@@ -10,6 +10,10 @@ import logging
 
 from app.models.activity import Actividad
 from app.db.session import async_session_maker
+from app.core.config import settings
+from app.services.activity_service import ActivityService
+from app.services.favorite_counters import select_with_favorite_counts
+from app.services.recommendation_precompute_job import precompute_recommendations_job
 
 logger = logging.getLogger(__name__)
 
@@ -32,8 +36,7 @@ async def recalculate_popularity_job():
         try:
             # Get all active activities
             query = select(Actividad).where(Actividad.estado == "activa")
-            result = await db.execute(query)
-            activities = result.scalars().all()
+            activities = await select_with_favorite_counts(db, query)
             
             if not activities:
                 logger.info("No activities to process")
@@ -62,6 +65,7 @@ async def recalculate_popularity_job():
                 updated_count += 1
             
             await db.commit()
+            await ActivityService.bump_list_generation()
             
             logger.info(
                 f"Popularity recalculation completed. "
@@ -72,3 +76,7 @@ async def recalculate_popularity_job():
             logger.error(f"Error in popularity recalculation job: {str(e)}", exc_info=True)
             await db.rollback()
             raise
+    
+    # Scores changed: warm the recommendation cache of active users
+    if settings.RECOMMENDATIONS_PRECOMPUTE_ENABLED:
+        await precompute_recommendations_job()
@@ -0,0 +1,90 @@
+"""
+Short-TTL Redis cache of authenticated user principals.
+
+Lets get_current_user resolve a JWT subject to (id, email, is_active, is_admin)
+without querying Postgres on every authenticated request. Entries must be
+invalidated whenever is_active or is_admin changes.
+"""
+import logging
+from typing import Optional
+
+from app.core.config import settings
+from app.models.user import Usuario
+from app.schemas.auth import UserPrincipal
+from app.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "auth:principal"
+
+
+def _cache_key(user_id: int) -> str:
+    """Build the Redis key for a user principal."""
+    return f"{CACHE_KEY_PREFIX}:{user_id}"
+
+
+async def get_principal(user_id: int) -> Optional[UserPrincipal]:
+    """
+    Get cached principal for a user.
+
+    Args:
+        user_id: User ID
+
+    Returns:
+        Cached principal, or None on miss, when disabled or if Redis fails
+    """
+    if not settings.USER_CACHE_ENABLED:
+        return None
+
+    try:
+        cached = await get_redis().get(_cache_key(user_id))
+    except Exception as e:
+        logger.warning(f"User principal cache read failed: {e}")
+        return None
+
+    if not cached:
+        return None
+    return UserPrincipal.model_validate_json(cached)
+
+
+async def set_principal(user: Usuario) -> UserPrincipal:
+    """
+    Build a principal from a user and cache it.
+
+    Args:
+        user: User loaded from the database
+
+    Returns:
+        Principal for the user
+    """
+    principal = UserPrincipal.model_validate(user)
+
+    if settings.USER_CACHE_ENABLED:
+        try:
+            await get_redis().setex(
+                _cache_key(user.id),
+                settings.USER_CACHE_TTL_SECONDS,
+                principal.model_dump_json()
+            )
+        except Exception as e:
+            logger.warning(f"User principal cache write failed: {e}")
+
+    return principal
+
+
+async def invalidate_principal(user_id: int) -> None:
+    """
+    Drop a cached principal.
+
+    Called after deactivation or any change to is_active / is_admin.
+
+    Args:
+        user_id: User ID
+    """
+    if not settings.USER_CACHE_ENABLED:
+        return
+
+    try:
+        await get_redis().delete(_cache_key(user_id))
+    except Exception as e:
+        logger.warning(f"User principal cache invalidation failed: {e}")
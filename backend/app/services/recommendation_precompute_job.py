@@ -0,0 +1,197 @@
+"""
+Background job precomputing personalized recommendations for active users.
+
+Runs after the popularity recalculation and after ETL loads. For every user
+who asked for recommendations in the last RECOMMENDATIONS_ACTIVE_USER_DAYS,
+it writes the default recommendation list (no filters) to the cache, so a
+logged-in user's first visit is a cache hit.
+
+Users are scored in batches with NumPy: one (users x activities) score
+matrix per batch instead of one Python call per (user, activity) pair. The
+scores follow RecommendationService._calculate_activity_score exactly; only
+the top N of each user go through it again to build the explanations.
+The collaborative filtering blend is applied to the whole batch at once.
+"""
+import logging
+import time
+from typing import Dict, List, Optional, Sequence, Set
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.session import async_session_maker
+from app.models.activity import Actividad
+from app.models.favorite import Favorito
+from app.models.user import PerfilUsuario
+from app.schemas.recommendation import RecommendationQuery
+from app.services.favorite_counters import select_with_favorite_counts
+from app.services.recommendation_service import ACTIVE_USERS_KEY, recommendation_service
+from app.utils.cache import store_many
+from app.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Same TTL as lazily computed recommendations
+RECOMMENDATIONS_TTL_SECONDS = 3600
+
+
+class ActivityMatrix:
+    """Active activities encoded as arrays for batch scoring."""
+
+    def __init__(self, activities: Sequence[Actividad]):
+        self.activities = list(activities)
+        self.popularity = np.array(
+            [float(activity.popularidad_normalizada) * 10 for activity in self.activities],
+            dtype=np.float64,
+        )
+
+        # Tag incidence matrix (activities x vocabulary), one column per distinct tag
+        self.tag_index: Dict[str, int] = {}
+        rows, cols = [], []
+        for row, activity in enumerate(self.activities):
+            for tag in set(activity.etiquetas or []):
+                rows.append(row)
+                cols.append(self.tag_index.setdefault(tag, len(self.tag_index)))
+        self.tags = np.zeros((len(self.activities), len(self.tag_index)), dtype=np.float32)
+        self.tags[rows, cols] = 1.0
+
+        self.localidades = np.array([activity.localidad for activity in self.activities], dtype=object)
+        self.niveles = np.array([activity.nivel_actividad for activity in self.activities], dtype=object)
+
+    def score(self, profiles: Sequence[Optional[PerfilUsuario]]) -> np.ndarray:
+        """
+        Score every activity for every profile.
+
+        Args:
+            profiles: One profile (or None) per user
+
+        Returns:
+            (len(profiles) x activities) score matrix
+        """
+        scores = np.tile(self.popularity, (len(profiles), 1))
+
+        user_tags = np.zeros((len(profiles), len(self.tag_index)), dtype=np.float32)
+        for row, profile in enumerate(profiles):
+            if profile and profile.etiquetas_interes:
+                for tag in set(profile.etiquetas_interes):
+                    col = self.tag_index.get(tag)
+                    if col is not None:
+                        user_tags[row, col] = 1.0
+        # Matching tag counts: +10 per tag, capped at 30
+        scores += np.minimum((user_tags @ self.tags.T) * 10, 30)
+
+        for row, profile in enumerate(profiles):
+            if not profile:
+                continue
+            if profile.localidad_preferida:
+                scores[row] += np.where(self.localidades == profile.localidad_preferida, 5.0, 0.0)
+            if profile.nivel_actividad:
+                scores[row] += np.where(self.niveles == profile.nivel_actividad, 3.0, 0.0)
+
+        return np.minimum(scores, 100.0)
+
+    def top_n(self, scores: np.ndarray, n: int) -> np.ndarray:
+        """Indices of the n best activities per row, best first."""
+        n = min(n, scores.shape[1])
+        if n == 0:
+            return np.empty((scores.shape[0], 0), dtype=np.int64)
+        candidates = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+        order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1, kind="stable")
+        return np.take_along_axis(candidates, order, axis=1)
+
+
+async def get_active_user_ids() -> List[int]:
+    """Users who asked for recommendations within RECOMMENDATIONS_ACTIVE_USER_DAYS."""
+    redis = get_redis()
+    cutoff = time.time() - settings.RECOMMENDATIONS_ACTIVE_USER_DAYS * 24 * 60 * 60
+    await redis.zremrangebyscore(ACTIVE_USERS_KEY, 0, cutoff)
+    return [int(user_id) for user_id in await redis.zrangebyscore(ACTIVE_USERS_KEY, cutoff, "+inf")]
+
+
+async def precompute_recommendations_job():
+    """
+    Background job to warm the recommendation cache of recently active users.
+    """
+    logger.info("Starting recommendation precompute job")
+    started = time.time()
+
+    try:
+        user_ids = await get_active_user_ids()
+    except Exception as e:
+        logger.error(f"Could not load active users: {e}", exc_info=True)
+        return
+    if not user_ids:
+        logger.info("No active users to precompute")
+        return
+
+    query_params = RecommendationQuery(limit=settings.RECOMMENDATIONS_PRECOMPUTE_LIMIT)
+    batch_size = settings.RECOMMENDATIONS_PRECOMPUTE_BATCH_SIZE
+    written = 0
+
+    async with async_session_maker() as db:
+        matrix = ActivityMatrix(
+            await select_with_favorite_counts(db, select(Actividad).where(Actividad.estado == "activa"))
+        )
+
+        for offset in range(0, len(user_ids), batch_size):
+            batch = user_ids[offset:offset + batch_size]
+            batch_started = time.time()
+
+            profile_result = await db.execute(
+                select(PerfilUsuario).where(PerfilUsuario.usuario_id.in_(batch))
+            )
+            profiles_by_user = {profile.usuario_id: profile for profile in profile_result.scalars()}
+
+            favorite_result = await db.execute(
+                select(Favorito.usuario_id, Favorito.actividad_id).where(Favorito.usuario_id.in_(batch))
+            )
+            favorites_by_user: Dict[int, Set[UUID]] = {}
+            for usuario_id, actividad_id in favorite_result:
+                favorites_by_user.setdefault(usuario_id, set()).add(actividad_id)
+
+            profiles = [profiles_by_user.get(usuario_id) for usuario_id in batch]
+            scores, component = await recommendation_service.apply_collaborative(
+                batch, matrix.activities, matrix.score(profiles)
+            )
+            top = matrix.top_n(scores, query_params.limit)
+
+            values = {}
+            for row, usuario_id in enumerate(batch):
+                profile = profiles[row]
+                favorited_ids = favorites_by_user.get(usuario_id, set())
+                ranked = []
+                for index in top[row]:
+                    activity = matrix.activities[index]
+                    _, explanation = await recommendation_service._calculate_activity_score(
+                        activity=activity,
+                        profile=profile
+                    )
+                    ranked.append({
+                        "activity": activity,
+                        "score": float(scores[row, index]),
+                        "explanation": recommendation_service.with_collaborative_reason(
+                            explanation, component[row, index]
+                        ),
+                        "is_favorite": activity.id in favorited_ids
+                    })
+                values[recommendation_service.cache_key(usuario_id, query_params)] = (
+                    recommendation_service.render_recommendation_list(
+                        ranked,
+                        recommendation_service.is_profile_complete(profile)
+                    )
+                )
+
+            per_user = (time.time() - batch_started) / len(batch)
+            try:
+                await store_many(values, ttl=RECOMMENDATIONS_TTL_SECONDS, delta=per_user)
+                written += len(values)
+            except Exception as e:
+                logger.error(f"Could not write precomputed recommendations: {e}", exc_info=True)
+
+    logger.info(
+        f"Recommendation precompute completed. "
+        f"Wrote {written} of {len(user_ids)} users against {len(matrix.activities)} activities "
+        f"in {time.time() - started:.2f}s"
+    )
@@ -4,42 +4,46 @@ Recommendation service with hybrid algorithm for personalized activity recommend
 Implements requirements RF-014 to RF-015 from SRS.
 """
 from decimal import Decimal
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from uuid import UUID
 from sqlalchemy import select, and_, func, or_
 from sqlalchemy.ext.asyncio import AsyncSession
-import redis.asyncio as aioredis
-import json
+import logging
+import time
 
+import numpy as np
+import orjson
+
+from app.core.config import settings
 from app.models.activity import Actividad
 from app.models.user import PerfilUsuario
-from app.models.favorite import Favorito
 from app.schemas.recommendation import (
     RecommendationResponse,
     RecommendationExplanation,
     RecommendationList,
     RecommendationQuery
 )
-from app.core.config import settings
+from app.services.activity_serializer import recommendation_fragment, recommendation_payload
+from app.services.collaborative_filtering import blend_scores, get_model
+from app.services.favorite_counters import select_with_favorite_counts
+from app.services.favorite_set import load_favorite_ids
+from app.utils.cache import LocalLRUCache, invalidate, two_tier_cached
+from app.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Sorted set of user IDs scored by last recommendation request (Unix time)
+ACTIVE_USERS_KEY = "recommendations:active_users"
+ACTIVE_MARK_INTERVAL_SECONDS = 300
+
+COLLABORATIVE_DETAILS = "Les gustó a usuarios con intereses similares"
+
+_recently_marked = LocalLRUCache(max_entries=10000, ttl=ACTIVE_MARK_INTERVAL_SECONDS)
 
 
 class RecommendationService:
     """Service class for recommendation operations."""
     
-    def __init__(self):
-        """Initialize recommendation service with Redis connection."""
-        self.redis_client: Optional[aioredis.Redis] = None
-    
-    async def _get_redis(self) -> aioredis.Redis:
-        """Get or create Redis connection."""
-        if self.redis_client is None:
-            self.redis_client = await aioredis.from_url(
-                settings.REDIS_URL,
-                encoding="utf-8",
-                decode_responses=True
-            )
-        return self.redis_client
-    
     async def get_recommendations(
         self,
         db: AsyncSession,
@@ -58,8 +62,12 @@ class RecommendationService:
         3. Bonus for preferred locality: +5 points
         4. Bonus for preferred availability: +3 points
         5. Normalize final score to 0-100 range
+        6. Blend in collaborative filtering for users known to the trained
+           model (see app.services.collaborative_filtering)
         
-        Uses Redis cache with 1 hour TTL.
+        Uses Redis cache with 1 hour TTL, protected against stampedes when
+        a popular key expires, behind a short-lived in-process L1
+        (see app.utils.cache).
         
         Args:
             db: Database session
@@ -69,16 +77,108 @@ class RecommendationService:
         Returns:
             List of recommendations with scores and explanations
         """
-        # Build cache key (use 'anonymous' for unauthenticated users)
+        return RecommendationList.model_validate_json(
+            await self.get_recommendations_json(db, usuario_id, query_params)
+        )
+    
+    async def get_recommendations_json(
+        self,
+        db: AsyncSession,
+        usuario_id: Optional[int],
+        query_params: RecommendationQuery,
+    ) -> str:
+        """
+        Get recommendations as the cached RecommendationList JSON.
+        
+        Same as get_recommendations without decoding: the endpoint sends the
+        cached text as is.
+        
+        Args:
+            db: Database session
+            usuario_id: User ID (None for anonymous/public recommendations)
+            query_params: Query parameters (limit, filters)
+            
+        Returns:
+            RecommendationList JSON
+        """
+        cache_key = self.cache_key(usuario_id, query_params)
+        if usuario_id:
+            await self.mark_user_active(usuario_id)
+        
+        async def compute() -> str:
+            ranked, profile_complete = await self._rank_recommendations(db, usuario_id, query_params)
+            return self.render_recommendation_list(ranked, profile_complete)
+        
+        return await two_tier_cached(
+            cache_key,
+            compute,
+            str,
+            ttl=3600,  # 1 hour TTL
+            name="recommendations"
+        )
+    
+    @staticmethod
+    def cache_key(usuario_id: Optional[int], query_params: RecommendationQuery) -> str:
+        """Build the cache key (use 'anonymous' for unauthenticated users)."""
         user_key = f"user:{usuario_id}" if usuario_id else "anonymous"
-        cache_key = f"recommendations:{user_key}:{query_params.limit}:{query_params.tipo}:{query_params.localidad}:{query_params.exclude_favorited}"
-        redis = await self._get_redis()
+        return f"recommendations:{user_key}:{query_params.limit}:{query_params.tipo}:{query_params.localidad}:{query_params.exclude_favorited}"
+    
+    async def mark_user_active(self, usuario_id: int) -> None:
+        """
+        Record that a user asked for recommendations.
+        
+        The precompute job warms the cache of recently active users.
         
-        cached = await redis.get(cache_key)
-        if cached:
-            data = json.loads(cached)
-            return RecommendationList(**data)
+        Args:
+            usuario_id: User ID
+        """
+        # At most one write per user per ACTIVE_MARK_INTERVAL_SECONDS per worker
+        if _recently_marked.get(str(usuario_id)) is not None:
+            return
+        try:
+            await get_redis().zadd(ACTIVE_USERS_KEY, {str(usuario_id): time.time()})
+            _recently_marked.set(str(usuario_id), True)
+        except Exception as e:
+            logger.warning(f"Could not mark user {usuario_id} active: {e}")
+    
+    async def _compute_recommendations(
+        self,
+        db: AsyncSession,
+        usuario_id: Optional[int],
+        query_params: RecommendationQuery,
+    ) -> RecommendationList:
+        """
+        Score activities for a user, bypassing the cache.
         
+        Args:
+            db: Database session
+            usuario_id: User ID (None for anonymous/public recommendations)
+            query_params: Query parameters (limit, filters)
+            
+        Returns:
+            List of recommendations with scores and explanations
+        """
+        ranked, profile_complete = await self._rank_recommendations(db, usuario_id, query_params)
+        return self.build_recommendation_list(ranked, profile_complete)
+    
+    async def _rank_recommendations(
+        self,
+        db: AsyncSession,
+        usuario_id: Optional[int],
+        query_params: RecommendationQuery,
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Score activities for a user and keep the top ones.
+        
+        Args:
+            db: Database session
+            usuario_id: User ID (None for anonymous/public recommendations)
+            query_params: Query parameters (limit, filters)
+            
+        Returns:
+            Tuple of (top recommendations as dicts with activity, score,
+            explanation and is_favorite; whether the profile is complete)
+        """
         # Get user profile and favorites only if authenticated
         profile = None
         profile_complete = False
@@ -90,20 +190,11 @@ class RecommendationService:
             profile_result = await db.execute(profile_query)
             profile = profile_result.scalar_one_or_none()
             
-            # Check if profile has at least one preference for personalization
-            profile_complete = bool(
-                profile
-                and (
-                    (profile.etiquetas_interes and len(profile.etiquetas_interes) > 0)
-                    or profile.localidad_preferida
-                    or profile.nivel_actividad
-                )
-            )
+            profile_complete = self.is_profile_complete(profile)
             
             # Get user's favorited activities (for is_favorite flag and optional exclusion)
-            fav_query = select(Favorito.actividad_id).where(Favorito.usuario_id == usuario_id)
-            fav_result = await db.execute(fav_query)
-            favorited_ids = {fav_id for (fav_id,) in fav_result.fetchall()}
+            # db may be a replica: use the cached set but never fill it from here
+            favorited_ids = await load_favorite_ids(db, usuario_id, fill=False)
         
         # Build query for activities
         query = select(Actividad).where(Actividad.estado == "activa")
@@ -116,9 +207,8 @@ class RecommendationService:
         if query_params.exclude_favorited and favorited_ids:
             query = query.where(~Actividad.id.in_(favorited_ids))
         
-        # Get activities
-        result = await db.execute(query)
-        activities = result.scalars().all()
+        # Get activities (favorite counts for the whole scan in one grouped join)
+        activities = await select_with_favorite_counts(db, query)
         
         # Score each activity
         scored_activities = []
@@ -138,64 +228,137 @@ class RecommendationService:
                 "is_favorite": is_favorite
             })
         
+        if usuario_id and scored_activities:
+            blended, component = await self.apply_collaborative(
+                [usuario_id],
+                activities,
+                np.array([[rec["score"] for rec in scored_activities]])
+            )
+            for index, rec in enumerate(scored_activities):
+                rec["score"] = float(blended[0, index])
+                rec["explanation"] = self.with_collaborative_reason(rec["explanation"], component[0, index])
+        
         # Sort by score descending
         scored_activities.sort(key=lambda x: x["score"], reverse=True)
         
         # Take top N
-        top_recommendations = scored_activities[:query_params.limit]
+        return scored_activities[:query_params.limit], profile_complete
+    
+    @staticmethod
+    async def apply_collaborative(
+        usuario_ids: List[int],
+        activities: List[Actividad],
+        scores: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Blend hybrid scores with the collaborative filtering model.
         
-        # Build response
-        items = []
-        for rec in top_recommendations:
-            activity = rec["activity"]
-            items.append(
-                RecommendationResponse(
-                    actividad={
-                        "id": str(activity.id),
-                        "titulo": activity.titulo,
-                        "descripcion": activity.descripcion,
-                        "tipo": activity.tipo,
-                        "fecha_inicio": activity.fecha_inicio.isoformat(),
-                        "fecha_fin": activity.fecha_fin.isoformat() if activity.fecha_fin else None,
-                        "ubicacion_direccion": activity.ubicacion_direccion,
-                        "ubicacion_lat": float(activity.ubicacion_lat),
-                        "ubicacion_lng": float(activity.ubicacion_lng),
-                        "localidad": activity.localidad,
-                        "precio": float(activity.precio),
-                        "es_gratis": activity.es_gratis,
-                        "nivel_actividad": activity.nivel_actividad,
-                        "etiquetas": activity.etiquetas,
-                        "contacto": activity.contacto,
-                        "enlace_externo": activity.enlace_externo,
-                        "imagen_url": activity.imagen_url,
-                        "fuente": activity.fuente,
-                        "estado": activity.estado,
-                        "popularidad_favoritos": activity.popularidad_favoritos,
-                        "popularidad_vistas": float(activity.popularidad_vistas),
-                        "popularidad_normalizada": float(activity.popularidad_normalizada),
-                        "created_at": activity.created_at.isoformat(),
-                        "updated_at": activity.updated_at.isoformat(),
-                    },
-                    score=rec["score"],
-                    explanation=rec["explanation"],
-                    is_favorite=rec["is_favorite"]
-                )
+        Args:
+            usuario_ids: One user per row of scores
+            activities: One activity per column of scores
+            scores: (users x activities) hybrid scores
+            
+        Returns:
+            Tuple of (blended scores, CF component 0-1); scores unchanged
+            when no model is trained or the users are unknown to it
+        """
+        model = await get_model()
+        if model is None:
+            return scores, np.zeros_like(scores)
+        cf_scores, known = model.scores_for(usuario_ids, [activity.id for activity in activities])
+        return blend_scores(scores, cf_scores, known, settings.CF_BLEND_WEIGHT, settings.CF_TOP_K)
+    
+    @staticmethod
+    def with_collaborative_reason(
+        explanation: RecommendationExplanation,
+        component: float,
+    ) -> RecommendationExplanation:
+        """Mention similar users in the explanation when CF contributed to the score."""
+        if component <= 0:
+            return explanation
+        if explanation.reason == "popular":
+            return RecommendationExplanation(reason="collaborative", details=COLLABORATIVE_DETAILS)
+        return RecommendationExplanation(
+            reason=explanation.reason,
+            details=f"{explanation.details}, {COLLABORATIVE_DETAILS.lower()}"
+        )
+    
+    @staticmethod
+    def is_profile_complete(profile: Optional[PerfilUsuario]) -> bool:
+        """Check if profile has at least one preference for personalization."""
+        return bool(
+            profile
+            and (
+                (profile.etiquetas_interes and len(profile.etiquetas_interes) > 0)
+                or profile.localidad_preferida
+                or profile.nivel_actividad
+            )
+        )
+    
+    @staticmethod
+    def build_recommendation_list(
+        top_recommendations: List[Dict[str, Any]],
+        profile_complete: bool,
+    ) -> RecommendationList:
+        """
+        Build the response from ranked recommendations.
+        
+        Args:
+            top_recommendations: Dicts with activity, score, explanation and is_favorite
+            profile_complete: Whether the user profile allows personalization
+            
+        Returns:
+            Recommendation list
+        """
+        items = [
+            RecommendationResponse(
+                actividad=recommendation_payload(rec["activity"]),
+                score=rec["score"],
+                explanation=rec["explanation"],
+                is_favorite=rec["is_favorite"]
             )
+            for rec in top_recommendations
+        ]
         
-        response = RecommendationList(
+        return RecommendationList(
             items=items,
             total=len(items),
             user_profile_complete=profile_complete
         )
+    
+    @staticmethod
+    def render_recommendation_list(
+        top_recommendations: List[Dict[str, Any]],
+        profile_complete: bool,
+    ) -> str:
+        """
+        Serialize ranked recommendations as RecommendationList JSON.
         
-        # Cache for 1 hour
-        await redis.setex(
-            cache_key,
-            3600,  # 1 hour TTL
-            json.dumps(response.model_dump(), default=str)
-        )
+        Same output as build_recommendation_list, but each activity comes
+        from its prebuilt JSON fragment (see app.services.activity_serializer).
         
-        return response
+        Args:
+            top_recommendations: Dicts with activity, score, explanation and is_favorite
+            profile_complete: Whether the user profile allows personalization
+            
+        Returns:
+            RecommendationList JSON
+        """
+        items = []
+        for rec in top_recommendations:
+            rest = orjson.dumps({
+                "score": float(rec["score"]),
+                "explanation": rec["explanation"].model_dump(),
+                "is_favorite": rec["is_favorite"],
+            })
+            # Splice the activity fragment in as the first member of the object
+            items.append(b'{"actividad":' + recommendation_fragment(rec["activity"]) + b"," + rest[1:])
+        
+        return (
+            b'{"items":[' + b",".join(items) + b"]"
+            + b',"total":' + str(len(items)).encode()
+            + b',"user_profile_complete":' + (b"true" if profile_complete else b"false") + b"}"
+        ).decode()
     
     async def _calculate_activity_score(
         self,
@@ -291,24 +454,8 @@ class RecommendationService:
         Args:
             usuario_id: User ID
         """
-        redis = await self._get_redis()
-        
-        # Delete all cache keys for this user
-        pattern = f"recommendations:user:{usuario_id}:*"
-        
-        # Scan and delete matching keys
-        cursor = 0
-        while True:
-            cursor, keys = await redis.scan(cursor, match=pattern, count=100)
-            if keys:
-                await redis.delete(*keys)
-            if cursor == 0:
-                break
-    
-    async def close(self) -> None:
-        """Close Redis connection."""
-        if self.redis_client:
-            await self.redis_client.close()
+        # Delete all cache keys for this user, in Redis and every worker's L1
+        await invalidate(prefixes=[f"recommendations:user:{usuario_id}:"])
 
 
 # Singleton instance
@@ -0,0 +1,106 @@
+"""
+Refresh token revocation set and expiry purge.
+
+Refresh tokens are stored as SHA-256 digests (see ``hash_refresh_token``).
+Revoked digests are also added to a Redis sorted set scored by their expiry,
+so the refresh endpoint rejects a revoked token without touching Postgres.
+The set is only a fast path: the database row stays the source of truth,
+and every Redis failure is logged and ignored.
+
+A scheduled job deletes expired and revoked rows in small batches, keeping
+the ``refresh_tokens`` table (and its unique digest index) down to live
+sessions, and trims expired members from the revocation set.
+"""
+from datetime import datetime
+import logging
+import time
+
+from sqlalchemy import delete, or_, select
+
+from app.core.config import settings
+from app.db.session import async_session_maker
+from app.models.user import RefreshToken
+from app.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Sorted set of revoked token digests, scored by expiry (epoch seconds)
+REVOKED_KEY = "auth:refresh:revoked"
+
+
+async def is_revoked(token_hash: str) -> bool:
+    """
+    Check the revocation set for a token digest.
+
+    Args:
+        token_hash: Refresh token digest
+
+    Returns:
+        True if known revoked; False if not, or if Redis fails
+    """
+    try:
+        return await get_redis().zscore(REVOKED_KEY, token_hash) is not None
+    except Exception as e:
+        logger.warning(f"Refresh token revocation lookup failed: {e}")
+        return False
+
+
+async def mark_revoked(token_hash: str, expires_at: datetime) -> None:
+    """
+    Add a token digest to the revocation set until the token expires.
+
+    Args:
+        token_hash: Refresh token digest
+        expires_at: Token expiry (naive UTC, as stored in the database)
+    """
+    expires_ts = (expires_at - datetime(1970, 1, 1)).total_seconds()
+    try:
+        await get_redis().zadd(REVOKED_KEY, {token_hash: expires_ts})
+    except Exception as e:
+        logger.warning(f"Refresh token revocation write failed: {e}")
+
+
+async def purge_refresh_tokens_job():
+    """
+    Background job deleting expired and revoked refresh tokens.
+
+    Rows are deleted REFRESH_TOKEN_PURGE_BATCH_SIZE at a time, one
+    transaction per batch, so the job never holds long locks on the table
+    logins and refreshes write to.
+    """
+    logger.info("Starting refresh token purge job")
+
+    batch_size = settings.REFRESH_TOKEN_PURGE_BATCH_SIZE
+    purged = 0
+    async with async_session_maker() as db:
+        try:
+            while True:
+                batch = (
+                    select(RefreshToken.id)
+                    .where(or_(
+                        RefreshToken.expires_at < datetime.utcnow(),
+                        RefreshToken.revoked == True,
+                    ))
+                    .limit(batch_size)
+                    .scalar_subquery()
+                )
+                result = await db.execute(
+                    delete(RefreshToken)
+                    .where(RefreshToken.id.in_(batch))
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+                purged += result.rowcount
+                if result.rowcount < batch_size:
+                    break
+        except Exception as e:
+            logger.error(f"Error in refresh token purge job: {str(e)}", exc_info=True)
+            await db.rollback()
+            raise
+
+    try:
+        await get_redis().zremrangebyscore(REVOKED_KEY, "-inf", time.time())
+    except Exception as e:
+        logger.warning(f"Could not trim refresh token revocation set: {e}")
+
+    logger.info(f"Refresh token purge completed. Deleted {purged} tokens")
@@ -0,0 +1,424 @@
+"""
+"More like this": similar activities from an in-memory ANN index.
+
+Each active activity is a TF-IDF vector over the words of titulo and
+descripcion, its etiquetas, and its tipo, localidad and nivel_actividad
+(as single tokens), L2-normalized so the inner product is the cosine.
+
+Vectors are indexed with random-projection LSH (SIMILAR_LSH_TABLES tables
+of SIMILAR_LSH_BITS hyperplanes each). A query probes its bucket and every
+bucket one bit away in each table, then reranks the candidates by exact
+cosine. Catalogs up to SIMILAR_EXACT_MAX_ACTIVITIES are ranked exactly
+instead: at that size scoring everything costs about the same. See
+scripts/benchmark_similar_activities.py for recall and latency against
+brute force.
+
+Every worker keeps its own index:
+- The full build runs in a worker thread, so the event loop keeps serving
+  other requests; during a rebuild, queries use the previous index
+- Writes handled by the worker are applied at once (``on_activity_changed``)
+- Writes from other workers or the ETL are picked up every
+  SIMILAR_SYNC_SECONDS by re-reading the activities whose updated_at moved;
+  until then an activity created elsewhere has no similar activities here
+  (and does not show up as one)
+- Incremental updates reuse the vocabulary and IDF of the last full build;
+  the index is rebuilt from scratch once SIMILAR_REBUILD_RATIO of it changed
+"""
+import asyncio
+import logging
+import math
+import re
+import time
+import unicodedata
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
+
+from app.core.config import settings
+from app.models.activity import Actividad
+
+logger = logging.getLogger(__name__)
+
+# Repeated words of the title count double
+TITLE_WEIGHT = 2
+# Heaviest TF-IDF terms kept per activity
+MAX_TERMS = 64
+# Re-read writes committed shortly before the last sync (clock skew, slow commits)
+SYNC_OVERLAP = timedelta(seconds=5)
+
+STOPWORDS = {
+    "a", "al", "con", "de", "del", "el", "en", "es", "la", "las", "lo", "los",
+    "para", "por", "que", "se", "su", "sus", "un", "una", "y", "o", "the", "and",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Columns needed to vectorize an activity
+INDEX_COLUMNS = (
+    Actividad.id,
+    Actividad.titulo,
+    Actividad.descripcion,
+    Actividad.etiquetas,
+    Actividad.tipo,
+    Actividad.localidad,
+    Actividad.nivel_actividad,
+    Actividad.estado,
+    Actividad.updated_at,
+)
+
+
+def _normalize(text: str) -> str:
+    """Lowercase and strip accents."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split free text into normalized words, without stopwords and 1-letter tokens."""
+    if not text:
+        return []
+    return [
+        token for token in _TOKEN_RE.findall(_normalize(text))
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def activity_terms(activity: Any) -> Counter:
+    """
+    Term counts of an activity.
+
+    Args:
+        activity: Actividad (or row) with titulo, descripcion, etiquetas,
+            tipo, localidad and nivel_actividad
+
+    Returns:
+        Counter of term to raw count
+    """
+    terms = Counter(tokenize(activity.descripcion))
+    for token in tokenize(activity.titulo):
+        terms[token] += TITLE_WEIGHT
+    for tag in activity.etiquetas or []:
+        terms[f"tag:{_normalize(tag)}"] += 1
+    for name in ("tipo", "localidad", "nivel_actividad"):
+        value = getattr(activity, name)
+        if value:
+            terms[f"{name}:{_normalize(value)}"] += 1
+    return terms
+
+
+class TfidfVectorizer:
+    """Vocabulary and IDF weights fitted on a catalog."""
+
+    def __init__(self, documents: Iterable[Counter]):
+        document_frequency: Counter = Counter()
+        count = 0
+        for terms in documents:
+            document_frequency.update(terms.keys())
+            count += 1
+        self.vocabulary: Dict[str, int] = {
+            term: index for index, term in enumerate(sorted(document_frequency))
+        }
+        # Smoothed IDF: terms present everywhere still weigh a little
+        self.idf = np.array(
+            [math.log((1 + count) / (1 + document_frequency[term])) + 1 for term in self.vocabulary],
+            dtype=np.float32,
+        )
+
+    def transform(self, terms: Counter) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sparse L2-normalized TF-IDF vector (terms outside the vocabulary are dropped).
+
+        Returns:
+            Tuple of (term indices, weights)
+        """
+        pairs = [(self.vocabulary[term], count) for term, count in terms.items() if term in self.vocabulary]
+        if not pairs:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        indices = np.array([index for index, _ in pairs], dtype=np.int64)
+        weights = (1 + np.log(np.array([count for _, count in pairs], dtype=np.float32))) * self.idf[indices]
+        return indices, (weights / np.linalg.norm(weights)).astype(np.float32)
+
+
+class RandomProjectionLSH:
+    """Cosine LSH: one bucket code per table from the signs of random projections."""
+
+    def __init__(self, dimensions: int, tables: int, bits: int, seed: int = 0):
+        self.tables = tables
+        self.bits = bits
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((dimensions, tables * bits)).astype(np.float32)
+        self._powers = 1 << np.arange(bits, dtype=np.int64)
+        self.buckets: List[Dict[int, Set[Any]]] = [{} for _ in range(tables)]
+
+    def codes(self, indices: np.ndarray, weights: np.ndarray) -> List[int]:
+        """Bucket code of a sparse vector in each table."""
+        projection = weights @ self.planes[indices]
+        signs = (projection > 0).reshape(self.tables, self.bits)
+        return [int(code) for code in signs @ self._powers]
+
+    def add(self, key: Any, codes: List[int]) -> None:
+        for table, code in zip(self.buckets, codes):
+            table.setdefault(code, set()).add(key)
+
+    def remove(self, key: Any, codes: List[int]) -> None:
+        for table, code in zip(self.buckets, codes):
+            bucket = table.get(code)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del table[code]
+
+    def candidates(self, codes: List[int]) -> Set[Any]:
+        """Keys sharing a bucket, or a bucket one bit away, in any table."""
+        found: Set[Any] = set()
+        for table, code in zip(self.buckets, codes):
+            for probe in [code] + [code ^ (1 << bit) for bit in range(self.bits)]:
+                bucket = table.get(probe)
+                if bucket:
+                    found |= bucket
+        return found
+
+
+class ActivitySimilarityIndex:
+    """
+    TF-IDF vectors of the active catalog behind a random-projection LSH index.
+
+    Vectors live in fixed-width arrays (one row per slot, MAX_TERMS heaviest
+    terms, zero-padded) so any set of candidates is scored in one NumPy
+    gather; freed slots are reused by later inserts.
+    """
+
+    def __init__(self, activities: Iterable[Any], tables: int, bits: int, seed: int = 0):
+        terms = {activity.id: activity_terms(activity) for activity in activities}
+        self.vectorizer = TfidfVectorizer(terms.values())
+        self.lsh = RandomProjectionLSH(len(self.vectorizer.vocabulary), tables, bits, seed)
+
+        capacity = max(16, len(terms))
+        self._term_indices = np.zeros((capacity, MAX_TERMS), dtype=np.int64)
+        self._term_weights = np.zeros((capacity, MAX_TERMS), dtype=np.float32)
+        self._slot_ids: List[Any] = [None] * capacity
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+        self._slots: Dict[Any, int] = {}
+        self._terms: Dict[Any, Counter] = {}
+        self._codes: Dict[Any, List[int]] = {}
+
+        self.built_size = len(terms)
+        self.changes = 0
+        for activity_id, activity_terms_ in terms.items():
+            self._add(activity_id, activity_terms_)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, activity_id: Any) -> bool:
+        return activity_id in self._slots
+
+    def _grow(self) -> None:
+        capacity = len(self._slot_ids)
+        self._term_indices = np.vstack([self._term_indices, np.zeros_like(self._term_indices)])
+        self._term_weights = np.vstack([self._term_weights, np.zeros_like(self._term_weights)])
+        self._slot_ids.extend([None] * capacity)
+        self._free.extend(range(2 * capacity - 1, capacity - 1, -1))
+
+    def _add(self, activity_id: Any, terms: Counter) -> None:
+        indices, weights = self.vectorizer.transform(terms)
+        if len(indices) > MAX_TERMS:
+            heaviest = np.argsort(-weights, kind="stable")[:MAX_TERMS]
+            indices, weights = indices[heaviest], weights[heaviest]
+            weights = weights / np.linalg.norm(weights)
+
+        if not self._free:
+            self._grow()
+        slot = self._free.pop()
+        self._term_indices[slot] = 0
+        self._term_weights[slot] = 0
+        self._term_indices[slot, :len(indices)] = indices
+        self._term_weights[slot, :len(weights)] = weights
+        self._slot_ids[slot] = activity_id
+        self._slots[activity_id] = slot
+        self._terms[activity_id] = terms
+
+        codes = self.lsh.codes(indices, weights)
+        self._codes[activity_id] = codes
+        self.lsh.add(slot, codes)
+
+    def upsert(self, activity: Any) -> None:
+        """Index a new or edited activity (no-op when its terms did not change)."""
+        terms = activity_terms(activity)
+        if self._terms.get(activity.id) == terms:
+            return
+        self.remove(activity.id)
+        self._add(activity.id, terms)
+        self.changes += 1
+
+    def remove(self, activity_id: Any) -> None:
+        """Drop an activity from the index."""
+        slot = self._slots.pop(activity_id, None)
+        if slot is None:
+            return
+        self.lsh.remove(slot, self._codes.pop(activity_id))
+        del self._terms[activity_id]
+        self._slot_ids[slot] = None
+        self._term_weights[slot] = 0
+        self._free.append(slot)
+        self.changes += 1
+
+    @property
+    def needs_rebuild(self) -> bool:
+        """Whether enough changed since the last full build to refit the vocabulary."""
+        return self.changes > max(1, self.built_size) * settings.SIMILAR_REBUILD_RATIO
+
+    def _rank(self, slot: int, candidates: np.ndarray, limit: int) -> List[Tuple[Any, float]]:
+        candidates = candidates[candidates != slot]
+        if len(candidates) == 0:
+            return []
+        query = np.zeros(len(self.vectorizer.vocabulary), dtype=np.float32)
+        query[self._term_indices[slot]] = self._term_weights[slot]
+
+        scores = (query[self._term_indices[candidates]] * self._term_weights[candidates]).sum(axis=1)
+        limit = min(limit, len(candidates))
+        best = np.argpartition(-scores, limit - 1)[:limit]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [
+            (self._slot_ids[candidates[position]], float(scores[position]))
+            for position in best
+            if scores[position] > 0
+        ]
+
+    def similar(self, activity_id: Any, limit: int) -> List[Tuple[Any, float]]:
+        """
+        Approximate most similar activities.
+
+        Returns:
+            (activity ID, cosine similarity) pairs, best first; empty if not indexed
+        """
+        slot = self._slots.get(activity_id)
+        if slot is None:
+            return []
+        candidates = np.fromiter(self.lsh.candidates(self._codes[activity_id]), dtype=np.int64)
+        return self._rank(slot, candidates, limit)
+
+    def brute_force(self, activity_id: Any, limit: int) -> List[Tuple[Any, float]]:
+        """Exact most similar activities (scores the whole index)."""
+        slot = self._slots.get(activity_id)
+        if slot is None:
+            return []
+        return self._rank(slot, np.fromiter(self._slots.values(), dtype=np.int64), limit)
+
+
+_index: Optional[ActivitySimilarityIndex] = None
+_synced_until: Optional[datetime] = None
+_checked_at = 0.0
+_lock = asyncio.Lock()
+
+
+async def _build(db: AsyncSession) -> None:
+    """Build the index from every active activity."""
+    global _index, _synced_until, _checked_at
+    started = time.perf_counter()
+    watermark = (await db.execute(select(func.max(Actividad.updated_at)))).scalar()
+    result = await db.execute(select(*INDEX_COLUMNS).where(Actividad.estado == "activa"))
+    # CPU-bound (tokenizing, TF-IDF, hashing): keep it off the event loop.
+    # Writes applied meanwhile to the old index are re-read by the next sync.
+    _index = await asyncio.to_thread(
+        ActivitySimilarityIndex,
+        result.all(),
+        tables=settings.SIMILAR_LSH_TABLES,
+        bits=settings.SIMILAR_LSH_BITS,
+    )
+    _synced_until = watermark
+    _checked_at = time.monotonic()
+    logger.info(
+        f"Built similar-activities index: {len(_index)} activities, "
+        f"{len(_index.vectorizer.vocabulary)} terms in {time.perf_counter() - started:.2f}s"
+    )
+
+
+async def _sync(db: AsyncSession) -> None:
+    """Apply activities written since the last sync (by any worker or the ETL)."""
+    global _synced_until, _checked_at
+    _checked_at = time.monotonic()
+    if _synced_until is None:
+        return
+    result = await db.execute(
+        select(*INDEX_COLUMNS).where(Actividad.updated_at > _synced_until - SYNC_OVERLAP)
+    )
+    for activity in result.all():
+        on_activity_changed(activity)
+        if activity.updated_at > _synced_until:
+            _synced_until = activity.updated_at
+
+
+async def ensure_index(db: AsyncSession) -> ActivitySimilarityIndex:
+    """Build the index on first use, then keep it in sync with the database."""
+    if _index is not None and _lock.locked():
+        # Rebuild or sync in progress: serve the current index
+        return _index
+    if _index is None or _index.needs_rebuild:
+        async with _lock:
+            if _index is None or _index.needs_rebuild:
+                await _build(db)
+    elif time.monotonic() - _checked_at >= settings.SIMILAR_SYNC_SECONDS:
+        async with _lock:
+            if time.monotonic() - _checked_at >= settings.SIMILAR_SYNC_SECONDS:
+                await _sync(db)
+    return _index
+
+
+def on_activity_changed(activity: Any) -> None:
+    """
+    Reflect a committed activity write in this worker's index.
+
+    Active activities are (re)indexed, any other estado is removed.
+    No-op until the index has been built.
+    """
+    if _index is None:
+        return
+    if activity.estado == "activa":
+        _index.upsert(activity)
+    else:
+        _index.remove(activity.id)
+
+
+async def get_similar_activities(
+    db: AsyncSession,
+    activity_id: UUID,
+    limit: int,
+) -> List[Tuple[Actividad, float]]:
+    """
+    Get the activities most similar to an active activity.
+
+    Args:
+        db: Database session
+        activity_id: Activity UUID
+        limit: Maximum number of results
+
+    Returns:
+        (activity, similarity 0-1) pairs, best first
+    """
+    index = await ensure_index(db)
+    if len(index) <= settings.SIMILAR_EXACT_MAX_ACTIVITIES:
+        ranked = index.brute_force(activity_id, limit)
+    else:
+        ranked = index.similar(activity_id, limit)
+    if not ranked:
+        return []
+
+    result = await db.execute(
+        select(Actividad).where(
+            Actividad.id.in_([similar_id for similar_id, _ in ranked]),
+            Actividad.estado == "activa",
+        ).options(undefer(Actividad.popularidad_favoritos))
+    )
+    activities = {activity.id: activity for activity in result.scalars()}
+    return [
+        (activities[similar_id], score)
+        for similar_id, score in ranked
+        if similar_id in activities
+    ]
@@ -10,6 +10,7 @@ from fastapi import HTTPException, status
 from app.models.user import Usuario, PerfilUsuario
 from app.schemas.user import PerfilUsuarioUpdate, UsuarioUpdate
 from app.core.security import get_password_hash
+from app.services import principal_cache
 
 
 async def get_user_profile(
@@ -131,6 +132,8 @@ async def update_user(
         setattr(user, field, value)
     
     await db.commit()
+    # email and is_active are part of the cached principal
+    await principal_cache.invalidate_principal(user_id)
     await db.refresh(user)
     
     return user
@@ -165,5 +168,6 @@ async def delete_user(
     
     user.is_active = False
     await db.commit()
+    await principal_cache.invalidate_principal(user_id)
     
     return True
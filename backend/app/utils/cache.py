@@ -0,0 +1,495 @@
+"""
+Redis read-through cache with stampede protection.
+
+``cached_compute`` combines three techniques so an expiring hot key does not
+send every concurrent request to the database:
+
+- Single flight: within a process, concurrent misses for the same key share
+  one computation; across processes, a Redis ``SET NX`` lease lets only one
+  worker recompute while the others wait for its result.
+- Probabilistic early refresh (XFetch): each read may refresh the entry a
+  little before it expires, with a probability that grows as expiry nears
+  and with how long the value took to compute.
+- Stale-while-revalidate: entries are kept ``CACHE_STALE_TTL_SECONDS`` past
+  their logical expiry. While one request recomputes, the others are served
+  the stale value instead of waiting.
+
+``two_tier_cached`` adds an in-process LRU (L1) of decoded objects in front
+of it, so hot keys skip the Redis round trip and deserialization. L1 entries
+live at most ``CACHE_LOCAL_TTL_SECONDS``; ``invalidate`` drops keys from
+Redis and, through Redis pub/sub, from the L1 of every worker.
+"""
+from __future__ import annotations
+import asyncio
+import json
+import logging
+import math
+import random
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+from app.utils.metrics import record_cache_lookup
+from app.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY_PREFIX = "cache:lock"
+# Pub/sub channel carrying L1 invalidations between workers
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+# KEYS[1] = lock key; ARGV[1] = owner token. Deletes the lock only if we own it.
+_RELEASE_LOCK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class _FillCancelled(Exception):
+    """The request filling a key was cancelled; its waiters fill it themselves."""
+
+
+@dataclass
+class CacheEntry:
+    """Cached value with the metadata XFetch needs."""
+
+    value: str
+    # Seconds the value took to compute
+    delta: float
+    # Unix time of logical expiry (the Redis key lives longer, for stale reads)
+    expires_at: float
+
+    def dumps(self) -> str:
+        """Serialize for Redis."""
+        return json.dumps({"value": self.value, "delta": self.delta, "expires_at": self.expires_at})
+
+    @classmethod
+    def loads(cls, raw: str) -> Optional["CacheEntry"]:
+        """Deserialize from Redis (None for values written without an envelope)."""
+        try:
+            data = json.loads(raw)
+            return cls(value=data["value"], delta=float(data["delta"]), expires_at=float(data["expires_at"]))
+        except (ValueError, TypeError, KeyError):
+            return None
+
+    def is_expired(self, now: float) -> bool:
+        """Whether the entry is past its logical expiry (stale)."""
+        return now >= self.expires_at
+
+    def should_refresh(self, now: float, beta: float, rand: Optional[float] = None) -> bool:
+        """
+        XFetch: decide whether to recompute now.
+
+        Always true once expired; before that, true with a probability that
+        increases as expiry approaches (``now - delta * beta * ln(rand)``
+        crossing ``expires_at``).
+
+        Args:
+            now: Current Unix time
+            beta: Eagerness (> 1 refreshes earlier, 0 disables early refresh)
+            rand: Uniform (0, 1] sample, for tests
+        """
+        if self.is_expired(now):
+            return True
+        if beta <= 0 or self.delta <= 0:
+            return False
+        rand = rand if rand is not None else 1.0 - random.random()
+        return now - self.delta * beta * math.log(rand) >= self.expires_at
+
+
+class StampedeProtectedCache:
+    """Read-through cache of string values (see module docstring)."""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._release_script = None
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[str]],
+        ttl: int,
+        redis: Optional[Redis] = None,
+    ) -> str:
+        """
+        Get a cached value, computing and storing it when needed.
+
+        Args:
+            key: Redis key
+            compute: Coroutine function producing the value (runs in the caller's request)
+            ttl: Seconds the value is fresh
+            redis: Client to use (defaults to the shared client)
+
+        Returns:
+            Cached, stale or freshly computed value
+        """
+        redis = redis or get_redis()
+
+        try:
+            raw = await redis.get(key)
+        except Exception as e:
+            logger.warning(f"Cache read failed for {key}: {e}")
+            return await compute()
+
+        entry = CacheEntry.loads(raw) if raw else None
+        now = time.time()
+
+        if entry is not None:
+            if not entry.should_refresh(now, settings.CACHE_XFETCH_BETA):
+                return entry.value
+            # Stale or picked for early refresh: one worker recomputes, others get the old value
+            token = await self._acquire_lease(redis, key)
+            if token is None:
+                return entry.value
+            try:
+                return await self._compute_and_store(redis, key, compute, ttl)
+            except Exception as e:
+                logger.warning(f"Cache refresh failed for {key}, serving stale value: {e}")
+                return entry.value
+            finally:
+                await self._release_lease(redis, key, token)
+
+        return await self._single_flight(key, lambda: self._fill_miss(redis, key, compute, ttl))
+
+    async def _single_flight(self, key: str, fill: Callable[[], Awaitable[str]]) -> str:
+        """Share one in-process computation between concurrent callers of key."""
+        future = self._inflight.get(key)
+        while future is not None:
+            try:
+                return await asyncio.shield(future)
+            except _FillCancelled:
+                # The leader went away (e.g. client disconnect): take over or wait again
+                future = self._inflight.get(key)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await fill()
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            # Only the leader is cancelled; waiters retry instead of failing
+            future.set_exception(_FillCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved: there may be no other waiters
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _fill_miss(
+        self,
+        redis: Redis,
+        key: str,
+        compute: Callable[[], Awaitable[str]],
+        ttl: int,
+    ) -> str:
+        """Fill a missing key, letting a single worker across processes compute it."""
+        token = await self._acquire_lease(redis, key)
+        if token is not None:
+            try:
+                return await self._compute_and_store(redis, key, compute, ttl)
+            finally:
+                await self._release_lease(redis, key, token)
+
+        # Another worker holds the lease: wait for its value
+        deadline = time.monotonic() + settings.CACHE_LOCK_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            await asyncio.sleep(settings.CACHE_LOCK_POLL_SECONDS)
+            try:
+                raw = await redis.get(key)
+            except Exception:
+                break
+            entry = CacheEntry.loads(raw) if raw else None
+            if entry is not None:
+                return entry.value
+
+        logger.warning(f"Timed out waiting for cache fill of {key}, computing locally")
+        return await self._compute_and_store(redis, key, compute, ttl)
+
+    async def _compute_and_store(
+        self,
+        redis: Redis,
+        key: str,
+        compute: Callable[[], Awaitable[str]],
+        ttl: int,
+    ) -> str:
+        """Compute the value and store it with its XFetch metadata."""
+        started = time.time()
+        value = await compute()
+        finished = time.time()
+
+        entry = CacheEntry(value=value, delta=finished - started, expires_at=finished + ttl)
+        try:
+            await redis.setex(key, ttl + settings.CACHE_STALE_TTL_SECONDS, entry.dumps())
+        except Exception as e:
+            logger.warning(f"Cache write failed for {key}: {e}")
+        return value
+
+    async def _acquire_lease(self, redis: Redis, key: str) -> Optional[str]:
+        """Try to take the recompute lease for key (returns the owner token)."""
+        token = uuid.uuid4().hex
+        try:
+            acquired = await redis.set(
+                f"{LOCK_KEY_PREFIX}:{key}",
+                token,
+                nx=True,
+                px=int(settings.CACHE_LOCK_TTL_SECONDS * 1000),
+            )
+        except Exception as e:
+            # Without Redis coordination, compute locally
+            logger.warning(f"Cache lease failed for {key}: {e}")
+            return token
+        return token if acquired else None
+
+    async def _release_lease(self, redis: Redis, key: str, token: str) -> None:
+        """Release the lease if still owned."""
+        try:
+            if self._release_script is None:
+                self._release_script = redis.register_script(_RELEASE_LOCK_LUA)
+            await self._release_script(keys=[f"{LOCK_KEY_PREFIX}:{key}"], args=[token], client=redis)
+        except Exception as e:
+            logger.warning(f"Cache lease release failed for {key}: {e}")
+
+
+# Shared by all services in this process
+stampede_cache = StampedeProtectedCache()
+
+
+async def cached_compute(
+    key: str,
+    compute: Callable[[], Awaitable[str]],
+    ttl: int,
+    redis: Optional[Redis] = None,
+) -> str:
+    """
+    Get key from Redis or compute it, with stampede protection.
+
+    Usage:
+        payload = await cached_compute("admin:dashboard:metrics", build_payload, ttl=300)
+    """
+    return await stampede_cache.get_or_compute(key, compute, ttl, redis=redis)
+
+
+class LocalLRUCache:
+    """
+    In-process LRU of decoded values with a per-entry TTL and a size bound.
+
+    Values are shared between requests and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a live value (None on miss or expiry)."""
+        item = self._entries.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expires_at, value = item
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entries if full."""
+        self._entries[key] = (time.monotonic() + (ttl if ttl is not None else self.ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, keys: Iterable[str] = (), prefixes: Iterable[str] = ()) -> int:
+        """Drop exact keys and every key starting with one of the prefixes."""
+        prefixes = tuple(prefixes)
+        doomed = set(keys) & self._entries.keys()
+        if prefixes:
+            doomed.update(key for key in self._entries if key.startswith(prefixes))
+        for key in doomed:
+            del self._entries[key]
+        return len(doomed)
+
+    def clear(self) -> None:
+        """Drop everything."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of L1 metrics."""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# L1 shared by all services in this process
+local_cache = LocalLRUCache(
+    max_entries=settings.CACHE_LOCAL_MAX_ENTRIES,
+    ttl=settings.CACHE_LOCAL_TTL_SECONDS,
+)
+
+
+async def store_many(
+    values: Dict[str, str],
+    ttl: int,
+    delta: float = 0.0,
+    redis: Optional[Redis] = None,
+) -> None:
+    """
+    Write precomputed values in the cache format, in one pipelined round trip.
+
+    This worker's L1 copies are dropped; other workers' expire within
+    CACHE_LOCAL_TTL_SECONDS.
+
+    Args:
+        values: Serialized values by key
+        ttl: Seconds the values are fresh
+        delta: Seconds one value takes to compute (drives XFetch early refresh)
+        redis: Client to use (defaults to the shared client)
+    """
+    if not values:
+        return
+    redis = redis or get_redis()
+    expires_at = time.time() + ttl
+    pipe = redis.pipeline(transaction=False)
+    for key, value in values.items():
+        entry = CacheEntry(value=value, delta=delta, expires_at=expires_at)
+        pipe.setex(key, ttl + settings.CACHE_STALE_TTL_SECONDS, entry.dumps())
+    await pipe.execute()
+    local_cache.delete(values.keys())
+
+
+async def two_tier_cached(
+    key: str,
+    compute: Callable[[], Awaitable[str]],
+    decode: Callable[[str], Any],
+    ttl: int,
+    redis: Optional[Redis] = None,
+    name: Optional[str] = None,
+) -> Any:
+    """
+    Get a decoded value from L1, else from Redis (or compute it) and keep it in L1.
+
+    Args:
+        key: Cache key
+        compute: Coroutine function producing the serialized value
+        decode: Turns the serialized value into the object kept in L1
+        ttl: Seconds the value is fresh in Redis (L1 keeps it no longer)
+        redis: Client to use (defaults to the shared client)
+        name: Cache name for the hit/miss metrics (not counted when None).
+            A miss is a lookup that ran compute; a value served stale or
+            computed by a concurrent request counts as a hit.
+
+    Usage:
+        metrics = await two_tier_cached(DASHBOARD_CACHE_KEY, compute, json.loads, ttl=300, name="dashboard")
+    """
+    if settings.CACHE_LOCAL_ENABLED:
+        value = local_cache.get(key)
+        if value is not None:
+            if name:
+                record_cache_lookup(name, "local_hit")
+            return value
+
+    computed = False
+
+    async def tracked_compute() -> str:
+        nonlocal computed
+        computed = True
+        return await compute()
+
+    value = decode(await cached_compute(key, tracked_compute, ttl, redis=redis))
+    if name:
+        record_cache_lookup(name, "miss" if computed else "hit")
+    if settings.CACHE_LOCAL_ENABLED:
+        local_cache.set(key, value, ttl=min(settings.CACHE_LOCAL_TTL_SECONDS, ttl))
+    return value
+
+
+async def invalidate(
+    keys: Iterable[str] = (),
+    prefixes: Iterable[str] = (),
+    redis: Optional[Redis] = None,
+) -> None:
+    """
+    Invalidate keys (and key prefixes) in Redis and in every worker's L1.
+
+    Args:
+        keys: Exact keys
+        prefixes: Key prefixes, e.g. "recommendations:user:42:"
+        redis: Client to use (defaults to the shared client)
+    """
+    keys, prefixes = list(keys), list(prefixes)
+    local_cache.delete(keys, prefixes)
+    redis = redis or get_redis()
+
+    try:
+        if keys:
+            await redis.delete(*keys)
+        for prefix in prefixes:
+            cursor = 0
+            while True:
+                cursor, matched = await redis.scan(cursor, match=f"{prefix}*", count=100)
+                if matched:
+                    await redis.delete(*matched)
+                if cursor == 0:
+                    break
+        if settings.CACHE_LOCAL_ENABLED:
+            await redis.publish(INVALIDATION_CHANNEL, json.dumps({"keys": keys, "prefixes": prefixes}))
+    except Exception as e:
+        logger.warning(f"Cache invalidation failed for {keys or prefixes}: {e}")
+
+
+async def run_invalidation_listener(redis: Optional[Redis] = None) -> None:
+    """
+    Apply L1 invalidations published by other workers (runs until cancelled).
+
+    After a reconnect the whole L1 is dropped, since messages may have been
+    missed while disconnected.
+    """
+    redis = redis or get_redis()
+    while True:
+        pubsub = redis.pubsub()
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            local_cache.clear()
+            while True:
+                # Short read timeout: the pooled socket timeout must not fire on an idle channel
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None:
+                    continue
+                try:
+                    data = json.loads(message["data"])
+                    local_cache.delete(data.get("keys", ()), data.get("prefixes", ()))
+                except (ValueError, TypeError, AttributeError):
+                    logger.warning(f"Ignoring malformed cache invalidation: {message['data']!r}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Cache invalidation listener disconnected, retrying: {e}")
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
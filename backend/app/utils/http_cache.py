@@ -0,0 +1,76 @@
+"""
+HTTP conditional request helpers (ETag, If-None-Match, Cache-Control).
+
+Endpoints derive a weak ETag from a cheap version (a row's updated_at, a
+Redis generation counter) and check it before building the response body,
+so a client or proxy revalidating an unchanged resource gets an empty 304.
+
+ETags are weak. The detail tag covers the popularity counters it shows;
+list tags follow a catalog generation that favorite counts only move once
+per fold interval, so counts in a revalidated list may lag by that much.
+"""
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response, status
+
+
+def weak_etag(*parts: Any) -> str:
+    """
+    Build a weak ETag from the parts identifying a resource version.
+
+    Args:
+        parts: Values that change whenever the representation changes
+
+    Returns:
+        Quoted weak ETag, e.g. ``W/"3f2a9c0d1b4e5f67"``
+    """
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:16]}"'
+
+
+def _opaque_tag(etag: str) -> str:
+    """Strip the weak prefix (If-None-Match uses weak comparison)."""
+    etag = etag.strip()
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Check whether a request's If-None-Match header matches an ETag.
+
+    Args:
+        request: Incoming request
+        etag: Current ETag of the resource
+
+    Returns:
+        True if the client's cached copy is still current
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    current = _opaque_tag(etag)
+    return any(_opaque_tag(candidate) == current for candidate in header.split(","))
+
+
+def set_cache_headers(
+    response: Response,
+    etag: Optional[str],
+    cache_control: str,
+    vary: Optional[str] = None,
+) -> None:
+    """Attach validator, caching policy and (optionally) Vary to a response."""
+    if etag:
+        response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    if vary:
+        response.headers["Vary"] = vary
+
+
+def not_modified(etag: str, cache_control: str, vary: Optional[str] = None) -> Response:
+    """Empty 304 response carrying the same validator, caching policy and Vary."""
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_cache_headers(response, etag, cache_control, vary)
+    return response
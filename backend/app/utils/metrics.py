@@ -0,0 +1,164 @@
+"""
+Prometheus metrics.
+
+Collected here and exposed on ``/metrics``:
+
+- HTTP: per-route latency histograms, request counts by status code and
+  in-flight requests (see app.middleware.metrics)
+- Database: query durations and queries per request, from SQLAlchemy
+  engine events on the primary and every replica
+- Caches: hits and misses of the named two-tier caches (recommendations,
+  dashboard)
+
+Routes are labelled with their path template (``/api/v1/actividades/{activity_id}``),
+never the raw path, to keep label cardinality bounded. With several worker
+processes, set PROMETHEUS_MULTIPROC_DIR so ``/metrics`` aggregates them all.
+"""
+from __future__ import annotations
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Route label outside of a request (scheduler jobs, startup)
+BACKGROUND_ROUTE = "background"
+# Route label for requests that matched no route (404s)
+UNMATCHED_ROUTE = "unmatched"
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route, method and status code",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests being served",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "SQL query latency by route",
+    ["route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "SQL queries issued by one HTTP request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Two-tier cache lookups by cache and result (local_hit, hit, miss)",
+    ["cache", "result"],
+)
+
+
+@dataclass
+class RequestStats:
+    """Per-request accumulator, shared with the DB event handlers through a ContextVar."""
+
+    scope: Dict[str, Any]
+    queries: int = 0
+    query_seconds: float = 0.0
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def route(self) -> str:
+        """Path template of the matched route (known once routing ran)."""
+        return route_label(self.scope)
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def route_label(scope: Dict[str, Any]) -> str:
+    """Route template for a request scope."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+def start_request(scope: Dict[str, Any]) -> Tuple[RequestStats, Any]:
+    """Start collecting the DB stats of the current request (returns the reset token)."""
+    stats = RequestStats(scope=scope)
+    return stats, _request_stats.set(stats)
+
+
+def finish_request(token: Any) -> None:
+    """Stop collecting the DB stats of the current request."""
+    _request_stats.reset(token)
+
+
+def record_cache_lookup(cache: str, result: str) -> None:
+    """Count a cache lookup (result: local_hit, hit or miss)."""
+    CACHE_LOOKUPS.labels(cache=cache, result=result).inc()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+
+    stats = _request_stats.get()
+    if stats is None:
+        DB_QUERY_DURATION.labels(route=BACKGROUND_ROUTE).observe(elapsed)
+        return
+    stats.queries += 1
+    stats.query_seconds += elapsed
+    DB_QUERY_DURATION.labels(route=stats.route).observe(elapsed)
+
+
+def _handle_error(exception_context):
+    # Drop the start time of the failed query
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Time every query of an engine (idempotent)."""
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Serialize all metrics in the Prometheus text format.
+
+    Returns:
+        Tuple of (body, content type)
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -1,18 +1,117 @@
 """
-Async Redis client singleton.
+Shared async Redis client.
+
+Every service (caches, rate limiter, principal cache, read-your-writes
+markers) uses the one client returned by ``get_redis``. It sits on a single
+bounded connection pool with health checks and socket timeouts; replies are
+parsed by hiredis when it is installed. The application lifespan opens the
+pool with ``init_redis`` and closes it with ``close_redis``.
 """
 from __future__ import annotations
-from typing import Optional
-from redis.asyncio import Redis
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from redis.asyncio import ConnectionPool, Redis
+from redis.utils import HIREDIS_AVAILABLE
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ConnectionPool] = None
 _redis: Optional[Redis] = None
 
 
+def _create_pool() -> ConnectionPool:
+    """Build the connection pool from settings."""
+    return ConnectionPool.from_url(
+        settings.REDIS_URL,
+        decode_responses=True,
+        # When exhausted, callers get ConnectionError at once (and degrade)
+        # rather than queueing behind the pool
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+        socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS,
+        socket_keepalive=True,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL_SECONDS,
+        retry_on_timeout=True,
+    )
+
+
 def get_redis() -> Redis:
-    """Get a singleton Redis async client."""
-    global _redis
+    """Get the shared Redis async client (created on first use)."""
+    global _pool, _redis
     if _redis is None:
-        _redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+        _pool = _create_pool()
+        _redis = Redis(connection_pool=_pool)
     return _redis
+
+
+async def init_redis() -> Redis:
+    """
+    Open the shared pool at startup and check Redis is reachable.
+
+    An unreachable Redis is logged, not raised: every caller already
+    degrades when Redis is down.
+    """
+    redis = get_redis()
+    try:
+        await redis.ping()
+        logger.info(
+            f"Redis pool ready (max_connections={settings.REDIS_MAX_CONNECTIONS}, "
+            f"hiredis={HIREDIS_AVAILABLE})"
+        )
+    except Exception as e:
+        logger.warning(f"Redis not reachable at startup: {e}")
+    return redis
+
+
+async def close_redis() -> None:
+    """Close the shared client and disconnect every pooled connection."""
+    global _pool, _redis
+    if _redis is not None:
+        await _redis.aclose()
+    if _pool is not None:
+        await _pool.disconnect()
+    _pool = None
+    _redis = None
+
+
+async def execute_pipeline(
+    commands: Iterable[Sequence[Any]],
+    transaction: bool = False,
+) -> List[Any]:
+    """
+    Send several commands in one round trip.
+
+    Args:
+        commands: Commands as (name, *args), e.g. ("HINCRBY", key, "total", 1)
+        transaction: Wrap them in MULTI/EXEC
+
+    Returns:
+        One reply per command, in order
+
+    Usage:
+        current, folding = await execute_pipeline([("HGETALL", key), ("HGETALL", other)])
+    """
+    pipe = get_redis().pipeline(transaction=transaction)
+    for name, *args in commands:
+        pipe.execute_command(name, *args)
+    return await pipe.execute()
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Snapshot of shared pool usage."""
+    if _pool is None:
+        return {"initialized": False, "max_connections": settings.REDIS_MAX_CONNECTIONS}
+
+    in_use = len(_pool._in_use_connections)
+    available = len(_pool._available_connections)
+    return {
+        "initialized": True,
+        "max_connections": _pool.max_connections,
+        "created_connections": in_use + available,
+        "in_use_connections": in_use,
+        "available_connections": available,
+        "hiredis": HIREDIS_AVAILABLE,
+    }
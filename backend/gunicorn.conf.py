@@ -0,0 +1,51 @@
+"""
+Gunicorn settings for production: uvicorn workers behind nginx.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Workers default to one per CPU (async workers saturate a core each); set
+WEB_CONCURRENCY to override. On SIGTERM the master stops accepting
+connections and gives workers GRACEFUL_TIMEOUT seconds to finish in-flight
+requests and run the lifespan shutdown (scheduler leadership is released so
+another process takes over the jobs, pools are closed).
+
+Prometheus metrics are aggregated across workers when
+PROMETHEUS_MULTIPROC_DIR is set (see ``render_metrics``).
+"""
+import multiprocessing
+import os
+import shutil
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY") or multiprocessing.cpu_count())
+
+# Seconds to drain in-flight requests on shutdown or reload before killing
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+# A worker that does not heartbeat for this long is restarted
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+# Longer than nginx's upstream keepalive_timeout, so nginx closes idle connections first
+keepalive = int(os.getenv("KEEPALIVE", "75"))
+
+# Trust X-Forwarded-* from the reverse proxy
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "*")
+
+accesslog = os.getenv("ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
+
+
+def on_starting(server):
+    """Start from an empty Prometheus multiprocess directory."""
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Drop live gauges of a worker that exited."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
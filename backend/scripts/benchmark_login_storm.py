@@ -0,0 +1,159 @@
+"""
+Load benchmark: non-auth endpoint latency during a login storm.
+
+Measures p50/p95/p99 latency of a cheap public endpoint, first at rest and
+then while many concurrent logins hit bcrypt. With hashing on the worker
+pool the non-auth p99 should stay flat.
+
+Usage:
+    # Against a running server (start it with RATE_LIMIT_ENABLED=False)
+    python scripts/benchmark_login_storm.py --base-url http://localhost:8000
+
+    # Without a server: event loop lag with inline bcrypt vs the worker pool
+    python scripts/benchmark_login_storm.py --local
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def _percentiles(samples_ms: List[float]) -> Dict[str, float]:
+    """Summarize latency samples (milliseconds)."""
+    if not samples_ms:
+        return {"count": 0}
+    ordered = sorted(samples_ms)
+
+    def pct(p: float) -> float:
+        return round(ordered[min(int(len(ordered) * p), len(ordered) - 1)], 2)
+
+    return {
+        "count": len(ordered),
+        "p50": pct(0.50),
+        "p95": pct(0.95),
+        "p99": pct(0.99),
+        "max": round(ordered[-1], 2),
+        "mean": round(statistics.fmean(ordered), 2),
+    }
+
+
+async def _probe(client, path: str, duration: float, interval: float) -> List[float]:
+    """Request `path` every `interval` seconds for `duration` seconds."""
+    samples = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        await client.get(path)
+        samples.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(interval)
+    return samples
+
+
+async def run_http(args) -> Dict:
+    """Benchmark a running server over HTTP."""
+    import httpx
+
+    credentials = {"email": args.email, "password": args.password}
+    limits = httpx.Limits(max_connections=args.concurrency + 10)
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60, limits=limits) as client:
+        # Ensure the benchmark user exists (400 if already registered)
+        await client.post("/api/v1/auth/register", json=credentials)
+
+        baseline = await _probe(client, args.probe_path, args.duration, args.interval)
+
+        login_latencies: List[float] = []
+        stop = asyncio.Event()
+
+        async def login_worker():
+            while not stop.is_set():
+                started = time.perf_counter()
+                await client.post("/api/v1/auth/login", json=credentials)
+                login_latencies.append((time.perf_counter() - started) * 1000)
+
+        workers = [asyncio.create_task(login_worker()) for _ in range(args.concurrency)]
+        await asyncio.sleep(0.5)  # let the storm ramp up
+        storm = await _probe(client, args.probe_path, args.duration, args.interval)
+        stop.set()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    return {
+        "mode": "http",
+        "probe_path": args.probe_path,
+        "login_concurrency": args.concurrency,
+        "baseline": _percentiles(baseline),
+        "during_storm": _percentiles(storm),
+        "logins": _percentiles(login_latencies),
+    }
+
+
+async def _loop_lag(duration: float, interval: float) -> List[float]:
+    """Measure how late the event loop wakes up from sleep(interval)."""
+    samples = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append((time.perf_counter() - started - interval) * 1000)
+    return samples
+
+
+async def run_local(args) -> Dict:
+    """Compare event loop lag with inline bcrypt vs the hashing pool."""
+    from app.core.security import get_password_hash, password_hash_pool
+
+    hashed = get_password_hash(args.password)
+
+    async def storm(use_pool: bool):
+        from app.core.security import verify_password
+
+        async def one():
+            if use_pool:
+                await password_hash_pool.run(verify_password, args.password, hashed)
+            else:
+                verify_password(args.password, hashed)
+                await asyncio.sleep(0)
+
+        deadline = time.perf_counter() + args.duration
+        while time.perf_counter() < deadline:
+            await asyncio.gather(*(one() for _ in range(args.concurrency)))
+
+    results = {"mode": "local", "concurrency": args.concurrency}
+    results["baseline"] = _percentiles(await _loop_lag(args.duration, args.interval))
+
+    for label, use_pool in (("inline", False), ("pool", True)):
+        storm_task = asyncio.create_task(storm(use_pool))
+        lag = await _loop_lag(args.duration, args.interval)
+        await storm_task
+        results[f"loop_lag_{label}"] = _percentiles(lag)
+
+    results["pool"] = password_hash_pool.stats()
+    password_hash_pool.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--local", action="store_true", help="Run without a server (event loop lag)")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--probe-path", default="/health", help="Non-auth endpoint to measure")
+    parser.add_argument("--email", default="bench-login@example.com")
+    parser.add_argument("--password", default="Bench1234")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent login workers")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per phase")
+    parser.add_argument("--interval", type=float, default=0.01, help="Seconds between probes")
+    args = parser.parse_args()
+
+    runner = run_local if args.local else run_http
+    print(json.dumps(asyncio.run(runner(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
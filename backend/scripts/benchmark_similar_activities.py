@@ -0,0 +1,178 @@
+"""
+Benchmark: similar-activities LSH index vs brute force.
+
+Builds the index over a synthetic catalog (same tipos, localidades and tags
+as seed_data.py) and reports recall@limit of the LSH results against the
+exact brute-force ranking, plus query, build and incremental update latency.
+
+Like the real catalog, most activities are editions of recurring series
+(weekly ciclovías, film cycles...) whose descriptions differ in a few words.
+
+Usage:
+    python scripts/benchmark_similar_activities.py --activities 5000 --queries 500
+
+    # Compare index shapes
+    python scripts/benchmark_similar_activities.py --tables 24 --bits 10
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List
+from uuid import uuid4
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.services.similarity_service import ActivitySimilarityIndex
+
+TOPICS = {
+    "cultura": {
+        "words": ["cine", "teatro", "concierto", "orquesta", "pintura", "exposicion", "museo",
+                  "danza", "lectura", "poesia", "musica", "taller", "artistas", "obra", "festival"],
+        "tags": ["cine", "cultura", "música", "clásica", "arte", "pintura", "taller", "teatro", "danza"],
+    },
+    "deporte": {
+        "words": ["ciclovia", "ciclistas", "carrera", "futbol", "baloncesto", "natacion", "torneo",
+                  "entrenamiento", "atletismo", "patinaje", "maraton", "equipo", "cancha"],
+        "tags": ["ciclismo", "deporte", "fútbol", "running", "natación", "torneo", "competencia"],
+    },
+    "recreacion": {
+        "words": ["yoga", "caminata", "parque", "picnic", "juegos", "familia", "bienestar",
+                  "meditacion", "senderismo", "aire", "libre", "ninos", "mascotas"],
+        "tags": ["yoga", "bienestar", "salud", "recreación", "familias", "aire libre", "niños"],
+    },
+}
+COMMON_WORDS = ["gratuito", "bogota", "comunidad", "horario", "domingos", "sabados", "inscripcion",
+                "abierto", "publico", "todas", "edades", "evento", "ciudad", "actividad"]
+LOCALIDADES = ["Chapinero", "Santa Fe", "La Candelaria"]
+SYLLABLES = ["ba", "ca", "lo", "mi", "ra", "to", "ve", "su", "ne", "qui", "gua", "ta", "ro", "li", "pa"]
+NIVELES = ["bajo", "medio", "alto", None]
+
+
+def synthetic_names(count: int, rng: random.Random) -> List[str]:
+    """Made-up proper names (venues, organizers) to give the catalog a realistic vocabulary."""
+    return ["".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(count)]
+
+
+def synthetic_series(rng: random.Random, names: List[str]) -> SimpleNamespace:
+    """Random recurring event (e.g. a weekly ciclovía) with topic-correlated words and tags."""
+    tipo = rng.choice(list(TOPICS))
+    topic = TOPICS[tipo]
+    # Names cluster by topic so that related series share them
+    offset = list(TOPICS).index(tipo) * len(names) // len(TOPICS)
+    local_names = names[offset:offset + len(names) // len(TOPICS)]
+    return SimpleNamespace(
+        titulo=rng.sample(topic["words"], 2) + [rng.choice(local_names)],
+        descripcion=[
+            rng.choice(topic["words"]) if roll < 0.4
+            else rng.choice(local_names) if roll < 0.7
+            else rng.choice(COMMON_WORDS)
+            for roll in (rng.random() for _ in range(rng.randint(15, 40)))
+        ],
+        etiquetas=rng.sample(topic["tags"], rng.randint(1, 4)),
+        tipo=tipo,
+        localidad=rng.choice(LOCALIDADES),
+        nivel_actividad=rng.choice(NIVELES),
+        local_names=local_names,
+    )
+
+
+def synthetic_activity(rng: random.Random, series: SimpleNamespace) -> SimpleNamespace:
+    """One edition of a series: same activity with a few words of the description changed."""
+    descripcion = list(series.descripcion)
+    for position in rng.sample(range(len(descripcion)), len(descripcion) // 4):
+        descripcion[position] = rng.choice(series.local_names + COMMON_WORDS)
+    return SimpleNamespace(
+        id=uuid4(),
+        titulo=" ".join(series.titulo),
+        descripcion=" ".join(descripcion),
+        etiquetas=list(series.etiquetas),
+        tipo=series.tipo,
+        localidad=series.localidad if rng.random() < 0.8 else rng.choice(LOCALIDADES),
+        nivel_actividad=series.nivel_actividad,
+        estado="activa",
+    )
+
+
+def _percentiles(samples_ms: List[float]) -> Dict[str, float]:
+    """Summarize latency samples (milliseconds)."""
+    ordered = sorted(samples_ms)
+
+    def pct(p: float) -> float:
+        return round(ordered[min(int(len(ordered) * p), len(ordered) - 1)], 3)
+
+    return {
+        "count": len(ordered),
+        "p50": pct(0.50),
+        "p95": pct(0.95),
+        "p99": pct(0.99),
+        "mean": round(statistics.fmean(ordered), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--activities", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--editions", type=int, default=10, help="Average activities per recurring series")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--tables", type=int, default=settings.SIMILAR_LSH_TABLES)
+    parser.add_argument("--bits", type=int, default=settings.SIMILAR_LSH_BITS)
+    parser.add_argument("--updates", type=int, default=200, help="Incremental upserts to time")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names = synthetic_names(max(300, args.activities // 2), rng)
+    series = [synthetic_series(rng, names) for _ in range(max(1, args.activities // args.editions))]
+    catalog = [synthetic_activity(rng, rng.choice(series)) for _ in range(args.activities)]
+
+    started = time.perf_counter()
+    index = ActivitySimilarityIndex(catalog, tables=args.tables, bits=args.bits, seed=args.seed)
+    build_seconds = time.perf_counter() - started
+
+    ann_ms, exact_ms, recalls = [], [], []
+    for activity in rng.sample(catalog, min(args.queries, len(catalog))):
+        started = time.perf_counter()
+        approximate = index.similar(activity.id, args.limit)
+        ann_ms.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        exact = index.brute_force(activity.id, args.limit)
+        exact_ms.append((time.perf_counter() - started) * 1000)
+
+        if exact:
+            # Ties at the cut-off score count as hits
+            cutoff = exact[-1][1]
+            hits = sum(1 for _, score in approximate if score >= cutoff - 1e-6)
+            recalls.append(min(hits, len(exact)) / len(exact))
+
+    update_ms = []
+    for activity in rng.sample(catalog, min(args.updates, len(catalog))):
+        activity.titulo = f"{activity.titulo} {rng.choice(COMMON_WORDS)}"
+        started = time.perf_counter()
+        index.upsert(activity)
+        update_ms.append((time.perf_counter() - started) * 1000)
+
+    print(json.dumps({
+        "activities": len(index),
+        "vocabulary": len(index.vectorizer.vocabulary),
+        "tables": args.tables,
+        "bits": args.bits,
+        "limit": args.limit,
+        "build_seconds": round(build_seconds, 3),
+        f"recall@{args.limit}": round(statistics.fmean(recalls), 4) if recalls else None,
+        "lsh_query_ms": _percentiles(ann_ms),
+        "brute_force_query_ms": _percentiles(exact_ms),
+        "upsert_ms": _percentiles(update_ms),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
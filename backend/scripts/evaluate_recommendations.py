@@ -0,0 +1,412 @@
+"""
+Offline evaluation and benchmark harness for the recommender.
+
+Seeds a synthetic catalog into the database (same tipos, localidades, levels
+and tags as seed_data.py): activities, users with latent tastes, partial
+profiles and favorites drawn from those tastes. A share of each user's
+favorites is held out (never inserted). The harness then replays
+RecommendationService requests and reports:
+
+- latency percentiles, throughput and memory of the replay
+- precision@K, recall@K, NDCG@K and hit rate on the held-out favorites,
+  next to a popularity-only baseline
+
+The synthetic rows are tagged with the run ID and deleted at the end
+(unless --keep-data). Use a scratch database.
+
+Usage:
+    DATABASE_URL=postgresql+asyncpg://.../triqueta_eval \\
+        python scripts/evaluate_recommendations.py --users 2000 --activities 1000
+
+    # Full request path (Redis cache, stampede protection) instead of scoring only
+    python scripts/evaluate_recommendations.py --mode cached --requests 5000 --concurrency 20
+
+    # Track regressions
+    python scripts/evaluate_recommendations.py --output eval.json
+
+    # Keep the data, then evaluate with a collaborative filtering model trained on it
+    python scripts/evaluate_recommendations.py --keep-data
+    python scripts/train_collaborative_filtering.py
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, List, Sequence, Set
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.security import get_password_hash
+from app.db.session import async_session_maker
+from app.models import Actividad, Favorito, PerfilUsuario, Usuario
+from app.schemas.activity import LOCALIDADES, NIVELES_ACTIVIDAD, TIPOS_ACTIVIDAD
+from app.schemas.recommendation import RecommendationQuery
+from app.services.recommendation_service import recommendation_service
+
+TAGS_BY_TIPO = {
+    "cultura": ["cine", "cultura", "entretenimiento", "música", "clásica", "orquesta",
+                "arte", "pintura", "taller", "teatro", "danza", "literatura"],
+    "deporte": ["ciclismo", "deporte", "recreación", "familias", "fútbol", "running",
+                "natación", "torneo", "patinaje", "baloncesto"],
+    "recreacion": ["yoga", "bienestar", "salud", "aire libre", "familias", "caminata",
+                   "picnic", "mascotas", "niños", "meditación"],
+}
+TAGS = sorted({tag for tags in TAGS_BY_TIPO.values() for tag in tags})
+INSERT_CHUNK = 5000
+
+
+# ========== Synthetic data ==========
+
+def generate_dataset(args, rng: np.random.Generator) -> Dict:
+    """
+    Build activities, users, profiles and favorites (train and held-out).
+
+    Favorites follow each user's latent tastes (tipo, tags, localidad,
+    nivel) weighted by a latent activity appeal, so a good recommender can
+    beat popularity.
+    """
+    tag_index = {tag: column for column, tag in enumerate(TAGS)}
+
+    activities = []
+    activity_tags = np.zeros((args.activities, len(TAGS)), dtype=np.float32)
+    for row in range(args.activities):
+        tipo = TIPOS_ACTIVIDAD[rng.integers(len(TIPOS_ACTIVIDAD))]
+        pool = TAGS_BY_TIPO[tipo]
+        tags = list(rng.choice(pool, size=rng.integers(2, 5), replace=False))
+        for tag in tags:
+            activity_tags[row, tag_index[tag]] = 1.0
+        activities.append({
+            "id": uuid.uuid4(),
+            "tipo": tipo,
+            "localidad": LOCALIDADES[rng.integers(len(LOCALIDADES))],
+            "nivel_actividad": NIVELES_ACTIVIDAD[rng.integers(len(NIVELES_ACTIVIDAD))] if rng.random() < 0.8 else None,
+            "etiquetas": tags,
+        })
+    # Latent appeal drives popularity; kept narrow so that tastes dominate choices
+    appeal = rng.lognormal(0.0, 0.5, size=args.activities)
+    tipos = np.array([activity["tipo"] for activity in activities])
+    localidades = np.array([activity["localidad"] for activity in activities])
+    niveles = np.array([activity["nivel_actividad"] for activity in activities], dtype=object)
+
+    users, favorites_train, favorites_test = [], [], []
+    for user in range(args.users):
+        tipo = TIPOS_ACTIVIDAD[rng.integers(len(TIPOS_ACTIVIDAD))]
+        liked_tags = list(rng.choice(TAGS_BY_TIPO[tipo], size=3, replace=False))
+        localidad = LOCALIDADES[rng.integers(len(LOCALIDADES))]
+        nivel = NIVELES_ACTIVIDAD[rng.integers(len(NIVELES_ACTIVIDAD))]
+
+        # Profiles reveal part of the tastes, and only for some users
+        profile = None
+        if rng.random() < args.profile_rate:
+            profile = {
+                "etiquetas_interes": liked_tags[:rng.integers(0, 4)],
+                "localidad_preferida": localidad if rng.random() < 0.7 else None,
+                "nivel_actividad": nivel if rng.random() < 0.5 else None,
+            }
+        users.append({"index": user, "profile": profile})
+
+        user_tags = np.zeros(len(TAGS), dtype=np.float32)
+        user_tags[[tag_index[tag] for tag in liked_tags]] = 1.0
+        weights = appeal * (1 + 2 * (activity_tags @ user_tags))
+        weights *= np.where(tipos == tipo, 2.0, 1.0)
+        weights *= np.where(localidades == localidad, 1.5, 1.0)
+        weights *= np.where(niveles == nivel, 1.3, 1.0)
+
+        count = int(min(max(1, rng.poisson(args.favorites_per_user)), args.activities))
+        chosen = rng.choice(args.activities, size=count, replace=False, p=weights / weights.sum())
+        held_out = int(len(chosen) * args.holdout) if len(chosen) > 1 else 0
+        favorites_test.append({int(index) for index in chosen[:held_out]})
+        favorites_train.append({int(index) for index in chosen[held_out:]})
+
+    # Popularity as the popularity job would compute it from the inserted favorites
+    favorite_counts = np.zeros(args.activities, dtype=np.int64)
+    for favorites in favorites_train:
+        favorite_counts[list(favorites)] += 1
+    views = rng.poisson(appeal * 20)
+    raw = favorite_counts + views * 0.1
+    normalized = raw / raw.max() if raw.max() > 0 else raw
+    for row, activity in enumerate(activities):
+        # Bulk insert maps columns only (popularidad_favoritos is read-only)
+        activity["popularidad_favoritos_base"] = int(favorite_counts[row])
+        activity["popularidad_vistas"] = Decimal(str(round(float(views[row]), 2)))
+        activity["popularidad_normalizada"] = Decimal(str(round(float(normalized[row]), 4)))
+
+    return {
+        "activities": activities,
+        "users": users,
+        "favorites_train": favorites_train,
+        "favorites_test": favorites_test,
+    }
+
+
+async def insert_dataset(dataset: Dict, run_id: str) -> List[int]:
+    """Insert the synthetic rows; returns the database user IDs by user index."""
+    now = datetime.utcnow()
+    hashed_password = get_password_hash("Eval12345")
+
+    async with async_session_maker() as db:
+        activity_rows = [
+            {
+                **activity,
+                "titulo": f"Actividad {activity['tipo']} {row}",
+                "descripcion": f"Actividad sintética de evaluación ({', '.join(activity['etiquetas'])})",
+                "fecha_inicio": now + timedelta(days=row % 60),
+                "ubicacion_direccion": f"Dirección {row}",
+                "ubicacion_lat": Decimal("4.6"),
+                "ubicacion_lng": Decimal("-74.07"),
+                "precio": Decimal("0"),
+                "es_gratis": True,
+                "fuente": f"eval-{run_id}",
+                "estado": "activa",
+            }
+            for row, activity in enumerate(dataset["activities"])
+        ]
+        for offset in range(0, len(activity_rows), INSERT_CHUNK):
+            await db.execute(insert(Actividad), activity_rows[offset:offset + INSERT_CHUNK])
+
+        user_ids: List[int] = []
+        for offset in range(0, len(dataset["users"]), INSERT_CHUNK):
+            chunk = dataset["users"][offset:offset + INSERT_CHUNK]
+            result = await db.execute(
+                insert(Usuario).returning(Usuario.id, sort_by_parameter_order=True),
+                [
+                    {
+                        "email": f"eval-{run_id}-{user['index']}@example.com",
+                        "hashed_password": hashed_password,
+                        "is_active": True,
+                        "is_admin": False,
+                    }
+                    for user in chunk
+                ],
+            )
+            user_ids.extend(result.scalars().all())
+
+        profile_rows = [
+            {"usuario_id": user_ids[user["index"]], **user["profile"]}
+            for user in dataset["users"]
+            if user["profile"] is not None
+        ]
+        for offset in range(0, len(profile_rows), INSERT_CHUNK):
+            await db.execute(insert(PerfilUsuario), profile_rows[offset:offset + INSERT_CHUNK])
+
+        favorite_rows = [
+            {
+                "usuario_id": user_ids[user],
+                "actividad_id": dataset["activities"][index]["id"],
+                "fecha_guardado": now,
+            }
+            for user, favorites in enumerate(dataset["favorites_train"])
+            for index in favorites
+        ]
+        for offset in range(0, len(favorite_rows), INSERT_CHUNK):
+            await db.execute(insert(Favorito), favorite_rows[offset:offset + INSERT_CHUNK])
+
+        await db.commit()
+    return user_ids
+
+
+async def delete_dataset(run_id: str) -> None:
+    """Delete every row created by this run."""
+    async with async_session_maker() as db:
+        eval_users = select(Usuario.id).where(Usuario.email.like(f"eval-{run_id}-%"))
+        await db.execute(delete(Favorito).where(Favorito.usuario_id.in_(eval_users)))
+        await db.execute(delete(PerfilUsuario).where(PerfilUsuario.usuario_id.in_(eval_users)))
+        await db.execute(delete(Usuario).where(Usuario.email.like(f"eval-{run_id}-%")))
+        await db.execute(delete(Actividad).where(Actividad.fuente == f"eval-{run_id}"))
+        await db.commit()
+
+
+# ========== Metrics ==========
+
+def ranking_metrics(ranked: Sequence, relevant: Set, k: int) -> Dict[str, float]:
+    """precision@k, recall@k, NDCG@k (binary relevance) and hit of one ranking."""
+    top = list(ranked)[:k]
+    gains = [1.0 if item in relevant else 0.0 for item in top]
+    hits = sum(gains)
+    dcg = sum(gain / math.log2(position + 2) for position, gain in enumerate(gains))
+    idcg = sum(1.0 / math.log2(position + 2) for position in range(min(len(relevant), k)))
+    return {
+        "precision": hits / k,
+        "recall": hits / len(relevant) if relevant else 0.0,
+        "ndcg": dcg / idcg if idcg else 0.0,
+        "hit_rate": 1.0 if hits else 0.0,
+    }
+
+
+def average_metrics(samples: List[Dict[str, float]]) -> Dict[str, float]:
+    """Mean of each metric over users."""
+    if not samples:
+        return {}
+    return {name: round(statistics.fmean(sample[name] for sample in samples), 4) for name in samples[0]}
+
+
+def _percentiles(samples_ms: List[float]) -> Dict[str, float]:
+    """Summarize latency samples (milliseconds)."""
+    if not samples_ms:
+        return {"count": 0}
+    ordered = sorted(samples_ms)
+
+    def pct(p: float) -> float:
+        return round(ordered[min(int(len(ordered) * p), len(ordered) - 1)], 2)
+
+    return {
+        "count": len(ordered),
+        "p50": pct(0.50),
+        "p95": pct(0.95),
+        "p99": pct(0.99),
+        "max": round(ordered[-1], 2),
+        "mean": round(statistics.fmean(ordered), 2),
+    }
+
+
+# ========== Replay ==========
+
+async def recommend(usuario_id: int, query: RecommendationQuery, mode: str):
+    """One recommendation request in its own session."""
+    async with async_session_maker() as db:
+        if mode == "cached":
+            return await recommendation_service.get_recommendations(db, usuario_id, query)
+        return await recommendation_service._compute_recommendations(db, usuario_id, query)
+
+
+async def replay(user_ids: List[int], args, rng: random.Random) -> Dict:
+    """Replay random users' requests; latency, throughput and memory."""
+    query = RecommendationQuery(limit=args.k)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+
+    async def one(usuario_id: int):
+        async with semaphore:
+            started = time.perf_counter()
+            await recommend(usuario_id, query, args.mode)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(one(rng.choice(user_ids)) for _ in range(args.requests)))
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "mode": args.mode,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "latency_ms": _percentiles(latencies),
+        "throughput_rps": round(args.requests / elapsed, 1),
+        "memory": {
+            "python_peak_mb": round(peak / 2**20, 1),
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        },
+    }
+
+
+async def evaluate(dataset: Dict, user_ids: List[int], args, rng: random.Random) -> Dict:
+    """Quality on held-out favorites, for the recommender and a popularity baseline."""
+    query = RecommendationQuery(limit=args.k, exclude_favorited=True)
+    activity_rows = {activity["id"]: row for row, activity in enumerate(dataset["activities"])}
+    by_popularity = np.argsort(
+        [-float(activity["popularidad_normalizada"]) for activity in dataset["activities"]], kind="stable"
+    )
+
+    candidates = [user for user, test in enumerate(dataset["favorites_test"]) if test]
+    sample = rng.sample(candidates, min(args.eval_users, len(candidates)))
+
+    recommender, baseline = [], []
+    for user in sample:
+        relevant = dataset["favorites_test"][user]
+        response = await recommend(user_ids[user], query, "compute")
+        ranked = [activity_rows.get(uuid.UUID(str(item.actividad["id"]))) for item in response.items]
+        recommender.append(ranking_metrics(ranked, relevant, args.k))
+
+        seen = dataset["favorites_train"][user]
+        popular = [int(index) for index in by_popularity if int(index) not in seen][:args.k]
+        baseline.append(ranking_metrics(popular, relevant, args.k))
+
+    return {
+        "k": args.k,
+        "users_evaluated": len(sample),
+        "recommender": average_metrics(recommender),
+        "popularity_baseline": average_metrics(baseline),
+    }
+
+
+async def run(args) -> Dict:
+    rng = np.random.default_rng(args.seed)
+    py_rng = random.Random(args.seed)
+    run_id = uuid.uuid4().hex[:8]
+
+    started = time.perf_counter()
+    dataset = generate_dataset(args, rng)
+    generated = time.perf_counter()
+    user_ids = await insert_dataset(dataset, run_id)
+    inserted = time.perf_counter()
+
+    try:
+        results = {
+            "run_id": run_id,
+            "config": {
+                "users": args.users,
+                "activities": args.activities,
+                "favorites_per_user": args.favorites_per_user,
+                "holdout": args.holdout,
+                "profile_rate": args.profile_rate,
+                "seed": args.seed,
+            },
+            "dataset": {
+                "favorites_train": sum(len(favorites) for favorites in dataset["favorites_train"]),
+                "favorites_held_out": sum(len(favorites) for favorites in dataset["favorites_test"]),
+                "profiles": sum(1 for user in dataset["users"] if user["profile"] is not None),
+                "generate_seconds": round(generated - started, 2),
+                "insert_seconds": round(inserted - generated, 2),
+            },
+            "quality": await evaluate(dataset, user_ids, args, py_rng),
+            "performance": await replay(user_ids, args, py_rng),
+        }
+    finally:
+        if not args.keep_data:
+            await delete_dataset(run_id)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--activities", type=int, default=500)
+    parser.add_argument("--favorites-per-user", type=float, default=8.0, help="Mean favorites per user")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Share of each user's favorites held out")
+    parser.add_argument("--profile-rate", type=float, default=0.7, help="Share of users with a profile")
+    parser.add_argument("--k", type=int, default=10, help="Recommendations per request (1-50)")
+    parser.add_argument("--eval-users", type=int, default=500, help="Users scored for quality")
+    parser.add_argument("--requests", type=int, default=1000, help="Replayed requests")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--mode", choices=["compute", "cached"], default="compute",
+                        help="compute: scoring only; cached: full get_recommendations path")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep-data", action="store_true", help="Do not delete the synthetic rows")
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Offline trainer for the collaborative filtering recommendation model.
+
+Builds the users x activities matrix from favorites, factorizes it with
+implicit ALS (default) or truncated SVD, and writes a versioned artifact to
+CF_MODEL_DIR. Running API workers pick it up within CF_RELOAD_SECONDS.
+
+Usage:
+    # Train from the database (DATABASE_URL)
+    python scripts/train_collaborative_filtering.py
+
+    # Truncated SVD, 64 factors, keep the last 3 artifacts
+    python scripts/train_collaborative_filtering.py --method svd --factors 64 --keep 3
+
+    # Time training on synthetic interactions (nothing is written)
+    python scripts/train_collaborative_filtering.py --synthetic 1000000 --dry-run
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.services.collaborative_filtering import (
+    LATEST_FILE,
+    CollaborativeModel,
+    build_interaction_matrix,
+    train_als,
+    train_svd,
+)
+
+
+async def load_favorites() -> List[Tuple[int, str]]:
+    """Load every (usuario_id, actividad_id) favorite pair."""
+    from sqlalchemy import select
+
+    from app.db.session import async_session_maker
+    from app.models.favorite import Favorito
+
+    async with async_session_maker() as db:
+        result = await db.execute(select(Favorito.usuario_id, Favorito.actividad_id))
+        return [(usuario_id, str(actividad_id)) for usuario_id, actividad_id in result]
+
+
+def synthetic_favorites(interactions: int, seed: int) -> List[Tuple[int, str]]:
+    """Random favorites with a long-tailed activity popularity."""
+    rng = np.random.default_rng(seed)
+    users = max(1, interactions // 20)
+    activities = max(1, interactions // 100)
+    popularity = 1.0 / np.arange(1, activities + 1)
+    popularity /= popularity.sum()
+    user_ids = rng.integers(1, users + 1, size=interactions)
+    activity_ids = rng.choice(activities, size=interactions, p=popularity)
+    return [(int(u), f"synthetic-{a}") for u, a in zip(user_ids, activity_ids)]
+
+
+def prune_artifacts(directory: Path, keep: int) -> List[str]:
+    """Delete all but the newest `keep` artifacts (never the one LATEST names)."""
+    latest = (directory / LATEST_FILE).read_text().strip()
+    artifacts = sorted(directory.glob("cf-*.npz"), reverse=True)
+    removed = []
+    for path in artifacts[keep:]:
+        if path.stem != f"cf-{latest}":
+            path.unlink()
+            removed.append(path.name)
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--method", choices=["als", "svd"], default="als")
+    parser.add_argument("--factors", type=int, default=32)
+    parser.add_argument("--iterations", type=int, default=15, help="ALS sweeps")
+    parser.add_argument("--regularization", type=float, default=0.05, help="ALS L2 penalty")
+    parser.add_argument("--alpha", type=float, default=20.0, help="ALS confidence scaling")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output-dir", default=settings.CF_MODEL_DIR)
+    parser.add_argument("--keep", type=int, default=5, help="Artifacts to keep (0 keeps all)")
+    parser.add_argument("--synthetic", type=int, default=0, help="Train on N synthetic interactions")
+    parser.add_argument("--dry-run", action="store_true", help="Train without writing the artifact")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.synthetic:
+        pairs = synthetic_favorites(args.synthetic, args.seed)
+    else:
+        pairs = asyncio.run(load_favorites())
+    matrix, user_ids, item_ids = build_interaction_matrix(pairs)
+    loaded = time.perf_counter()
+
+    summary: Dict = {
+        "method": args.method,
+        "factors": args.factors,
+        "users": matrix.shape[0],
+        "activities": matrix.shape[1],
+        "interactions": int(matrix.nnz),
+        "load_seconds": round(loaded - started, 2),
+    }
+    if matrix.nnz == 0:
+        summary["error"] = "no favorites to train on"
+        print(json.dumps(summary, indent=2))
+        sys.exit(1)
+
+    if args.method == "als":
+        user_factors, item_factors = train_als(
+            matrix,
+            factors=args.factors,
+            regularization=args.regularization,
+            alpha=args.alpha,
+            iterations=args.iterations,
+            seed=args.seed,
+        )
+        summary.update(iterations=args.iterations, regularization=args.regularization, alpha=args.alpha)
+    else:
+        user_factors, item_factors = train_svd(matrix, factors=args.factors)
+    summary["train_seconds"] = round(time.perf_counter() - loaded, 2)
+
+    model = CollaborativeModel(
+        version=CollaborativeModel.new_version(),
+        user_ids=user_ids,
+        item_ids=item_ids,
+        user_factors=user_factors,
+        item_factors=item_factors,
+        metadata=dict(summary),
+    )
+    summary["version"] = model.version
+
+    if not args.dry_run:
+        directory = Path(args.output_dir)
+        summary["artifact"] = str(model.save(directory))
+        if args.keep:
+            summary["pruned"] = prune_artifacts(directory, args.keep)
+
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -16,9 +16,17 @@ from app.core.config import settings
 load_dotenv(".env.test")
 # Disable rate limiting during tests to avoid Redis calls and event loop issues
 settings.RATE_LIMIT_ENABLED = False
+# Tables are recreated per test (IDs restart), so cached principals would go stale
+settings.USER_CACHE_ENABLED = False
+# Rollup materialized views come from migrations, not Base.metadata.create_all
+settings.METRICS_ROLLUPS_ENABLED = False
+# Keep cached responses out of process memory so tests do not see each other's data
+settings.CACHE_LOCAL_ENABLED = False
+# Keep scores independent of any locally trained collaborative filtering model
+settings.CF_ENABLED = False
 
 from app.main import app
-from app.core.dependencies import get_db
+from app.core.dependencies import get_db, get_read_db
 from app.db.base import Base
 
 
@@ -73,6 +81,7 @@ async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
         yield db_session
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     
     async with AsyncClient(app=app, base_url="http://test") as ac:
         yield ac
@@ -159,6 +159,25 @@ async def test_list_activities_with_data(client: AsyncClient, admin_token: str,
     assert data["pagination"]["page"] == 1
 
 
+@pytest.mark.asyncio
+async def test_list_activities_card_fields(client: AsyncClient, admin_token: str, sample_activity_data):
+    """Test fields=card returns the compact projection and unknown fields are rejected."""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    await client.post("/api/v1/actividades", json=sample_activity_data, headers=headers)
+    
+    response = await client.get("/api/v1/actividades", params={"fields": "card"})
+    
+    assert response.status_code == 200
+    item = response.json()["data"][0]
+    assert set(item) == {"id", "titulo", "imagen_url", "fecha_inicio", "localidad", "tipo", "precio", "es_gratis"}
+    
+    response = await client.get("/api/v1/actividades", params={"fields": "titulo,descripcion_corta"})
+    assert set(response.json()["data"][0]) == {"id", "titulo", "descripcion_corta"}
+    
+    response = await client.get("/api/v1/actividades", params={"fields": "titulo,contacto"})
+    assert response.status_code == 400
+
+
 @pytest.mark.asyncio
 async def test_list_activities_pagination(client: AsyncClient, admin_token: str, sample_activity_data):
     """Test activity list pagination."""
@@ -419,3 +438,108 @@ async def test_delete_activity_not_found(client: AsyncClient, admin_token: str):
     )
     
     assert response.status_code == 404
+
+
+# Similar activities
+@pytest.mark.asyncio
+async def test_get_similar_activities(client: AsyncClient, admin_token: str, sample_activity_data, monkeypatch):
+    """Test similar activities rank the closest activity first and skip deleted ones."""
+    from app.services import similarity_service
+    monkeypatch.setattr(similarity_service, "_index", None)
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    
+    source = (await client.post("/api/v1/actividades", json=sample_activity_data, headers=headers)).json()
+    close = (await client.post("/api/v1/actividades", json={
+        **sample_activity_data,
+        "titulo": "Taller de Arte Urbano para Jóvenes",
+    }, headers=headers)).json()
+    await client.post("/api/v1/actividades", json={
+        **sample_activity_data,
+        "titulo": "Carrera Atlética Nocturna",
+        "descripcion": "Carrera de 10 kilómetros por las calles de la ciudad",
+        "tipo": "deporte",
+        "localidad": "Santa Fe",
+        "etiquetas": ["running", "deporte"],
+    }, headers=headers)
+    
+    response = await client.get(f"/api/v1/actividades/{source['id']}/similares")
+    
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data[0]["id"] == close["id"]
+    assert all(item["id"] != source["id"] for item in data)
+    assert all(0 <= item["similitud"] <= 1 for item in data)
+    
+    # Deleted activities leave the index at once
+    await client.delete(f"/api/v1/actividades/{close['id']}", headers=headers)
+    response = await client.get(f"/api/v1/actividades/{source['id']}/similares")
+    assert all(item["id"] != close["id"] for item in response.json()["data"])
+
+
+@pytest.mark.asyncio
+async def test_get_similar_activities_not_found(client: AsyncClient):
+    """Test similar activities of a non-existent activity returns 404."""
+    fake_uuid = "00000000-0000-0000-0000-000000000000"
+    
+    response = await client.get(f"/api/v1/actividades/{fake_uuid}/similares")
+    
+    assert response.status_code == 404
+
+
+# Conditional GET
+@pytest.mark.asyncio
+async def test_get_activity_detail_conditional(client: AsyncClient, admin_token: str, sample_activity_data):
+    """Test detail revalidation returns 304 until the activity changes."""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    activity_id = (await client.post("/api/v1/actividades", json=sample_activity_data, headers=headers)).json()["id"]
+    
+    first = await client.get(f"/api/v1/actividades/{activity_id}")
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+    assert "max-age" in first.headers["cache-control"]
+    
+    # The client's own revalidation is counted as a view but does not
+    # invalidate its copy; the 304 carries the tag with the new count
+    revalidated = await client.get(f"/api/v1/actividades/{activity_id}", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] != etag
+    assert revalidated.content == b""
+    etag = revalidated.headers["etag"]
+    assert (await client.get(f"/api/v1/actividades/{activity_id}", headers={"If-None-Match": etag})).status_code == 304
+    
+    # A view by someone else changes the counters in the body
+    await client.get(f"/api/v1/actividades/{activity_id}")
+    viewed = await client.get(f"/api/v1/actividades/{activity_id}", headers={"If-None-Match": etag})
+    assert viewed.status_code == 200
+    assert viewed.json()["popularidad_vistas"] != first.json()["popularidad_vistas"]
+    etag = viewed.headers["etag"]
+    
+    await client.put(f"/api/v1/actividades/{activity_id}", json={"titulo": "Taller renovado"}, headers=headers)
+    changed = await client.get(f"/api/v1/actividades/{activity_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["titulo"] == "Taller renovado"
+
+
+@pytest.mark.asyncio
+async def test_list_activities_conditional(client: AsyncClient, monkeypatch):
+    """Test list revalidation returns 304 until the catalog generation moves."""
+    from app.services.activity_service import ActivityService
+    generation = {"value": 1}
+    
+    async def get_list_generation():
+        return generation["value"]
+    
+    monkeypatch.setattr(ActivityService, "get_list_generation", staticmethod(get_list_generation))
+    
+    first = await client.get("/api/v1/actividades?tipo=cultura")
+    etag = first.headers["etag"]
+    
+    revalidated = await client.get("/api/v1/actividades?tipo=cultura", headers={"If-None-Match": etag})
+    other_filter = await client.get("/api/v1/actividades?tipo=deporte", headers={"If-None-Match": etag})
+    generation["value"] = 2
+    after_write = await client.get("/api/v1/actividades?tipo=cultura", headers={"If-None-Match": etag})
+    
+    assert revalidated.status_code == 304
+    assert other_filter.status_code == 200
+    assert after_write.status_code == 200
@@ -0,0 +1,152 @@
+"""
+Tests for prebuilt activity JSON fragments.
+"""
+import json
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from app.schemas.activity import ActividadListItem, ActividadListResponse, PaginationMetadata
+from app.schemas.recommendation import RecommendationExplanation
+from app.services import activity_serializer
+from app.services.recommendation_service import recommendation_service
+
+
+def _activity(**overrides):
+    activity = SimpleNamespace(
+        id=uuid4(),
+        titulo="Taller de Arte Urbano",
+        descripcion="Taller práctico de grafiti y muralismo " * 10,
+        tipo="cultura",
+        fecha_inicio=datetime(2025, 12, 1, 15, 0),
+        fecha_fin=None,
+        ubicacion_direccion="Calle 10 # 5-20",
+        ubicacion_lat=Decimal("4.598056"),
+        ubicacion_lng=Decimal("-74.075833"),
+        localidad="La Candelaria",
+        precio=Decimal("15000.00"),
+        es_gratis=False,
+        nivel_actividad="medio",
+        etiquetas=["arte", "cultura"],
+        contacto=None,
+        enlace_externo=None,
+        imagen_url="https://example.com/taller.jpg",
+        fuente="manual",
+        estado="activa",
+        popularidad_favoritos=4,
+        popularidad_vistas=Decimal("1.3"),
+        popularidad_normalizada=Decimal("0.42"),
+        created_at=datetime(2025, 11, 1, 9, 30),
+        updated_at=datetime(2025, 11, 2, 9, 30, 15, 123456),
+    )
+    for field, value in overrides.items():
+        setattr(activity, field, value)
+    return activity
+
+
+def test_list_response_matches_pydantic_rendering():
+    """Test the assembled list is the same JSON the response model would produce."""
+    activities = [_activity(), _activity(titulo="Ciclovía", descripcion="Recorrido corto")]
+    pagination = PaginationMetadata(total=2, page=1, page_size=20, total_pages=1)
+
+    body = activity_serializer.render_activity_list(activities, pagination)
+    expected = ActividadListResponse(
+        data=[ActividadListItem(**activity_serializer.list_item_fields(a)) for a in activities],
+        pagination=pagination,
+    )
+
+    assert json.loads(body) == json.loads(expected.model_dump_json())
+    assert json.loads(body)["data"][0]["descripcion_corta"].endswith("...")
+
+
+def test_list_items_are_marked_from_the_favorite_set():
+    """Test is_favorite is set per item without changing the shared fragments."""
+    favorite, other = _activity(), _activity(titulo="Ciclovía")
+    pagination = PaginationMetadata(total=2, page=1, page_size=20, total_pages=1)
+
+    body = json.loads(activity_serializer.render_activity_list(
+        [favorite, other], pagination, favorite_ids={favorite.id}
+    ))
+    assert [item["is_favorite"] for item in body["data"]] == [True, False]
+    assert "is_favorite" not in json.loads(activity_serializer.list_item_fragment(favorite))
+
+    card = json.loads(activity_serializer.render_activity_list(
+        [favorite], pagination, activity_serializer.CARD_FIELDS, {favorite.id}
+    ))["data"][0]
+    assert card["is_favorite"] is True
+    assert "is_favorite" not in activity_serializer.LIST_ITEM_FIELDS
+
+
+def test_fragments_are_reused_until_the_activity_changes():
+    """Test a fragment is cached per version and rebuilt after any change."""
+    activity = _activity()
+
+    first = activity_serializer.list_item_fragment(activity)
+    assert activity_serializer.list_item_fragment(activity) is first
+
+    # View counts change without updated_at
+    activity.popularidad_vistas += Decimal("0.1")
+    viewed = activity_serializer.list_item_fragment(activity)
+    assert viewed is not first
+    assert json.loads(viewed)["popularidad_vistas"] == "1.4"
+
+    activity.titulo = "Taller renovado"
+    activity.updated_at = datetime(2025, 11, 3)
+    assert json.loads(activity_serializer.list_item_fragment(activity))["titulo"] == "Taller renovado"
+
+
+def test_rendered_recommendations_match_the_model():
+    """Test recommendation JSON from fragments decodes to the built RecommendationList."""
+    ranked = [
+        {
+            "activity": _activity(),
+            "score": 87.5,
+            "explanation": RecommendationExplanation(reason="tags", details="2 etiquetas coinciden"),
+            "is_favorite": True,
+        },
+        {
+            "activity": _activity(fecha_fin=datetime(2025, 12, 1, 18, 0)),
+            "score": 12.0,
+            "explanation": RecommendationExplanation(reason="popular", details="Basado en popularidad general"),
+            "is_favorite": False,
+        },
+    ]
+
+    rendered = recommendation_service.render_recommendation_list(ranked, True)
+    built = recommendation_service.build_recommendation_list(ranked, True)
+
+    assert json.loads(rendered) == json.loads(built.model_dump_json())
+    assert json.loads(rendered)["items"][0]["actividad"]["precio"] == 15000.0
+
+
+def test_sparse_fragments_keep_the_full_item_encoding():
+    """Test a fields= subset renders the same values as the full list item."""
+    activity = _activity()
+    fields = activity_serializer.parse_fields("card")
+
+    sparse = json.loads(activity_serializer.list_item_fragment(activity, fields))
+    full = json.loads(activity_serializer.list_item_fragment(activity))
+
+    assert list(sparse) == list(fields)
+    assert sparse == {field: full[field] for field in fields}
+
+
+def test_parse_fields():
+    """Test fields= parsing: presets, schema order, implicit id and unknown names."""
+    assert activity_serializer.parse_fields(None) is None
+    assert activity_serializer.parse_fields("card") == activity_serializer.CARD_FIELDS
+    assert activity_serializer.parse_fields("precio, titulo") == ("id", "titulo", "precio")
+    with pytest.raises(ValueError):
+        activity_serializer.parse_fields("titulo,descripcion")
+
+
+def test_descripcion_corta_prefers_the_sql_preview():
+    """Test the projected preview (one character past the cut) still gets an ellipsis."""
+    activity = _activity(descripcion_preview="x" * (activity_serializer.DESCRIPCION_CORTA_LENGTH + 1))
+    assert activity_serializer.descripcion_corta(activity) == "x" * activity_serializer.DESCRIPCION_CORTA_LENGTH + "..."
+
+    activity = _activity(descripcion_preview="Corta")
+    assert activity_serializer.descripcion_corta(activity) == "Corta"
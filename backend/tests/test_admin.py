@@ -0,0 +1,118 @@
+"""
+Tests for admin dashboard metrics.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.models.etl_execution import ETLStatus
+from app.services.admin_service import AdminService
+
+
+def _row(**kwargs):
+    return SimpleNamespace(**kwargs)
+
+
+def test_build_metrics_from_rollup_rows():
+    """Test (dimension, value, count) rows are split into total and per-dimension counts."""
+    counts = _row(
+        total_users=10,
+        active_users=7,
+        admin_users=1,
+        total_favorites=25,
+        total_executions=4,
+        success_executions=3,
+    )
+    breakdown = [
+        _row(dimension="estado", value="activa", count=5),
+        _row(dimension="estado", value="pendiente_validacion", count=2),
+        _row(dimension="localidad", value="Chapinero", count=4),
+        _row(dimension="localidad", value="Santa Fe", count=3),
+        _row(dimension="tipo", value="cultura", count=7),
+        _row(dimension="total", value="", count=7),
+    ]
+    activity_id = uuid4()
+    top_activities = [
+        _row(id=activity_id, titulo="Taller", popularidad_favoritos=9, popularidad_vistas=Decimal("1.5")),
+    ]
+    started_at = datetime(2025, 11, 20, 10, 0, 0)
+    last_executions = [
+        _row(
+            id=1,
+            status=ETLStatus.SUCCESS,
+            source="csv_upload",
+            started_at=started_at,
+            finished_at=None,
+            records_loaded=10,
+            records_failed=0,
+        ),
+    ]
+    
+    metrics = AdminService._build_metrics(counts, breakdown, top_activities, last_executions)
+    
+    assert metrics["users"] == {"total": 10, "active": 7, "admins": 1}
+    assert metrics["activities"] == {
+        "total": 7,
+        "by_state": {"activa": 5, "pendiente_validacion": 2},
+        "by_locality": {"Chapinero": 4, "Santa Fe": 3},
+        "by_type": {"cultura": 7},
+    }
+    assert metrics["engagement"]["total_favorites"] == 25
+    assert metrics["engagement"]["top_activities"] == [
+        {"id": str(activity_id), "titulo": "Taller", "total_favoritos": 9, "total_vistas": 1.5},
+    ]
+    assert metrics["etl"]["success_rate"] == 75.0
+    assert metrics["etl"]["last_executions"][0]["started_at"] == started_at.isoformat()
+    assert metrics["etl"]["last_executions"][0]["finished_at"] is None
+
+
+def test_build_metrics_empty_database():
+    """Test an empty database yields zeroed metrics without dividing by zero."""
+    counts = _row(
+        total_users=0,
+        active_users=0,
+        admin_users=0,
+        total_favorites=0,
+        total_executions=0,
+        success_executions=0,
+    )
+    breakdown = [_row(dimension="total", value="", count=0)]
+    
+    metrics = AdminService._build_metrics(counts, breakdown, [], [])
+    
+    assert metrics["activities"]["total"] == 0
+    assert metrics["activities"]["by_state"] == {}
+    assert metrics["etl"]["success_rate"] == 0
+    assert metrics["etl"]["last_executions"] == []
+    assert metrics["engagement"]["favorites_per_day"] == []
+    assert metrics["rollups_refreshed_at"] is None
+
+
+def test_build_metrics_adds_pending_favorite_deltas():
+    """Test favorite deltas recorded since the last rollup refresh are added."""
+    refreshed_at = datetime(2025, 11, 22, 10, 0, 0)
+    counts = _row(
+        total_users=1,
+        active_users=1,
+        admin_users=0,
+        total_favorites=10,
+        total_executions=0,
+        success_executions=0,
+        refreshed_at=refreshed_at,
+    )
+    favorites_per_day = [
+        _row(day=date(2025, 11, 21), count=6),
+        _row(day=date(2025, 11, 22), count=4),
+    ]
+    deltas = {"total": 2, "2025-11-22": 1, "2025-11-23": 1}
+    
+    metrics = AdminService._build_metrics(counts, [], [], [], favorites_per_day, deltas)
+    
+    assert metrics["engagement"]["total_favorites"] == 12
+    assert metrics["engagement"]["favorites_per_day"] == [
+        {"date": "2025-11-21", "count": 6},
+        {"date": "2025-11-22", "count": 5},
+        {"date": "2025-11-23", "count": 1},
+    ]
+    assert metrics["rollups_refreshed_at"] == refreshed_at.isoformat()
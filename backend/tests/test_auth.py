@@ -201,3 +201,134 @@ async def test_oauth2_password_flow(client: AsyncClient, sample_user_data):
     data = response.json()
     assert "access_token" in data
     assert "refresh_token" in data
+
+
+@pytest.mark.asyncio
+async def test_password_hash_pool_roundtrip():
+    """Test hashing and verification run on the worker pool."""
+    from app.core.security import (
+        get_password_hash_async,
+        verify_password_async,
+        password_hash_pool,
+    )
+    
+    completed_before = password_hash_pool.completed
+    hashed = await get_password_hash_async("Test1234")
+    
+    assert await verify_password_async("Test1234", hashed) is True
+    assert await verify_password_async("Wrong1234", hashed) is False
+    assert password_hash_pool.completed == completed_before + 3
+    assert password_hash_pool.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_password_hash_pool_rejects_when_queue_full():
+    """Test the pool sheds load with 503 once its queue is full."""
+    import asyncio
+    import threading
+    from fastapi import HTTPException
+    from app.core.security import PasswordHashPool
+    
+    pool = PasswordHashPool(max_workers=1, max_queue=1)
+    release = threading.Event()
+    
+    try:
+        running = asyncio.create_task(pool.run(release.wait))
+        queued = asyncio.create_task(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        
+        with pytest.raises(HTTPException) as exc_info:
+            await pool.run(release.wait)
+        
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.headers["Retry-After"] == "1"
+        assert pool.stats()["rejected"] == 1
+        
+        release.set()
+        await asyncio.gather(running, queued)
+        assert pool.stats()["completed"] == 2
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_stored_as_digest(client: AsyncClient, db_session, sample_user_data):
+    """Test only a fixed-width digest of the refresh token is stored."""
+    from sqlalchemy import select
+    from app.core.security import hash_refresh_token
+    from app.models.user import RefreshToken
+    
+    await client.post("/api/v1/auth/register", json=sample_user_data)
+    login_response = await client.post("/api/v1/auth/login", json={
+        "email": sample_user_data["email"],
+        "password": sample_user_data["password"]
+    })
+    refresh_token = login_response.json()["refresh_token"]
+    
+    stored = (await db_session.execute(select(RefreshToken.token_hash))).scalars().all()
+    assert stored == [hash_refresh_token(refresh_token)]
+    assert len(stored[0]) == 64
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_cannot_be_reused(client: AsyncClient, sample_user_data):
+    """Test a rotated refresh token is rejected, and garbage tokens too."""
+    await client.post("/api/v1/auth/register", json=sample_user_data)
+    login_response = await client.post("/api/v1/auth/login", json={
+        "email": sample_user_data["email"],
+        "password": sample_user_data["password"]
+    })
+    tokens = login_response.json()
+    
+    first = await client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    reused = await client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    access_as_refresh = await client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["access_token"]})
+    garbage = await client.post("/api/v1/auth/refresh", json={"refresh_token": "not-a-jwt"})
+    
+    assert first.status_code == 200
+    assert reused.status_code == 401
+    assert access_as_refresh.status_code == 401
+    assert garbage.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_purge_refresh_tokens_job(db_session, monkeypatch):
+    """Test the purge job deletes expired and revoked tokens in batches."""
+    from datetime import datetime, timedelta
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import sessionmaker
+    from app.core.security import hash_refresh_token
+    from app.models.user import RefreshToken, Usuario
+    from app.services import refresh_token_store
+    
+    user = Usuario(email="purge@example.com", hashed_password="x")
+    db_session.add(user)
+    await db_session.flush()
+    now = datetime.utcnow()
+    rows = {
+        "live": (now + timedelta(days=1), False),
+        "expired-1": (now - timedelta(days=1), False),
+        "expired-2": (now - timedelta(days=2), False),
+        "revoked": (now + timedelta(days=1), True),
+    }
+    for token, (expires_at, revoked) in rows.items():
+        db_session.add(RefreshToken(
+            usuario_id=user.id,
+            token_hash=hash_refresh_token(token),
+            expires_at=expires_at,
+            revoked=revoked
+        ))
+    await db_session.commit()
+    
+    monkeypatch.setattr(
+        refresh_token_store,
+        "async_session_maker",
+        sessionmaker(db_session.bind, class_=AsyncSession, expire_on_commit=False)
+    )
+    monkeypatch.setattr(refresh_token_store.settings, "REFRESH_TOKEN_PURGE_BATCH_SIZE", 2)
+    await refresh_token_store.purge_refresh_tokens_job()
+    
+    remaining = (await db_session.execute(select(RefreshToken.token_hash))).scalars().all()
+    assert remaining == [hash_refresh_token("live")]
@@ -0,0 +1,175 @@
+"""
+Tests for the stampede-protected cache helpers.
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.utils.cache import CacheEntry, LocalLRUCache, StampedeProtectedCache
+
+
+def test_cache_entry_round_trip():
+    """Test entries survive serialization and legacy values are ignored."""
+    entry = CacheEntry(value='{"items": []}', delta=0.25, expires_at=1000.0)
+    
+    assert CacheEntry.loads(entry.dumps()) == entry
+    assert CacheEntry.loads('{"items": []}') is None
+    assert CacheEntry.loads("not json") is None
+
+
+def test_xfetch_refreshes_expired_entries():
+    """Test expired entries are always refreshed."""
+    entry = CacheEntry(value="v", delta=0.0, expires_at=100.0)
+    
+    assert entry.should_refresh(now=100.0, beta=1.0, rand=1.0)
+    assert entry.should_refresh(now=150.0, beta=0.0)
+
+
+def test_xfetch_early_refresh_probability():
+    """Test early refresh depends on time to expiry, compute time and the random draw."""
+    entry = CacheEntry(value="v", delta=1.0, expires_at=100.0)
+    
+    # Far from expiry: only an extremely unlucky draw refreshes
+    assert not entry.should_refresh(now=50.0, beta=1.0, rand=0.5)
+    # -ln(0.5) ~= 0.69s of lookahead: refresh 0.5s before expiry but not 1s before
+    assert entry.should_refresh(now=99.5, beta=1.0, rand=0.5)
+    assert not entry.should_refresh(now=99.0, beta=1.0, rand=0.5)
+    # A larger beta looks further ahead
+    assert entry.should_refresh(now=99.0, beta=2.0, rand=0.5)
+    # beta=0 disables early refresh
+    assert not entry.should_refresh(now=99.9, beta=0.0, rand=0.01)
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_one_computation():
+    """Test concurrent misses for the same key compute once."""
+    cache = StampedeProtectedCache()
+    calls = 0
+    
+    async def fill():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "value"
+    
+    results = await asyncio.gather(*(cache._single_flight("k", fill) for _ in range(10)))
+    
+    assert results == ["value"] * 10
+    assert calls == 1
+    assert cache._inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_single_flight_survives_a_cancelled_leader():
+    """Test waiters recompute instead of failing when the first caller is cancelled."""
+    cache = StampedeProtectedCache()
+    calls = 0
+    
+    async def fill():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "value"
+    
+    leader = asyncio.create_task(cache._single_flight("k", fill))
+    await asyncio.sleep(0)
+    waiters = [asyncio.create_task(cache._single_flight("k", fill)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    leader.cancel()
+    
+    assert await asyncio.gather(*waiters) == ["value"] * 3
+    assert leader.cancelled()
+    assert calls == 2
+    assert cache._inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_single_flight_propagates_errors():
+    """Test waiters see the error and the key can be retried afterwards."""
+    cache = StampedeProtectedCache()
+    
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("database down")
+    
+    results = await asyncio.gather(
+        *(cache._single_flight("k", failing) for _ in range(3)),
+        return_exceptions=True
+    )
+    
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache._inflight == {}
+
+
+def test_local_lru_evicts_least_recently_used():
+    """Test the L1 stays within its size bound, evicting the coldest key."""
+    cache = LocalLRUCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the coldest
+    
+    cache.set("c", 3)
+    
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_local_lru_expires_entries():
+    """Test L1 entries are dropped after their TTL."""
+    cache = LocalLRUCache(max_entries=10, ttl=60)
+    cache.set("short", "v", ttl=0.01)
+    cache.set("long", "v")
+    
+    time.sleep(0.02)
+    
+    assert cache.get("short") is None
+    assert cache.get("long") == "v"
+
+
+def test_local_lru_delete_by_key_and_prefix():
+    """Test invalidation by exact key and by key prefix."""
+    cache = LocalLRUCache(max_entries=10, ttl=60)
+    for key in ("recommendations:user:1:10", "recommendations:user:1:20",
+                "recommendations:user:12:10", "admin:dashboard:metrics"):
+        cache.set(key, "v")
+    
+    deleted = cache.delete(keys=["admin:dashboard:metrics"], prefixes=["recommendations:user:1:"])
+    
+    assert deleted == 3
+    assert cache.get("recommendations:user:12:10") == "v"
+    assert cache.get("recommendations:user:1:10") is None
+
+
+def test_shared_redis_pool_is_bounded():
+    """Test every caller gets the same client on one bounded pool."""
+    from app.core.config import settings
+    from app.utils.redis_client import get_redis, pool_stats
+    
+    redis = get_redis()
+    
+    assert get_redis() is redis
+    stats = pool_stats()
+    assert stats["initialized"] is True
+    assert stats["max_connections"] == settings.REDIS_MAX_CONNECTIONS
+    assert redis.connection_pool.connection_kwargs["socket_timeout"] == settings.REDIS_SOCKET_TIMEOUT_SECONDS
+
+
+def test_if_none_match_uses_weak_comparison():
+    """Test If-None-Match matching: weak comparison, lists and wildcard."""
+    from starlette.requests import Request
+    from app.utils.http_cache import etag_matches, weak_etag
+    
+    def request(header):
+        headers = [(b"if-none-match", header.encode())] if header is not None else []
+        return Request({"type": "http", "headers": headers})
+    
+    etag = weak_etag("list", 3)
+    assert etag == weak_etag("list", 3) != weak_etag("list", 4)
+    assert etag_matches(request(etag), etag)
+    assert etag_matches(request(f'"other", {etag[2:]}'), etag)
+    assert etag_matches(request("*"), etag)
+    assert not etag_matches(request('W/"other"'), etag)
+    assert not etag_matches(request(None), etag)
@@ -0,0 +1,103 @@
+"""
+Tests for the collaborative filtering trainer, artifacts and score blending.
+"""
+import numpy as np
+import pytest
+
+from app.services import collaborative_filtering
+from app.services.collaborative_filtering import (
+    CollaborativeModel,
+    blend_scores,
+    build_interaction_matrix,
+    train_als,
+    train_svd,
+)
+
+
+def _two_communities():
+    """Users 1-10 favorite activities a0-a4, users 11-20 favorite b0-b4; each user misses one."""
+    pairs = []
+    for usuario_id in range(1, 21):
+        group = "a" if usuario_id <= 10 else "b"
+        for item in range(5):
+            if item != usuario_id % 5:
+                pairs.append((usuario_id, f"{group}{item}"))
+    return pairs
+
+
+def test_build_interaction_matrix_is_binary():
+    """Test duplicate favorites collapse into a single 1 per user and activity."""
+    matrix, user_ids, item_ids = build_interaction_matrix([(1, "x"), (1, "x"), (2, "y")])
+
+    assert matrix.shape == (2, 2)
+    assert matrix.nnz == 2
+    assert set(matrix.data) == {1.0}
+    assert list(user_ids) == [1, 2]
+    assert item_ids == ["x", "y"]
+
+
+@pytest.mark.parametrize("train", [
+    lambda matrix: train_als(matrix, factors=4, iterations=10),
+    lambda matrix: train_svd(matrix, factors=2),
+])
+def test_trainers_recommend_within_community(train):
+    """Test ALS and SVD rank a user's community above the other one."""
+    matrix, user_ids, item_ids = build_interaction_matrix(_two_communities())
+    user_factors, item_factors = train(matrix)
+    model = CollaborativeModel("test", user_ids, item_ids, user_factors, item_factors)
+
+    # User 1 has not favorited a1: it must outrank every activity of the other community
+    scores, known = model.scores_for([1], item_ids)
+    by_item = dict(zip(item_ids, scores[0]))
+    assert known.all()
+    assert by_item["a1"] > max(by_item[f"b{item}"] for item in range(5))
+    assert all(item_id.startswith("a") for item_id, _ in model.top_k(1, 5))
+
+
+def test_scores_for_unknown_user_and_activity():
+    """Test users and activities missing from the model score 0."""
+    model = CollaborativeModel(
+        "test",
+        np.array([1]),
+        ["x"],
+        np.ones((1, 2), dtype=np.float32),
+        np.ones((1, 2), dtype=np.float32),
+    )
+
+    scores, known = model.scores_for([1, 99], ["x", "unknown"])
+
+    assert known.tolist() == [True, False]
+    assert scores.tolist() == [[2.0, 0.0], [0.0, 0.0]]
+    assert model.top_k(99, 3) == []
+
+
+def test_blend_keeps_unknown_users_and_non_top_k():
+    """Test only known users' top-K candidates get a CF component."""
+    hybrid = np.array([[10.0, 20.0, 30.0], [10.0, 20.0, 30.0]])
+    cf = np.array([[4.0, 2.0, 1.0], [0.0, 0.0, 0.0]])
+
+    blended, component = blend_scores(hybrid, cf, np.array([True, False]), weight=0.5, top_k=2)
+
+    assert component[0].tolist() == [1.0, 0.5, 0.0]
+    assert blended[0].tolist() == [55.0, 35.0, 15.0]
+    assert blended[1].tolist() == hybrid[1].tolist()
+
+
+@pytest.mark.asyncio
+async def test_save_load_and_latest_pointer(tmp_path, monkeypatch):
+    """Test the served model follows the LATEST pointer of saved artifacts."""
+    matrix, user_ids, item_ids = build_interaction_matrix(_two_communities())
+    user_factors, item_factors = train_svd(matrix, factors=2)
+    model = CollaborativeModel("20250101000000", user_ids, item_ids, user_factors, item_factors, {"method": "svd"})
+    model.save(tmp_path)
+
+    monkeypatch.setattr(collaborative_filtering.settings, "CF_ENABLED", True)
+    monkeypatch.setattr(collaborative_filtering.settings, "CF_MODEL_DIR", str(tmp_path))
+    monkeypatch.setattr(collaborative_filtering, "_model", None)
+    monkeypatch.setattr(collaborative_filtering, "_checked_at", 0.0)
+    loaded = await collaborative_filtering.get_model()
+
+    assert loaded.version == "20250101000000"
+    assert loaded.metadata == {"method": "svd"}
+    assert loaded.item_ids == item_ids
+    np.testing.assert_array_equal(loaded.user_factors, user_factors)
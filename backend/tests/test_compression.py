@@ -0,0 +1,105 @@
+"""
+Tests for the gzip/brotli response compression middleware.
+"""
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from httpx import AsyncClient
+
+from app.middleware.compression import CompressionMiddleware, choose_encoding
+
+BODY = b'{"data":[' + b",".join(b'{"titulo":"Taller de Arte Urbano"}' for _ in range(100)) + b"]}"
+
+
+def _app(**options):
+    app = FastAPI()
+
+    @app.get("/api/v1/actividades")
+    async def public_list():
+        return Response(
+            content=BODY,
+            media_type="application/json",
+            headers={"Cache-Control": "public, max-age=15", "ETag": '"abc"'},
+        )
+
+    @app.get("/api/v1/auth/login")
+    async def login():
+        return Response(content=BODY, media_type="application/json")
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        return StreamingResponse(iter([BODY, BODY]), media_type="application/json")
+
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=500,
+        excluded_paths=["/api/v1/auth"],
+        **options,
+    )
+    return app
+
+
+def test_choose_encoding_honours_quality_values():
+    assert choose_encoding("gzip, deflate, br", ["br", "gzip"]) == "br"
+    assert choose_encoding("gzip;q=1.0, br;q=0.5", ["br", "gzip"]) == "gzip"
+    assert choose_encoding("br;q=0, *;q=0.1", ["br", "gzip"]) == "gzip"
+    assert choose_encoding("identity", ["br", "gzip"]) is None
+    assert choose_encoding("", ["br", "gzip"]) is None
+
+
+@pytest.mark.asyncio
+async def test_large_responses_are_compressed_with_preferred_encoding():
+    async with AsyncClient(app=_app(), base_url="http://test") as client:
+        br = await client.get("/api/v1/actividades", headers={"Accept-Encoding": "gzip, br"})
+        gz = await client.get("/api/v1/actividades", headers={"Accept-Encoding": "gzip"})
+        plain = await client.get("/api/v1/actividades", headers={"Accept-Encoding": "identity"})
+
+    assert br.headers["content-encoding"] == "br"
+    assert br.headers["etag"] == 'W/"abc"'
+    assert "Accept-Encoding" in br.headers["vary"]
+    assert int(br.headers["content-length"]) < len(BODY)
+    assert br.content == BODY  # httpx decodes transparently
+
+    assert gz.headers["content-encoding"] == "gzip"
+    assert gz.content == BODY
+
+    assert "content-encoding" not in plain.headers
+    assert plain.content == BODY
+
+
+@pytest.mark.asyncio
+async def test_small_excluded_and_streaming_responses_are_left_alone():
+    headers = {"Accept-Encoding": "br, gzip"}
+    async with AsyncClient(app=_app(), base_url="http://test") as client:
+        small = await client.get("/small", headers=headers)
+        login = await client.get("/api/v1/auth/login", headers=headers)
+        stream = await client.get("/stream", headers=headers)
+
+    assert "content-encoding" not in small.headers
+    assert small.headers["vary"] == "Accept-Encoding"
+    assert "content-encoding" not in login.headers
+    assert "vary" not in login.headers
+    assert login.content == BODY
+    assert "content-encoding" not in stream.headers
+    assert stream.content == BODY + BODY
+
+
+@pytest.mark.asyncio
+async def test_public_responses_are_compressed_once():
+    app = _app(cache_entries=8)
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        for _ in range(3):
+            response = await client.get("/api/v1/actividades", headers={"Accept-Encoding": "br"})
+            assert response.headers["content-encoding"] == "br"
+            assert response.content == BODY
+
+    middleware = app.middleware_stack
+    while not isinstance(middleware, CompressionMiddleware):
+        middleware = middleware.app
+    stats = middleware.cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 2
@@ -4,10 +4,20 @@ Tests for favorites functionality.
 import pytest
 from uuid import UUID
 from httpx import AsyncClient
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.activity import Actividad
+from app.models.activity import Actividad, ActividadFavoritoDelta
 from app.models.favorite import Favorito
+from app.core.security import decode_token
+from app.services.favorite_counters import FOLD_FAVORITE_DELTAS
+from app.services.favorite_set import (
+    add_favorite_ids,
+    favorite_set_key,
+    favorite_version_key,
+    load_favorite_ids,
+)
+from app.utils.redis_client import get_redis
 
 
 class TestFavoritesAPI:
@@ -134,6 +144,34 @@ class TestFavoritesAPI:
         assert "actividad" in favorite
         assert favorite["actividad"]["id"] == str(test_activity.id)
     
+    @pytest.mark.asyncio
+    async def test_list_favorites_card_fields(
+        self,
+        async_client: AsyncClient,
+        test_user_tokens: dict,
+        test_activity: Actividad,
+    ):
+        """Test favorites can return only the activity card fields."""
+        headers = {"Authorization": f"Bearer {test_user_tokens['access_token']}"}
+        
+        await async_client.post(
+            "/api/v1/favoritos",
+            json={"actividad_id": str(test_activity.id)},
+            headers=headers
+        )
+        
+        response = await async_client.get(
+            "/api/v1/favoritos",
+            params={"fields": "card"},
+            headers=headers
+        )
+        
+        assert response.status_code == 200
+        actividad = response.json()["items"][0]["actividad"]
+        assert actividad["id"] == str(test_activity.id)
+        assert "descripcion" not in actividad
+        assert "titulo" in actividad
+    
     @pytest.mark.asyncio
     async def test_list_favorites_with_filters(
         self,
@@ -171,6 +209,92 @@ class TestFavoritesAPI:
         data = response.json()
         assert data["total"] == 0
     
+    @pytest.mark.asyncio
+    async def test_favorites_batch(
+        self,
+        async_client: AsyncClient,
+        test_user_tokens: dict,
+        test_activity: Actividad,
+    ):
+        """Test batch add, check and remove with counters applied once per activity."""
+        headers = {"Authorization": f"Bearer {test_user_tokens['access_token']}"}
+        activity_id = str(test_activity.id)
+        missing_id = "00000000-0000-0000-0000-000000000000"
+        
+        response = await async_client.post(
+            "/api/v1/favoritos/batch",
+            json={"actividad_ids": [activity_id, missing_id, activity_id]},
+            headers=headers
+        )
+        assert response.status_code == 200
+        assert response.json() == {"changed": [activity_id], "unchanged": [missing_id]}
+        
+        # Already a favorite: nothing changes
+        response = await async_client.post(
+            "/api/v1/favoritos/batch",
+            json={"actividad_ids": [activity_id]},
+            headers=headers
+        )
+        assert response.json() == {"changed": [], "unchanged": [activity_id]}
+        
+        detail = await async_client.get(f"/api/v1/actividades/{activity_id}")
+        assert detail.json()["popularidad_favoritos"] == 1
+        
+        response = await async_client.post(
+            "/api/v1/favoritos/batch/check",
+            json={"actividad_ids": [activity_id, missing_id]},
+            headers=headers
+        )
+        assert response.json() == {"is_favorite": {activity_id: True, missing_id: False}}
+        
+        response = await async_client.post(
+            "/api/v1/favoritos/batch/remove",
+            json={"actividad_ids": [activity_id, missing_id]},
+            headers=headers
+        )
+        assert response.json() == {"changed": [activity_id], "unchanged": [missing_id]}
+        
+        detail = await async_client.get(f"/api/v1/actividades/{activity_id}")
+        assert detail.json()["popularidad_favoritos"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_favorite_counts_are_deferred_and_folded(
+        self,
+        async_client: AsyncClient,
+        test_user_tokens: dict,
+        test_activity: Actividad,
+        test_db: AsyncSession,
+    ):
+        """Test counts read base plus pending deltas, and folding keeps them unchanged."""
+        headers = {"Authorization": f"Bearer {test_user_tokens['access_token']}"}
+        
+        await async_client.post(
+            "/api/v1/favoritos",
+            json={"actividad_id": str(test_activity.id)},
+            headers=headers
+        )
+        
+        base = await test_db.scalar(
+            select(Actividad.popularidad_favoritos_base).where(Actividad.id == test_activity.id)
+        )
+        pending = await test_db.scalar(select(func.count()).select_from(ActividadFavoritoDelta))
+        assert (base, pending) == (0, 1)
+        
+        detail = await async_client.get(f"/api/v1/actividades/{test_activity.id}")
+        assert detail.json()["popularidad_favoritos"] == 1
+        
+        folded = await test_db.scalar(FOLD_FAVORITE_DELTAS, {"batch_size": 100})
+        await test_db.commit()
+        test_db.expire_all()
+        
+        assert folded == 1
+        base = await test_db.scalar(
+            select(Actividad.popularidad_favoritos_base).where(Actividad.id == test_activity.id)
+        )
+        assert base == 1
+        detail = await async_client.get(f"/api/v1/actividades/{test_activity.id}")
+        assert detail.json()["popularidad_favoritos"] == 1
+    
     @pytest.mark.asyncio
     async def test_remove_favorite(
         self,
@@ -262,6 +386,113 @@ class TestFavoritesAPI:
         assert data["is_favorite"] is True
         assert data["favorito_id"] is not None
     
+    @pytest.mark.asyncio
+    async def test_activity_responses_carry_is_favorite(
+        self,
+        async_client: AsyncClient,
+        test_user_tokens: dict,
+        test_activity: Actividad,
+    ):
+        """Test list and detail responses mark the user's favorites."""
+        headers = {"Authorization": f"Bearer {test_user_tokens['access_token']}"}
+        
+        async def flags():
+            listing = await async_client.get("/api/v1/actividades", headers=headers)
+            detail = await async_client.get(f"/api/v1/actividades/{test_activity.id}", headers=headers)
+            items = {item["id"]: item["is_favorite"] for item in listing.json()["data"]}
+            return items[str(test_activity.id)], detail.json()["is_favorite"], listing
+        
+        assert (await flags())[:2] == (False, False)
+        
+        await async_client.post(
+            "/api/v1/favoritos",
+            json={"actividad_id": str(test_activity.id)},
+            headers=headers
+        )
+        in_list, in_detail, listing = await flags()
+        assert (in_list, in_detail) == (True, True)
+        assert listing.headers["cache-control"].startswith("private")
+        
+        await async_client.delete(f"/api/v1/favoritos/{test_activity.id}", headers=headers)
+        assert (await flags())[:2] == (False, False)
+        
+        # Anonymous responses stay shareable and never mark favorites
+        anonymous = await async_client.get(f"/api/v1/actividades/{test_activity.id}")
+        assert anonymous.json()["is_favorite"] is False
+        assert anonymous.headers["cache-control"].startswith("public")
+    
+    @pytest.mark.asyncio
+    async def test_favorite_changes_the_users_list_etag_only(
+        self,
+        async_client: AsyncClient,
+        test_user_tokens: dict,
+        test_activity: Actividad,
+    ):
+        """Test a favorite write revalidates the user's listings without bumping the generation."""
+        from app.services.activity_service import ActivityService
+        headers = {"Authorization": f"Bearer {test_user_tokens['access_token']}"}
+        generation = await ActivityService.get_list_generation()
+        anonymous_etag = (await async_client.get("/api/v1/actividades")).headers["etag"]
+        etag = (await async_client.get("/api/v1/actividades", headers=headers)).headers["etag"]
+        
+        await async_client.post(
+            "/api/v1/favoritos",
+            json={"actividad_id": str(test_activity.id)},
+            headers=headers
+        )
+        
+        assert await ActivityService.get_list_generation() == generation
+        listing = await async_client.get("/api/v1/actividades", headers={**headers, "If-None-Match": etag})
+        assert listing.status_code == 200
+        assert any(item["is_favorite"] for item in listing.json()["data"])
+        anonymous = await async_client.get("/api/v1/actividades", headers={"If-None-Match": anonymous_etag})
+        assert anonymous.status_code == 304
+    
+    @pytest.mark.asyncio
+    async def test_favorite_set_fill_does_not_overwrite_a_concurrent_write(
+        self,
+        test_db: AsyncSession,
+        test_user_tokens: dict,
+        test_activity: Actividad,
+    ):
+        """Test a favorite committed during a cache fill is not lost by the fill."""
+        usuario_id = int(decode_token(test_user_tokens["access_token"])["sub"])
+        await get_redis().delete(favorite_set_key(usuario_id), favorite_version_key(usuario_id))
+        
+        class RacingSession:
+            """Primary session whose read misses a favorite committed right after it."""
+            
+            async def execute(self, statement):
+                result = await test_db.execute(statement)
+                test_db.add(Favorito(usuario_id=usuario_id, actividad_id=test_activity.id))
+                await test_db.commit()
+                await add_favorite_ids(usuario_id, [test_activity.id])
+                return result
+        
+        assert await load_favorite_ids(RacingSession(), usuario_id) == set()
+        # The stale fill was dropped: the next read sees the new favorite
+        assert await load_favorite_ids(test_db, usuario_id) == {test_activity.id}
+        assert await load_favorite_ids(test_db, usuario_id) == {test_activity.id}
+    
+    @pytest.mark.asyncio
+    async def test_favorite_set_read_without_fill(
+        self,
+        test_db: AsyncSession,
+        test_user_tokens: dict,
+        test_activity: Actividad,
+    ):
+        """Test fill=False (replica reads) returns the ids without caching them."""
+        usuario_id = int(decode_token(test_user_tokens["access_token"])["sub"])
+        test_db.add(Favorito(usuario_id=usuario_id, actividad_id=test_activity.id))
+        await test_db.commit()
+        await get_redis().delete(favorite_set_key(usuario_id), favorite_version_key(usuario_id))
+        
+        assert await load_favorite_ids(test_db, usuario_id, fill=False) == {test_activity.id}
+        assert not await get_redis().exists(favorite_set_key(usuario_id))
+        
+        assert await load_favorite_ids(test_db, usuario_id) == {test_activity.id}
+        assert await get_redis().exists(favorite_set_key(usuario_id))
+    
     @pytest.mark.asyncio
     async def test_get_favorite_count(
         self,
@@ -309,8 +540,8 @@ class TestFavoritesAPI:
         """Test that adding/removing favorite updates activity counter."""
         headers = {"Authorization": f"Bearer {test_user_tokens['access_token']}"}
         
-        # Get initial count
-        await test_db.refresh(test_activity)
+        # Get initial count (deferred: loaded by name)
+        await test_db.refresh(test_activity, ["popularidad_favoritos"])
         initial_count = test_activity.popularidad_favoritos
         
         # Add favorite
@@ -321,7 +552,7 @@ class TestFavoritesAPI:
         )
         
         # Check count increased
-        await test_db.refresh(test_activity)
+        await test_db.refresh(test_activity, ["popularidad_favoritos"])
         assert test_activity.popularidad_favoritos == initial_count + 1
         
         # Remove favorite
@@ -331,5 +562,5 @@ class TestFavoritesAPI:
         )
         
         # Check count decreased
-        await test_db.refresh(test_activity)
+        await test_db.refresh(test_activity, ["popularidad_favoritos"])
         assert test_activity.popularidad_favoritos == initial_count
@@ -0,0 +1,104 @@
+"""
+Tests for scheduler leader election on a Postgres advisory lock.
+"""
+import pytest
+
+from app.db.leader import LeaderElection
+
+
+class FakeServer:
+    """Session advisory locks as Postgres keeps them: one holder per id."""
+
+    def __init__(self):
+        self.holders = {}
+
+
+class FakeConnection:
+    def __init__(self, server):
+        self.server = server
+        self.closed = False
+        self.broken = False
+
+    async def execution_options(self, **options):
+        return self
+
+    async def execute(self, statement, params=None):
+        if self.broken:
+            raise ConnectionError("server closed the connection")
+        sql = str(statement)
+        value = None
+        if "pg_try_advisory_lock" in sql:
+            holder = self.server.holders.setdefault(params["lock_id"], self)
+            value = holder is self
+        elif "pg_advisory_unlock" in sql:
+            value = self.server.holders.pop(params["lock_id"], None) is self
+        return FakeResult(value)
+
+    async def close(self):
+        self.closed = True
+        # Session locks die with the connection
+        for lock_id, holder in list(self.server.holders.items()):
+            if holder is self:
+                del self.server.holders[lock_id]
+
+
+class FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+
+class FakeEngine:
+    def __init__(self, server):
+        self.server = server
+        self.connections = []
+
+    async def connect(self):
+        connection = FakeConnection(self.server)
+        self.connections.append(connection)
+        return connection
+
+
+def _election(server, events, name):
+    return LeaderElection(
+        FakeEngine(server),
+        lock_id=42,
+        on_elected=lambda: events.append(f"{name} elected"),
+        on_demoted=lambda: events.append(f"{name} demoted"),
+    )
+
+
+@pytest.mark.asyncio
+async def test_only_one_process_leads_and_another_takes_over_on_stop():
+    server, events = FakeServer(), []
+    first = _election(server, events, "first")
+    second = _election(server, events, "second")
+
+    await first.poll()
+    await second.poll()
+    await first.poll()
+
+    assert first.is_leader and not second.is_leader
+    assert second.engine.connections[0].closed  # losers do not hold a connection
+
+    await first.stop()
+    await second.poll()
+
+    assert not first.is_leader and second.is_leader
+    assert events == ["first elected", "first demoted", "second elected"]
+
+
+@pytest.mark.asyncio
+async def test_leadership_is_dropped_when_the_lock_connection_fails():
+    server, events = FakeServer(), []
+    election = _election(server, events, "leader")
+
+    await election.poll()
+    election.engine.connections[0].broken = True
+    await election.poll()
+
+    assert not election.is_leader
+    assert events == ["leader elected", "leader demoted"]
+    assert server.holders == {}
@@ -0,0 +1,81 @@
+"""
+Tests for Prometheus metrics: request middleware, DB query timing and cache counters.
+"""
+from types import SimpleNamespace
+
+import pytest
+from httpx import AsyncClient
+from prometheus_client import REGISTRY
+from redis.asyncio import Redis
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.main import app
+from app.utils import metrics
+from app.utils.cache import local_cache, two_tier_cached
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_requests_are_counted_by_route_template():
+    before = _sample("http_requests_total", method="GET", route="/health", status="200")
+    unmatched_before = _sample("http_requests_total", method="GET", route="unmatched", status="404")
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        await client.get("/health")
+        await client.get("/no-such-route")
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert "http_request_duration_seconds_bucket" in response.text
+    assert _sample("http_requests_total", method="GET", route="/health", status="200") == before + 1
+    assert _sample("http_requests_total", method="GET", route="unmatched", status="404") == unmatched_before + 1
+    assert _sample("http_requests_in_flight", method="GET") == 0
+
+
+def test_queries_are_attributed_to_the_current_request():
+    engine = create_engine("sqlite://")
+    metrics.instrument_engine(SimpleNamespace(sync_engine=engine))
+    metrics.instrument_engine(SimpleNamespace(sync_engine=engine))  # idempotent
+
+    stats, token = metrics.start_request({"route": SimpleNamespace(path="/test/{id}")})
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+    finally:
+        metrics.finish_request(token)
+
+    assert stats.queries == 2
+    assert stats.query_seconds > 0
+    assert _sample("db_query_duration_seconds_count", route="/test/{id}") == 2
+
+    background_before = _sample("db_query_duration_seconds_count", route="background")
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert _sample("db_query_duration_seconds_count", route="background") == background_before + 1
+
+
+@pytest.mark.asyncio
+async def test_cache_hits_and_misses_are_counted(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_LOCAL_ENABLED", True)
+    local_cache.clear()
+    # Unreachable Redis: every Redis lookup degrades to computing
+    redis = Redis(host="localhost", port=1, socket_connect_timeout=0.1)
+
+    async def compute():
+        return "value"
+
+    try:
+        for _ in range(2):
+            await two_tier_cached("metrics:test", compute, str, ttl=60, redis=redis, name="test")
+        await two_tier_cached("metrics:unnamed", compute, str, ttl=60, redis=redis)
+    finally:
+        await redis.aclose()
+        local_cache.clear()
+
+    assert _sample("cache_lookups_total", cache="test", result="miss") == 1
+    assert _sample("cache_lookups_total", cache="test", result="local_hit") == 1
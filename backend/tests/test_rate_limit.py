@@ -0,0 +1,159 @@
+"""
+Tests for rate limiting and admission control helpers.
+"""
+import time
+
+import pytest
+
+from app.middleware.rate_limit import (
+    LIMITERS,
+    LocalPrefilter,
+    SlidingWindowLimiter,
+    TokenBucketLimiter,
+    _parse_rate,
+    rate_limit_ip,
+)
+
+
+@pytest.mark.parametrize("rate,expected", [
+    ("5/15minute", (5, 900)),
+    ("10/minute", (10, 60)),
+    ("100/hour", (100, 3600)),
+    ("3/second", (3, 1)),
+    ("invalid", (5, 900)),
+])
+def test_parse_rate(rate, expected):
+    """Test rate strings are parsed into (max_requests, window_seconds)."""
+    assert _parse_rate(rate) == expected
+
+
+def test_limiter_registry():
+    """Test every algorithm is registered under its name."""
+    assert set(LIMITERS) == {"fixed_window", "sliding_window", "token_bucket"}
+    for name, limiter_cls in LIMITERS.items():
+        assert limiter_cls.name == name
+
+
+def test_token_bucket_refill_rate():
+    """Test token bucket refills max_requests tokens over the window."""
+    limiter = TokenBucketLimiter(max_requests=10, window=60)
+    capacity, refill_per_ms = limiter._args()
+    
+    assert capacity == 10
+    assert float(refill_per_ms) * 60 * 1000 == pytest.approx(10)
+
+
+def test_sliding_window_members_are_unique():
+    """Test each hit adds a distinct member to the sliding-window log."""
+    limiter = SlidingWindowLimiter(max_requests=5, window=60)
+    assert limiter._args()[2] != limiter._args()[2]
+
+
+def test_local_prefilter_blocks_until_expiry():
+    """Test rejected clients are blocked locally until retry_after."""
+    prefilter = LocalPrefilter()
+    
+    assert prefilter.check("rl:login:1.2.3.4") == 0
+    
+    prefilter.block("rl:login:1.2.3.4", 0.05)
+    assert 0 < prefilter.check("rl:login:1.2.3.4") <= 0.05
+    assert prefilter.check("rl:login:5.6.7.8") == 0
+    
+    time.sleep(0.06)
+    assert prefilter.check("rl:login:1.2.3.4") == 0
+
+
+def test_local_prefilter_is_bounded():
+    """Test the prefilter never grows past max_entries."""
+    prefilter = LocalPrefilter(max_entries=10)
+    
+    for i in range(50):
+        prefilter.block(f"rl:login:{i}", 60)
+    
+    assert len(prefilter._blocked_until) <= 10
+    assert prefilter.check("rl:login:49") > 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_disabled_skips_redis():
+    """Test the dependency is a no-op when rate limiting is disabled."""
+    from app.core.config import settings
+    
+    dependency = rate_limit_ip("1/minute", scope="test", algorithm="token_bucket")
+    assert settings.RATE_LIMIT_ENABLED is False
+    assert await dependency(request=None) is None
+
+
+@pytest.mark.asyncio
+async def test_admission_controller_sheds_when_queue_full():
+    """Test requests beyond concurrency + queue get 503 with Retry-After."""
+    import asyncio
+    from fastapi import HTTPException
+    from app.middleware.admission import AdmissionController
+    
+    controller = AdmissionController("test", max_concurrency=1, max_queue=1, queue_timeout=1.0)
+    
+    await controller.acquire()
+    queued = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+    assert controller.waiting == 1
+    
+    with pytest.raises(HTTPException) as exc_info:
+        await controller.acquire()
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers["Retry-After"] == "1"
+    
+    # Releasing the slot admits the queued request
+    controller.release()
+    await queued
+    assert controller.stats() == {
+        "max_concurrency": 1,
+        "max_queue": 1,
+        "active": 1,
+        "waiting": 0,
+        "admitted": 2,
+        "shed": 1,
+    }
+    controller.release()
+
+
+@pytest.mark.asyncio
+async def test_admission_controller_sheds_on_queue_timeout():
+    """Test a queued request is shed when no slot frees up in time."""
+    from fastapi import HTTPException
+    from app.middleware.admission import AdmissionController
+    
+    controller = AdmissionController("test", max_concurrency=1, max_queue=5, queue_timeout=0.05)
+    await controller.acquire()
+    
+    with pytest.raises(HTTPException) as exc_info:
+        await controller.acquire()
+    
+    assert exc_info.value.status_code == 503
+    assert controller.waiting == 0
+    assert controller.shed == 1
+    controller.release()
+
+
+def test_per_user_identity_falls_back_to_ip():
+    """Test per-user quotas key by token subject, else by client IP."""
+    from starlette.requests import Request
+    from app.core.security import create_access_token
+    from app.middleware.rate_limit import _client_identity
+    
+    def make_request(headers):
+        return Request({
+            "type": "http",
+            "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+            "client": ("10.0.0.1", 1234),
+        })
+    
+    token = create_access_token(subject="42")
+    authed = make_request({"Authorization": f"Bearer {token}"})
+    anonymous = make_request({})
+    invalid = make_request({"Authorization": "Bearer not-a-token"})
+    
+    assert _client_identity(authed, per_user=True) == "user:42"
+    assert _client_identity(authed, per_user=False) == "10.0.0.1"
+    assert _client_identity(anonymous, per_user=True) == "10.0.0.1"
+    assert _client_identity(invalid, per_user=True) == "10.0.0.1"
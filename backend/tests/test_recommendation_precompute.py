@@ -0,0 +1,81 @@
+"""
+Tests for batch (vectorized) recommendation scoring.
+"""
+import random
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from app.services.recommendation_precompute_job import ActivityMatrix
+from app.services.recommendation_service import recommendation_service
+
+TAGS = ["arte", "cultura", "gratis", "deporte", "musica", "teatro", "familia"]
+LOCALIDADES = ["Chapinero", "Santa Fe", "La Candelaria"]
+NIVELES = ["bajo", "medio", "alto", None]
+
+
+def _activities(count: int, rng: random.Random):
+    return [
+        SimpleNamespace(
+            id=uuid4(),
+            popularidad_normalizada=Decimal(str(round(rng.random(), 4))),
+            popularidad_favoritos=rng.randint(0, 50),
+            etiquetas=rng.sample(TAGS, rng.randint(0, 4)),
+            localidad=rng.choice(LOCALIDADES),
+            nivel_actividad=rng.choice(NIVELES),
+        )
+        for _ in range(count)
+    ]
+
+
+def _profiles(count: int, rng: random.Random):
+    profiles = [None, SimpleNamespace(etiquetas_interes=[], localidad_preferida=None, nivel_actividad=None)]
+    while len(profiles) < count:
+        profiles.append(SimpleNamespace(
+            etiquetas_interes=rng.sample(TAGS + ["sin_actividades"], rng.randint(0, 4)),
+            localidad_preferida=rng.choice(LOCALIDADES + [None]),
+            nivel_actividad=rng.choice(NIVELES),
+        ))
+    return profiles
+
+
+@pytest.mark.asyncio
+async def test_batch_scores_match_per_activity_scoring():
+    """Test the score matrix equals _calculate_activity_score for every pair."""
+    rng = random.Random(42)
+    activities = _activities(60, rng)
+    profiles = _profiles(25, rng)
+    
+    scores = ActivityMatrix(activities).score(profiles)
+    
+    for row, profile in enumerate(profiles):
+        for col, activity in enumerate(activities):
+            expected, _ = await recommendation_service._calculate_activity_score(activity, profile)
+            assert scores[row, col] == pytest.approx(expected)
+
+
+def test_top_n_orders_best_first():
+    """Test top_n returns the n highest scores per user, best first."""
+    rng = random.Random(7)
+    matrix = ActivityMatrix(_activities(30, rng))
+    scores = matrix.score(_profiles(10, rng))
+    
+    top = matrix.top_n(scores, 5)
+    
+    assert top.shape == (10, 5)
+    for row in range(10):
+        expected = sorted(scores[row], reverse=True)[:5]
+        assert list(scores[row, top[row]]) == pytest.approx(expected)
+
+
+def test_top_n_with_fewer_activities_than_limit():
+    """Test top_n caps n at the number of activities (and handles none)."""
+    rng = random.Random(1)
+    matrix = ActivityMatrix(_activities(3, rng))
+    
+    assert matrix.top_n(matrix.score([None]), 10).shape == (1, 3)
+    
+    empty = ActivityMatrix([])
+    assert empty.top_n(empty.score([None, None]), 10).shape == (2, 0)
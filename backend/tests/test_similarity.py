@@ -0,0 +1,120 @@
+"""
+Tests for the similar-activities TF-IDF vectors and LSH index.
+"""
+import random
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from app.services.similarity_service import ActivitySimilarityIndex, activity_terms, tokenize
+
+WORDS = ["cine", "teatro", "yoga", "parque", "futbol", "torneo", "musica", "danza", "pintura",
+         "caminata", "ciclistas", "museo", "lectura", "festival", "natacion", "picnic"]
+
+
+def _activity(titulo, descripcion, etiquetas=(), tipo="cultura", localidad="Chapinero", nivel=None):
+    return SimpleNamespace(
+        id=uuid4(),
+        titulo=titulo,
+        descripcion=descripcion,
+        etiquetas=list(etiquetas),
+        tipo=tipo,
+        localidad=localidad,
+        nivel_actividad=nivel,
+        estado="activa",
+    )
+
+
+def _catalog(count, rng):
+    return [
+        _activity(
+            " ".join(rng.sample(WORDS, 2)),
+            " ".join(rng.choices(WORDS, k=20)),
+            rng.sample(WORDS, 2),
+            tipo=rng.choice(["cultura", "deporte", "recreacion"]),
+        )
+        for _ in range(count)
+    ]
+
+
+def test_tokenize_strips_accents_and_stopwords():
+    assert tokenize("Concierto de la Sinfónica en el Teatro Colón") == [
+        "concierto", "sinfonica", "teatro", "colon"
+    ]
+    assert tokenize(None) == []
+
+
+def test_activity_terms_include_tags_and_categories():
+    terms = activity_terms(_activity("Yoga", "Yoga al aire libre", ["Bienestar"], "recreacion", "Santa Fe", "bajo"))
+
+    assert terms["yoga"] == 3  # once in descripcion, twice for the title
+    assert terms["tag:bienestar"] == 1
+    assert terms["tipo:recreacion"] == 1
+    assert terms["localidad:santa fe"] == 1
+    assert terms["nivel_actividad:bajo"] == 1
+
+
+def test_similar_ranks_closest_activity_first():
+    source = _activity("Cine al Parque", "Proyección de cine colombiano en el parque", ["cine"])
+    close = _activity("Cine al Parque", "Proyección de cine latinoamericano en el parque", ["cine"])
+    far = _activity("Torneo de Fútbol", "Torneo de fútbol barrial", ["deporte"], tipo="deporte", localidad="Santa Fe")
+    index = ActivitySimilarityIndex([source, close, far], tables=8, bits=4)
+
+    ranked = index.brute_force(source.id, 5)
+
+    assert ranked[0][0] == close.id
+    assert source.id not in [activity_id for activity_id, _ in ranked]
+    assert ranked[0][1] == pytest.approx(max(score for _, score in ranked))
+    assert 0 < ranked[0][1] <= 1 + 1e-6
+
+
+def test_upsert_and_remove_update_the_index():
+    rng = random.Random(3)
+    catalog = _catalog(20, rng)
+    index = ActivitySimilarityIndex(catalog, tables=8, bits=4)
+
+    new = _activity(catalog[0].titulo, catalog[0].descripcion, catalog[0].etiquetas, tipo=catalog[0].tipo)
+    index.upsert(new)
+    assert index.brute_force(catalog[0].id, 1)[0][0] == new.id
+
+    # Unchanged terms are not counted as changes
+    changes = index.changes
+    index.upsert(new)
+    assert index.changes == changes
+
+    index.remove(new.id)
+    assert new.id not in index
+    assert new.id not in [activity_id for activity_id, _ in index.brute_force(catalog[0].id, 20)]
+
+
+def test_index_grows_and_reuses_slots():
+    rng = random.Random(5)
+    index = ActivitySimilarityIndex(_catalog(2, rng), tables=4, bits=4)
+
+    added = _catalog(40, rng)
+    for activity in added:
+        index.upsert(activity)
+    for activity in added[:10]:
+        index.remove(activity.id)
+    for activity in _catalog(10, rng):
+        index.upsert(activity)
+
+    assert len(index) == 42
+    assert len(index.brute_force(added[-1].id, 100)) <= 41
+
+
+def test_lsh_recall_against_brute_force():
+    rng = random.Random(7)
+    catalog = _catalog(500, rng)
+    index = ActivitySimilarityIndex(catalog, tables=16, bits=6)
+
+    hits = total = 0
+    for activity in catalog[:50]:
+        exact = index.brute_force(activity.id, 5)
+        approximate = index.similar(activity.id, 5)
+        cutoff = exact[-1][1]
+        hits += sum(1 for _, score in approximate if score >= cutoff - 1e-6)
+        total += len(exact)
+
+    assert hits / total >= 0.8
@@ -3,6 +3,12 @@ Tests for user profile endpoints.
 """
 import pytest
 from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.security import decode_token
+from app.schemas.user import UsuarioUpdate
+from app.services import principal_cache, user_service
 
 
 async def _create_and_login_user(client: AsyncClient, user_data: dict) -> dict:
@@ -158,6 +164,73 @@ async def test_delete_user_account(client: AsyncClient, sample_user_data):
     assert login_response.status_code == 403
 
 
+@pytest.mark.asyncio
+async def test_deleted_account_token_rejected(client: AsyncClient, sample_user_data):
+    """Test an access token issued before deactivation stops working."""
+    tokens = await _create_and_login_user(client, sample_user_data)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    
+    # Warm the principal for this user
+    response = await client.get("/api/v1/users/me", headers=headers)
+    assert response.status_code == 200
+    
+    response = await client.delete("/api/v1/users/me", headers=headers)
+    assert response.status_code == 204
+    
+    # Same token must now be treated as an inactive user
+    response = await client.get("/api/v1/users/me", headers=headers)
+    assert response.status_code == 400
+
+
+@pytest.fixture
+def user_cache_enabled(monkeypatch):
+    """Turn on the principal cache (conftest disables it)."""
+    monkeypatch.setattr(settings, "USER_CACHE_ENABLED", True)
+
+
+async def _login_with_cold_principal(client: AsyncClient, user_data: dict) -> tuple:
+    """Log in and drop any principal cached for the id by an earlier test."""
+    tokens = await _create_and_login_user(client, user_data)
+    user_id = int(decode_token(tokens["access_token"])["sub"])
+    await principal_cache.invalidate_principal(user_id)
+    return user_id, {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+@pytest.mark.asyncio
+async def test_deleted_account_token_rejected_with_cached_principal(
+    client: AsyncClient, sample_user_data, user_cache_enabled
+):
+    """Test deactivation evicts the cached principal of a live token."""
+    user_id, headers = await _login_with_cold_principal(client, sample_user_data)
+    
+    # Served once from the database, then from the cache
+    assert (await client.get("/api/v1/users/me", headers=headers)).status_code == 200
+    assert await principal_cache.get_principal(user_id) is not None
+    
+    response = await client.delete("/api/v1/users/me", headers=headers)
+    assert response.status_code == 204
+    assert await principal_cache.get_principal(user_id) is None
+    
+    response = await client.get("/api/v1/users/me", headers=headers)
+    assert response.status_code == 400
+    await principal_cache.invalidate_principal(user_id)
+
+
+@pytest.mark.asyncio
+async def test_user_update_evicts_cached_principal(
+    client: AsyncClient, db_session: AsyncSession, sample_user_data, user_cache_enabled
+):
+    """Test an is_active change through update_user is seen by cached tokens."""
+    user_id, headers = await _login_with_cold_principal(client, sample_user_data)
+    assert (await client.get("/api/v1/users/me", headers=headers)).status_code == 200
+    
+    await user_service.update_user(db_session, user_id, UsuarioUpdate(is_active=False))
+    
+    response = await client.get("/api/v1/users/me", headers=headers)
+    assert response.status_code == 400
+    await principal_cache.invalidate_principal(user_id)
+
+
 @pytest.mark.asyncio
 async def test_get_user_by_id(client: AsyncClient, sample_user_data):
     """Test getting user by ID."""